@@ -1,15 +1,139 @@
+# Первым импортом: момент импорта readiness считается началом холодного старта
+from src.config.readiness import get_readiness
+import os
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from src.controllers.currency_controller import currency_router
-from src.controllers.exchange_rates_controller import exchange_rates_router
+from src.config.database import get_connection_pool, close_connection_pool
+from src.config.async_database import get_async_pool, close_async_pool
+from src.config.redis import get_redis_client, get_async_redis_client, close_async_redis_client
+from src.cache.invalidation_bus import get_invalidation_bus
+from src.services.rate_graph import get_rate_graph
+from src.migrations import SchemaNotReadyError, apply_migrations, verify_schema
+from src.controllers.monitoring_controller import monitoring_router
+from src.services.cache_warmup import is_cache_warmup_enabled, warm_up_cache, async_warm_up_cache
+from src.controllers.dependencies import (
+    get_currency_service,
+    get_exchange_rates_service,
+    get_async_currency_service,
+    get_async_exchange_rates_service
+)
+
+logger = logging.getLogger(__name__)
+
+API_MODE = os.getenv('API_MODE', 'sync').lower()
+
+
+def check_schema() -> None:
+    # Ошибки подключения и миграций остаются обычными RuntimeError: /ready перепроверит их позже.
+    # SchemaNotReadyError - только расхождение схемы, найденное verify_schema
+    if os.getenv('DB_AUTO_MIGRATE', 'false').lower() == 'true':
+        for migration in apply_migrations():
+            logger.info("Применена миграция %s", migration)
+    problems = verify_schema()
+    if problems:
+        raise SchemaNotReadyError(
+            "Схема БД не готова, выполните `python manage.py migrate`: " + "; ".join(problems)
+        )
+
+
+async def run_blocking(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+async def warm_up_redis() -> None:
+    await run_blocking(get_redis_client().ping)
+    if API_MODE == 'async':
+        await get_async_redis_client().ping()
+
+
+async def open_database() -> None:
+    if API_MODE == 'async':
+        await get_async_pool()
+    else:
+        await run_blocking(get_connection_pool().open)
+
+
+async def prepare_database() -> None:
+    # Одна проба "database" и при старте, и в GET /ready: БД, поднявшаяся позже, тоже проходит
+    # проверку схемы и прогрев, а не только открытие пула
+    await open_database()
+    await run_blocking(check_schema)
+    if API_MODE == 'async':
+        # Синхронный пул нужен только проверке схемы: дальше приложение работает через asyncpg
+        close_connection_pool()
+    await get_readiness().run("cache" if is_cache_warmup_enabled() else "rate_graph", warm_up_services)
+
+
+async def warm_up_database() -> None:
+    # Неготовая схема при доступной БД прерывает старт; при перепроверке она держит /ready в 503
+    await get_readiness().run("database", prepare_database, fatal=(SchemaNotReadyError,))
+
+
+async def warm_up_services() -> None:
+    # Прогрев кэша загружает и граф курсов; без прогрева загружается только граф
+    if API_MODE == 'async':
+        exchange_rates_service = await get_async_exchange_rates_service()
+        if is_cache_warmup_enabled():
+            written = await async_warm_up_cache(await get_async_currency_service(), exchange_rates_service)
+            logger.info("Кэш прогрет: %d ключей", written)
+        else:
+            await exchange_rates_service.load_rate_graph()
+    else:
+        exchange_rates_service = await get_exchange_rates_service()
+        if is_cache_warmup_enabled():
+            written = await run_blocking(warm_up_cache, await get_currency_service(), exchange_rates_service)
+            logger.info("Кэш прогрет: %d ключей", written)
+        else:
+            await run_blocking(exchange_rates_service.load_rate_graph)
+
+
+async def warm_up() -> None:
+    """Прогрев при старте: Redis и PostgreSQL поднимаются параллельно, а не друг за другом.
+
+    Недоступный Redis или БД не роняют старт - это отражается в GET /ready. Старт прерывается
+    только при неготовой схеме БД.
+    """
+    readiness = get_readiness()
+    readiness.begin()
+    bus = get_invalidation_bus()
+    bus.add_listener(get_rate_graph().apply_invalidation)
+    bus.start(get_redis_client())
+    await asyncio.gather(readiness.run("redis", warm_up_redis), warm_up_database())
+    readiness.finish()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await warm_up()
+    yield
+    get_invalidation_bus().stop()
+    if API_MODE == 'async':
+        await close_async_pool()
+        await close_async_redis_client()
+    else:
+        close_connection_pool()
+
 
 app = FastAPI(
     title="Currency Exchange API",
     description="REST API для работы с валютами и курсами обмена",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-app.include_router(currency_router)
-app.include_router(exchange_rates_router)
+if API_MODE == 'async':
+    from src.controllers.async_currency_controller import async_currency_router
+    from src.controllers.async_exchange_rates_controller import async_exchange_rates_router
+    app.include_router(async_currency_router)
+    app.include_router(async_exchange_rates_router)
+else:
+    from src.controllers.currency_controller import currency_router
+    from src.controllers.exchange_rates_controller import exchange_rates_router
+    app.include_router(currency_router)
+    app.include_router(exchange_rates_router)
+app.include_router(monitoring_router)
 
 
 @app.get("/")
@@ -25,4 +149,3 @@ def root():
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
-
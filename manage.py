@@ -0,0 +1,79 @@
+import sys
+import argparse
+from src.config.database import close_connection_pool
+from src.migrations import MIGRATIONS, apply_migrations, create_history_partitions, get_applied_versions, verify_schema
+from src.repositories.currency_repository import CurrencyRepository
+from src.repositories.exchange_rates_repository import ExchangeRatesRepository
+from src.services.currency_service import CurrencyServiceImpl
+from src.services.exchange_rates_service import ExchangeRatesServiceImpl
+from src.services.cache_warmup import warm_up_cache
+
+
+def migrate(args) -> int:
+    applied = apply_migrations()
+    for migration in applied:
+        print(f"Применена миграция {migration}")
+    if not applied:
+        print("Новых миграций нет")
+    return verify(args)
+
+
+def verify(args) -> int:
+    problems = verify_schema()
+    for problem in problems:
+        print(problem)
+    if problems:
+        return 1
+    print("Схема БД в порядке")
+    return 0
+
+
+def status(args) -> int:
+    applied = get_applied_versions()
+    for migration in MIGRATIONS:
+        mark = "x" if migration.version in applied else " "
+        print(f"[{mark}] {migration}")
+    return 0
+
+
+def history_partitions(args) -> int:
+    created = create_history_partitions()
+    print(f"Создано секций истории курсов: {created}")
+    return 0
+
+
+def warmup(args) -> int:
+    try:
+        written = warm_up_cache(
+            CurrencyServiceImpl(CurrencyRepository()),
+            ExchangeRatesServiceImpl(ExchangeRatesRepository())
+        )
+    except Exception as e:
+        print(f"Не удалось прогреть кэш: {e}")
+        return 1
+    print(f"Кэш прогрет: записано ключей {written}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Управление Currency Exchange API")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("migrate", help="Создать таблицы и применить миграции (идемпотентно)").set_defaults(handler=migrate)
+    subparsers.add_parser("verify", help="Проверить, что миграции применены и индексы на месте").set_defaults(handler=verify)
+    subparsers.add_parser("status", help="Показать применённые миграции").set_defaults(handler=status)
+    subparsers.add_parser(
+        "history-partitions", help="Создать помесячные секции истории курсов на несколько месяцев вперёд"
+    ).set_defaults(handler=history_partitions)
+    subparsers.add_parser("warmup", help="Заполнить Redis всеми валютами и курсами одним pipeline").set_defaults(handler=warmup)
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 2
+    try:
+        return args.handler(args)
+    finally:
+        close_connection_pool()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+from .local_cache import LocalCache, get_local_cache
+from .invalidation_bus import InvalidationBus, get_invalidation_bus, INVALIDATION_CHANNEL, INVALIDATION_SEQUENCE_KEY
+from .single_flight import SingleFlight, AsyncSingleFlight, get_single_flight, get_async_single_flight
+from .policy import CachePolicy, CachePolicies, CachePolicySupport, get_cache_policies
+from .codec import CacheCodec, TupleCodec, CacheEntryCodec, get_cache_codec
+from .batch import CacheBatch, AsyncCacheBatch
+from .rendered import RenderedResponse
+from .refresh import BackgroundRefresher, AsyncBackgroundRefresher, get_background_refresher, get_async_background_refresher
+from .generations import GenerationalCacheSupport, CURRENCY_GENERATION_KEY, EXCHANGE_RATE_GENERATION_KEY
+
+__all__ = [
+    'LocalCache',
+    'get_local_cache',
+    'InvalidationBus',
+    'get_invalidation_bus',
+    'INVALIDATION_CHANNEL',
+    'INVALIDATION_SEQUENCE_KEY',
+    'GenerationalCacheSupport',
+    'CURRENCY_GENERATION_KEY',
+    'EXCHANGE_RATE_GENERATION_KEY',
+    'SingleFlight',
+    'AsyncSingleFlight',
+    'get_single_flight',
+    'get_async_single_flight',
+    'CachePolicy',
+    'CachePolicies',
+    'CachePolicySupport',
+    'get_cache_policies',
+    'BackgroundRefresher',
+    'AsyncBackgroundRefresher',
+    'get_background_refresher',
+    'get_async_background_refresher',
+    'CacheCodec',
+    'TupleCodec',
+    'CacheEntryCodec',
+    'get_cache_codec',
+    'RenderedResponse',
+    'CacheBatch',
+    'AsyncCacheBatch'
+]
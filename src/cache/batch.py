@@ -0,0 +1,77 @@
+from typing import List, Optional, Sequence, Tuple
+
+
+class _CacheBatchBase:
+
+    def __init__(self, redis_client, transaction: bool = False):
+        self.redis_client = redis_client
+        self.transaction = transaction
+        self._commands: List[Tuple[str, tuple]] = []
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def setex(self, key: str, ttl: int, value: str) -> int:
+        return self._add("setex", key, ttl, value)
+
+    def delete(self, *keys: str) -> int:
+        return self._add("delete", *keys)
+
+    def incr(self, key: str) -> int:
+        return self._add("incr", key)
+
+    def _add(self, command: str, *args) -> int:
+        # Возвращает позицию результата команды в списке, который вернёт execute()
+        self._commands.append((command, args))
+        return len(self._commands) - 1
+
+    def _take(self) -> List[Tuple[str, tuple]]:
+        commands, self._commands = self._commands, []
+        return commands
+
+    def _pipeline(self, commands: List[Tuple[str, tuple]]):
+        pipeline = self.redis_client.pipeline(transaction=self.transaction)
+        for command, args in commands:
+            getattr(pipeline, command)(*args)
+        return pipeline
+
+
+class CacheBatch(_CacheBatchBase):
+    """Пакет команд к Redis поверх get_redis_client().
+
+    Записи (setex, delete, incr) копятся и уходят одним pipeline, с transaction=True - внутри
+    MULTI/EXEC. Чтения нескольких ключей идут одним MGET. Одиночная команда без транзакции
+    отправляется напрямую, без pipeline.
+    """
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[str]]:
+        if not keys:
+            return []
+        return list(self.redis_client.mget(list(keys)))
+
+    def execute(self) -> list:
+        commands = self._take()
+        if not commands:
+            return []
+        if len(commands) == 1 and not self.transaction:
+            command, args = commands[0]
+            return [getattr(self.redis_client, command)(*args)]
+        return self._pipeline(commands).execute()
+
+
+class AsyncCacheBatch(_CacheBatchBase):
+    """Асинхронный вариант CacheBatch для redis.asyncio."""
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[str]]:
+        if not keys:
+            return []
+        return list(await self.redis_client.mget(list(keys)))
+
+    async def execute(self) -> list:
+        commands = self._take()
+        if not commands:
+            return []
+        if len(commands) == 1 and not self.transaction:
+            command, args = commands[0]
+            return [await getattr(self.redis_client, command)(*args)]
+        return await self._pipeline(commands).execute()
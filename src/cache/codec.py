@@ -0,0 +1,148 @@
+import os
+import json
+import zlib
+import base64
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+from ..models.currency import Currency
+from ..models.exchange_rates import ExchangeRates
+
+HEADER_SEPARATOR = "|"
+COMPRESSED_FLAG = ".z"
+
+
+class CacheCodec(ABC):
+    """Преобразование моделей в JSON-совместимую структуру и обратно.
+
+    name записывается в заголовок каждой записи и должен меняться вместе с форматом: так
+    старые и новые воркеры не читают чужие записи, а считают их промахом.
+    """
+    name: str = ""
+
+    @abstractmethod
+    def pack(self, value: Any) -> list:
+        pass
+
+    @abstractmethod
+    def unpack(self, data: list) -> Any:
+        pass
+
+
+class TupleCodec(CacheCodec):
+    """Компактный формат: модели хранятся кортежами, курсы ссылаются на валюты по id.
+
+    [kind, ...]: "c" - валюта [id, code, fullname, sign], "cl" - список валют,
+    "r"/"rl" - курс или список курсов: таблица валют и строки [id, rate, base_id, target_id].
+    """
+    name = "t1"
+
+    def pack(self, value: Any) -> list:
+        if isinstance(value, Currency):
+            return ["c", self._pack_currency(value)]
+        if isinstance(value, ExchangeRates):
+            currencies, rows = self._pack_exchange_rates([value])
+            return ["r", currencies, rows[0]]
+        if isinstance(value, list):
+            if value and isinstance(value[0], ExchangeRates):
+                currencies, rows = self._pack_exchange_rates(value)
+                return ["rl", currencies, rows]
+            return ["cl", [self._pack_currency(currency) for currency in value]]
+        raise ValueError(f"Неподдерживаемый тип значения кэша: {type(value).__name__}")
+
+    def unpack(self, data: list) -> Any:
+        kind = data[0]
+        if kind == "c":
+            return self._unpack_currency(data[1])
+        if kind == "cl":
+            return [self._unpack_currency(item) for item in data[1]]
+        if kind in ("r", "rl"):
+            currencies = {item[0]: self._unpack_currency(item) for item in data[1]}
+            if kind == "r":
+                return self._unpack_exchange_rate(data[2], currencies)
+            return [self._unpack_exchange_rate(row, currencies) for row in data[2]]
+        raise ValueError(f"Неизвестный вид записи кэша: {kind}")
+
+    @staticmethod
+    def _pack_currency(currency: Currency) -> list:
+        return [currency.id, currency.code, currency.fullname, currency.sign]
+
+    @staticmethod
+    def _unpack_currency(item: list) -> Currency:
+        return Currency(id=item[0], code=item[1], fullname=item[2], sign=item[3])
+
+    def _pack_exchange_rates(self, exchange_rates_list: List[ExchangeRates]) -> Tuple[list, list]:
+        currencies = {}
+        rows = []
+        for exchange_rate in exchange_rates_list:
+            for currency in (exchange_rate.base_currency, exchange_rate.target_currency):
+                if currency is not None and currency.id not in currencies:
+                    currencies[currency.id] = self._pack_currency(currency)
+            rows.append([
+                exchange_rate.id,
+                str(exchange_rate.rate) if exchange_rate.rate is not None else None,
+                exchange_rate.base_currency.id if exchange_rate.base_currency else None,
+                exchange_rate.target_currency.id if exchange_rate.target_currency else None
+            ])
+        return list(currencies.values()), rows
+
+    @staticmethod
+    def _unpack_exchange_rate(row: list, currencies: Dict[Optional[int], Currency]) -> ExchangeRates:
+        return ExchangeRates(
+            id=row[0],
+            rate=Decimal(row[1]) if row[1] is not None else None,
+            base_currency=currencies.get(row[2]) if row[2] is not None else None,
+            target_currency=currencies.get(row[3]) if row[3] is not None else None
+        )
+
+
+CODECS: Dict[str, CacheCodec] = {codec.name: codec for codec in (TupleCodec(),)}
+
+
+class CacheEntryCodec:
+    """Запись в Redis: заголовок "{codec}[.z]|" и тело [soft_expiry, delta, *codec.pack(value)].
+
+    Тело длиннее compress_min_size символов сжимается zlib и хранится в base64. Читаются все
+    кодеки из CODECS, пишется только выбранный - новый формат выкатывается так: сначала
+    воркеры, умеющие его читать, затем переключение CACHE_CODEC.
+    """
+
+    def __init__(self, codec: Optional[CacheCodec] = None, compress_min_size: int = 4096,
+                 codecs: Optional[Dict[str, CacheCodec]] = None):
+        self.codecs = CODECS if codecs is None else codecs
+        self.codec = codec or self.codecs[TupleCodec.name]
+        self.compress_min_size = compress_min_size
+
+    def dumps(self, value: Any, soft_expiry: float, delta: float) -> str:
+        body = json.dumps(
+            [round(soft_expiry, 3), round(delta, 6)] + self.codec.pack(value),
+            ensure_ascii=False, separators=(",", ":")
+        )
+        header = self.codec.name
+        if self.compress_min_size and len(body) >= self.compress_min_size:
+            body = base64.b64encode(zlib.compress(body.encode("utf-8"))).decode("ascii")
+            header += COMPRESSED_FLAG
+        return header + HEADER_SEPARATOR + body
+
+    def loads(self, raw: str) -> Tuple[Any, float, float]:
+        header, separator, body = raw.partition(HEADER_SEPARATOR)
+        compressed = header.endswith(COMPRESSED_FLAG)
+        if compressed:
+            header = header[:-len(COMPRESSED_FLAG)]
+        codec = self.codecs.get(header) if separator else None
+        if codec is None:
+            raise ValueError(f"Неизвестный формат записи кэша: {header[:16]}")
+        if compressed:
+            body = zlib.decompress(base64.b64decode(body)).decode("utf-8")
+        data = json.loads(body)
+        return codec.unpack(data[2:]), float(data[0]), float(data[1])
+
+
+_cache_codec = CacheEntryCodec(
+    codec=CODECS[os.getenv('CACHE_CODEC', TupleCodec.name)],
+    compress_min_size=int(os.getenv('CACHE_COMPRESS_MIN_SIZE', '4096'))
+)
+
+
+def get_cache_codec() -> CacheEntryCodec:
+    return _cache_codec
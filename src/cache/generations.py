@@ -0,0 +1,58 @@
+from typing import Iterable, Optional, Tuple
+from .invalidation_bus import INVALIDATION_SEQUENCE_KEY
+
+CURRENCY_GENERATION_KEY = "cache:gen:currency"
+EXCHANGE_RATE_GENERATION_KEY = "cache:gen:exchange_rate"
+
+# В L1 поколение живёт недолго: шина инвалидации удаляет его сразу, TTL страхует на случай её простоя
+GENERATION_LOCAL_TTL = 1.0
+
+
+class GenerationalCacheSupport:
+    """Ключи кэша с поколением пространства имён.
+
+    Поколение - счётчик в Redis (cache:gen:*), который входит в каждый ключ. Запись делает
+    INCR своего счётчика, и все ключи, собранные из старого значения, перестают читаться -
+    без перебора и удаления. Старые записи в Redis дожидаются своего TTL.
+    Первый ключ в generation_keys - собственное поколение сервиса, остальные - поколения
+    данных, которые встроены в его записи.
+    """
+
+    generation_keys: Tuple[str, ...] = ()
+
+    def _local_generation(self) -> Optional[str]:
+        values = [self.local_cache.get(key) for key in self.generation_keys]
+        if any(value is None for value in values):
+            return None
+        return self._generation_tag(values)
+
+    def _remember_generation(self, values: Iterable[Optional[str]]) -> str:
+        values = [int(value or 0) for value in values]
+        for key, value in zip(self.generation_keys, values):
+            self.local_cache.set(key, value, GENERATION_LOCAL_TTL)
+        return self._generation_tag(values)
+
+    def _queue_generation_bump(self, batch, *counters: str):
+        # Поколение, номер сообщения шины и дополнительные счётчики меняются одной транзакцией;
+        # результаты execute() идут в том же порядке
+        key = self.generation_keys[0]
+        self.local_cache.delete(key)
+        batch.incr(key)
+        batch.incr(INVALIDATION_SEQUENCE_KEY)
+        for counter in counters:
+            batch.incr(counter)
+        return batch
+
+    def _remember_bumped_generation(self, value) -> None:
+        self.local_cache.set(self.generation_keys[0], int(value), GENERATION_LOCAL_TTL)
+
+    @staticmethod
+    def _versioned_key(namespace: str, generation: Optional[str], suffix: str) -> Optional[str]:
+        # Без поколения ключ собрать нельзя: такой запрос идёт мимо кэша
+        if generation is None:
+            return None
+        return f"{namespace}:{generation}:{suffix}"
+
+    @staticmethod
+    def _generation_tag(values) -> str:
+        return "g" + ".".join(str(value) for value in values)
@@ -0,0 +1,160 @@
+import json
+import uuid
+import logging
+import threading
+from typing import Callable, Iterable, List, Optional
+from .local_cache import LocalCache, get_local_cache
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "cache:invalidation"
+INVALIDATION_SEQUENCE_KEY = "cache:invalidation:seq"
+
+
+class InvalidationBus:
+    """Рассылка инвалидаций локальных кэшей между воркерами через Redis pub/sub.
+
+    Каждое сообщение получает номер из INCR INVALIDATION_SEQUENCE_KEY. Если воркер видит
+    пропуск в номерах или переподключается к Redis, он не знает, что пропустил, и
+    очищает локальный кэш целиком. Вместе с ключами может прийти новая версия графа
+    курсов (graph_version) - её разбирают подписчики, добавленные через add_listener.
+    """
+
+    def __init__(self, local_cache: LocalCache, channel: str = INVALIDATION_CHANNEL):
+        self.local_cache = local_cache
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+        self.last_sequence: Optional[int] = None
+        self.published = 0
+        self.received = 0
+        self.flushes = 0
+        self._listeners: List[Callable[[Optional[dict]], None]] = []
+        self._redis_client = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Callable[[Optional[dict]], None]) -> None:
+        # listener получает разобранное сообщение или None, если локальный кэш сброшен целиком
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def publish(self, redis_client, keys: Iterable[str], graph_version: Optional[int] = None,
+                sequence: Optional[int] = None) -> None:
+        # sequence передают, если номер сообщения уже получен INCR в одном пакете с записью
+        keys = list(keys)
+        try:
+            if sequence is None:
+                sequence = redis_client.incr(INVALIDATION_SEQUENCE_KEY)
+            redis_client.publish(self.channel, self._encode(sequence, keys, graph_version))
+            self.published += 1
+        except Exception as e:
+            pass
+
+    async def apublish(self, redis_client, keys: Iterable[str], graph_version: Optional[int] = None,
+                       sequence: Optional[int] = None) -> None:
+        # sequence передают, если номер сообщения уже получен INCR в одном пакете с записью
+        keys = list(keys)
+        try:
+            if sequence is None:
+                sequence = await redis_client.incr(INVALIDATION_SEQUENCE_KEY)
+            await redis_client.publish(self.channel, self._encode(sequence, keys, graph_version))
+            self.published += 1
+        except Exception as e:
+            pass
+
+    def start(self, redis_client) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._redis_client = redis_client
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen, name="cache-invalidation-bus", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def handle_message(self, data: str) -> None:
+        message = json.loads(data)
+        sequence = int(message["seq"])
+        keys = message.get("keys", [])
+        with self._lock:
+            self.received += 1
+            gap = self.last_sequence is not None and sequence > self.last_sequence + 1
+            if self.last_sequence is None or sequence > self.last_sequence:
+                self.last_sequence = sequence
+        if gap:
+            self._flush()
+        elif message.get("origin") != self.origin:
+            self.local_cache.delete(*keys)
+        self._notify(message)
+
+    def resync(self, current_sequence: int) -> None:
+        with self._lock:
+            missed = self.last_sequence is not None and current_sequence != self.last_sequence
+            self.last_sequence = current_sequence
+        if missed:
+            self._flush()
+
+    def stats(self) -> dict:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "last_sequence": self.last_sequence,
+            "published": self.published,
+            "received": self.received,
+            "flushes": self.flushes
+        }
+
+    def _listen(self) -> None:
+        backoff = 0.5
+        while not self._stop.is_set():
+            pubsub = None
+            try:
+                pubsub = self._redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Подписка уже активна, поэтому всё, что новее прочитанного номера, придёт сообщением
+                self.resync(int(self._redis_client.get(INVALIDATION_SEQUENCE_KEY) or 0))
+                backoff = 0.5
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get("type") == "message":
+                        self.handle_message(message["data"])
+            except Exception as e:
+                logger.warning("Шина инвалидации кэша потеряла соединение с Redis: %s", e)
+                self._flush()
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+    def _flush(self) -> None:
+        self.flushes += 1
+        self.local_cache.clear()
+        self._notify(None)
+
+    def _notify(self, message: Optional[dict]) -> None:
+        for listener in self._listeners:
+            try:
+                listener(message)
+            except Exception as e:
+                logger.warning("Ошибка в обработчике инвалидации кэша: %s", e)
+
+    def _encode(self, sequence: int, keys: List[str], graph_version: Optional[int]) -> str:
+        message = {"seq": int(sequence), "origin": self.origin, "keys": keys}
+        if graph_version is not None:
+            message["graph_version"] = int(graph_version)
+        return json.dumps(message, ensure_ascii=False)
+
+
+_invalidation_bus = InvalidationBus(get_local_cache())
+
+
+def get_invalidation_bus() -> InvalidationBus:
+    return _invalidation_bus
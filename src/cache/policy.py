@@ -0,0 +1,166 @@
+import os
+import math
+import time
+import random
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from .rendered import RenderedResponse
+
+
+@dataclass
+class CachePolicy:
+    """Срок жизни записей одного семейства ключей.
+
+    soft_ttl - через сколько секунд запись считается устаревшей: её ещё отдают, но обновляют в
+    фоне. hard_ttl - TTL ключа в Redis, после него запись исчезает. beta управляет досрочным
+    обновлением (XFetch): чем дольше считалось значение, тем раньше до soft_ttl начинается
+    обновление. jitter разносит soft_ttl записей, созданных одновременно.
+    """
+    soft_ttl: float = 600.0
+    hard_ttl: int = 3600
+    beta: float = 1.0
+    jitter: float = 0.1
+
+    @classmethod
+    def parse(cls, value: str) -> 'CachePolicy':
+        # Формат: "soft_ttl,hard_ttl[,beta[,jitter]]", например "60,3600" или "60,3600,2,0"
+        parts = [part.strip() for part in value.split(",")]
+        policy = cls(soft_ttl=float(parts[0]), hard_ttl=int(parts[1]))
+        if len(parts) > 2:
+            policy.beta = float(parts[2])
+        if len(parts) > 3:
+            policy.jitter = float(parts[3])
+        if policy.soft_ttl > policy.hard_ttl:
+            raise ValueError(f"soft_ttl больше hard_ttl в политике кэша: {value}")
+        return policy
+
+    def soft_expiry(self, now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        return now + self.soft_ttl * (1 - self.jitter * random.random())
+
+    def should_refresh(self, soft_expiry: float, delta: float, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        return now - delta * self.beta * math.log(1.0 - random.random()) >= soft_expiry
+
+
+DEFAULT_POLICIES: Dict[str, CachePolicy] = {
+    "currency": CachePolicy(soft_ttl=600, hard_ttl=3600),
+    "exchange_rate": CachePolicy(soft_ttl=300, hard_ttl=3600),
+    "exchange_rate:all": CachePolicy(soft_ttl=120, hard_ttl=3600),
+    "exchange_rate:page": CachePolicy(soft_ttl=120, hard_ttl=3600)
+}
+
+
+class CachePolicies:
+    """Политики по префиксам ключей: "exchange_rate:all", затем "exchange_rate", затем default.
+
+    Префикс берётся из ключа без поколения: currency:g3:id:1 -> currency:id. Политику любого
+    префикса можно переопределить переменной CACHE_POLICY_<ПРЕФИКС>, например
+    CACHE_POLICY_EXCHANGE_RATE_ALL=60,3600.
+    """
+
+    def __init__(self, policies: Optional[Dict[str, CachePolicy]] = None, default: Optional[CachePolicy] = None):
+        self.policies = dict(DEFAULT_POLICIES if policies is None else policies)
+        self.default = default or CachePolicy()
+
+    @classmethod
+    def from_env(cls) -> 'CachePolicies':
+        policies = cls()
+        default = os.getenv('CACHE_POLICY_DEFAULT')
+        if default:
+            policies.default = CachePolicy.parse(default)
+        prefix = 'CACHE_POLICY_'
+        for name, value in os.environ.items():
+            if name.startswith(prefix) and name != 'CACHE_POLICY_DEFAULT' and value:
+                family = name[len(prefix):].lower()
+                for namespace in ("exchange_rate", "currency"):
+                    if family.startswith(namespace):
+                        family = namespace + family[len(namespace):].replace("_", ":", 1)
+                        break
+                policies.policies[family] = CachePolicy.parse(value)
+        return policies
+
+    def for_key(self, key: str) -> CachePolicy:
+        parts = key.split(":")
+        if len(parts) > 2:
+            policy = self.policies.get(f"{parts[0]}:{parts[2]}")
+            if policy is not None:
+                return policy
+        return self.policies.get(parts[0], self.default)
+
+
+class CachePolicySupport:
+    """Stale-while-revalidate для сервисов: ждёт в наследнике cache_policies, refresher,
+    cache_codec и local_cache."""
+
+    def _cache_policy(self, key: str) -> CachePolicy:
+        return self.cache_policies.for_key(key)
+
+    def _revalidate(self, key: str, soft_expiry: float, delta: float,
+                    refresh: Optional[Callable[[], object]]) -> bool:
+        # True - запись свежая; иначе её всё равно отдают, а refresh перезагружает её в фоне
+        if not self._cache_policy(key).should_refresh(soft_expiry, delta):
+            return True
+        if refresh is not None:
+            self.refresher.submit(key, refresh)
+        return False
+
+    def _cached_value(self, key: str, cached_data: Optional[str],
+                      refresh: Optional[Callable[[], object]] = None) -> Optional[object]:
+        # Запись, прочитанная из Redis: свежая поднимается в L1, устаревшая отдаётся и обновляется в фоне
+        if not cached_data:
+            return None
+        value, soft_expiry, delta = self.cache_codec.loads(cached_data)
+        if self._revalidate(key, soft_expiry, delta, refresh):
+            self.local_cache.set(key, value, self._cache_policy(key).soft_ttl)
+        return value
+
+    def _split_local(self, keys: Iterable[str]) -> Tuple[Dict[str, object], List[str]]:
+        # Значения из L1 и ключи, за которыми нужно идти в Redis
+        values = {}
+        missing = []
+        for key in keys:
+            local_value = self.local_cache.get(key)
+            if local_value is not None:
+                values[key] = local_value
+            else:
+                missing.append(key)
+        return values, missing
+
+    def _cached_values(self, keys: Sequence[str], cached_data: Sequence[Optional[str]],
+                       refreshers: Dict[str, Optional[Callable[[], object]]]) -> Dict[str, object]:
+        values = {}
+        for key, data in zip(keys, cached_data):
+            value = self._cached_value(key, data, refreshers[key])
+            if value is not None:
+                values[key] = value
+        return values
+
+    def _local_rendered(self, key: Optional[str]) -> Optional[RenderedResponse]:
+        return self.local_cache.get(key) if key else None
+
+    def _remember_rendered(self, key: Optional[str], body: bytes) -> RenderedResponse:
+        # Готовое тело ответа живёт в L1, пока не сменится поколение: повторные запросы не трогают модели
+        rendered = RenderedResponse.from_body(body)
+        if key:
+            self.local_cache.set(key, rendered, self._cache_policy(key).soft_ttl)
+        return rendered
+
+    def _queue_cache_entries(self, batch, entries: Iterable[Tuple[Optional[str], object]], delta: float = 0.0) -> int:
+        # Записи сразу попадают в L1, а в Redis уходят с batch.execute() вызывающего
+        queued = 0
+        for key, value in entries:
+            if key is None:
+                continue
+            policy = self._cache_policy(key)
+            self.local_cache.set(key, value, policy.soft_ttl)
+            batch.setex(key, policy.hard_ttl, self.cache_codec.dumps(value, policy.soft_expiry(), delta))
+            queued += 1
+        return queued
+
+
+_cache_policies = CachePolicies.from_env()
+
+
+def get_cache_policies() -> CachePolicies:
+    return _cache_policies
@@ -0,0 +1,87 @@
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Set
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundRefresher:
+    """Фоновое обновление устаревших записей кэша: один запуск на ключ, пока он не завершится."""
+
+    def __init__(self, max_workers: int = 4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cache-refresh")
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+        self.scheduled = 0
+        self.failed = 0
+
+    def submit(self, key: str, loader: Callable[[], object]) -> bool:
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+            self.scheduled += 1
+        try:
+            self._executor.submit(self._run, key, loader)
+        except RuntimeError:
+            # Пул уже остановлен (завершение процесса) - запись обновится при следующем промахе
+            with self._lock:
+                self._pending.discard(key)
+            return False
+        return True
+
+    def stats(self) -> dict:
+        return {"pending": len(self._pending), "scheduled": self.scheduled, "failed": self.failed}
+
+    def _run(self, key: str, loader: Callable[[], object]) -> None:
+        try:
+            loader()
+        except Exception as e:
+            self.failed += 1
+            logger.warning("Не удалось обновить запись кэша %s: %s", key, e)
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+
+class AsyncBackgroundRefresher:
+    """Асинхронный вариант BackgroundRefresher: обновление идёт задачей в текущем event loop."""
+
+    def __init__(self):
+        self._tasks = {}
+        self.scheduled = 0
+        self.failed = 0
+
+    def submit(self, key: str, loader: Callable[[], Awaitable[object]]) -> bool:
+        if key in self._tasks:
+            return False
+        self.scheduled += 1
+        self._tasks[key] = asyncio.get_running_loop().create_task(self._run(key, loader))
+        return True
+
+    def stats(self) -> dict:
+        return {"pending": len(self._tasks), "scheduled": self.scheduled, "failed": self.failed}
+
+    async def _run(self, key: str, loader: Callable[[], Awaitable[object]]) -> None:
+        try:
+            await loader()
+        except Exception as e:
+            self.failed += 1
+            logger.warning("Не удалось обновить запись кэша %s: %s", key, e)
+        finally:
+            self._tasks.pop(key, None)
+
+
+_refresher = BackgroundRefresher(max_workers=int(os.getenv('CACHE_REFRESH_WORKERS', '4')))
+_async_refresher = AsyncBackgroundRefresher()
+
+
+def get_background_refresher() -> BackgroundRefresher:
+    return _refresher
+
+
+def get_async_background_refresher() -> AsyncBackgroundRefresher:
+    return _async_refresher
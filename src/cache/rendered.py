@@ -0,0 +1,28 @@
+import hashlib
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class RenderedResponse:
+    """Готовое тело ответа списка и его ETag.
+
+    Хранится в L1 под ключом с поколением данных, поэтому пересобирается только после записи.
+    """
+    body: bytes
+    etag: str
+
+    @classmethod
+    def from_body(cls, body: bytes) -> 'RenderedResponse':
+        return cls(body=body, etag='"' + hashlib.sha1(body).hexdigest()[:20] + '"')
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag == "*" or tag == self.etag:
+                return True
+        return False
@@ -0,0 +1,199 @@
+import os
+import time
+import uuid
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar('T')
+
+# Снимаем блокировку, только если она всё ещё наша: по истечении TTL её мог взять другой воркер
+_RELEASE_LOCK_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+
+class _SingleFlightBase:
+
+    def __init__(self, redis_lock: bool = False, lock_ttl: float = 5.0, poll_interval: float = 0.05):
+        self.redis_lock = redis_lock
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+        self.loads = 0
+        self.coalesced = 0
+        self.lock_waits = 0
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    def stats(self) -> dict:
+        return {
+            "redis_lock": self.redis_lock,
+            "in_flight": len(self._calls),
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "lock_waits": self.lock_waits
+        }
+
+    @staticmethod
+    def _lock_key(key: str) -> str:
+        return f"lock:{key}"
+
+
+class SingleFlight(_SingleFlightBase):
+    """Схлопывание одновременных промахов кэша по одному ключу.
+
+    Внутри процесса первый запрос (лидер) загружает значение, остальные ждут его результат.
+    С redis_lock=True лидеры разных воркеров дополнительно договариваются через
+    SET lock:{key} NX PX: кто не взял блокировку, опрашивает кэш (probe), пока она не снята.
+    """
+
+    def __init__(self, redis_lock: bool = False, lock_ttl: float = 5.0, poll_interval: float = 0.05):
+        super().__init__(redis_lock, lock_ttl, poll_interval)
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Optional[str], loader: Callable[[], T], redis_client=None,
+           probe: Optional[Callable[[], Optional[T]]] = None) -> T:
+        if key is None:
+            return loader()
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+        if not leader:
+            self.coalesced += 1
+            return future.result()
+
+        try:
+            result = self._load(key, loader, redis_client, probe)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def _load(self, key: str, loader: Callable[[], T], redis_client, probe) -> T:
+        self.loads += 1
+        if not self.redis_lock or redis_client is None:
+            return loader()
+        lock_key = self._lock_key(key)
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_ttl
+        while True:
+            try:
+                acquired = redis_client.set(lock_key, token, nx=True, px=int(self.lock_ttl * 1000))
+            except Exception as e:
+                return loader()
+            if acquired:
+                try:
+                    return loader()
+                finally:
+                    try:
+                        redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                    except Exception as e:
+                        pass
+            self.lock_waits += 1
+            while time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+                value = probe() if probe is not None else None
+                if value is not None:
+                    return value
+                try:
+                    if not redis_client.exists(lock_key):
+                        break
+                except Exception as e:
+                    return loader()
+            else:
+                return loader()
+
+
+class AsyncSingleFlight(_SingleFlightBase):
+    """Асинхронный вариант SingleFlight для сервисов на asyncpg/redis.asyncio."""
+
+    def __init__(self, redis_lock: bool = False, lock_ttl: float = 5.0, poll_interval: float = 0.05):
+        super().__init__(redis_lock, lock_ttl, poll_interval)
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: Optional[str], loader: Callable[[], Awaitable[T]], redis_client=None,
+                 probe: Optional[Callable[[], Awaitable[Optional[T]]]] = None) -> T:
+        if key is None:
+            return await loader()
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await self._load(key, loader, redis_client, probe)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Исключение уже доставлено лидеру; если ждущих нет, не даём asyncio ругаться на него
+            future.exception()
+            raise
+        finally:
+            self._calls.pop(key, None)
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[T]], redis_client, probe) -> T:
+        self.loads += 1
+        if not self.redis_lock or redis_client is None:
+            return await loader()
+        lock_key = self._lock_key(key)
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_ttl
+        while True:
+            try:
+                acquired = await redis_client.set(lock_key, token, nx=True, px=int(self.lock_ttl * 1000))
+            except Exception as e:
+                return await loader()
+            if acquired:
+                try:
+                    return await loader()
+                finally:
+                    try:
+                        await redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                    except Exception as e:
+                        pass
+            self.lock_waits += 1
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.poll_interval)
+                value = await probe() if probe is not None else None
+                if value is not None:
+                    return value
+                try:
+                    if not await redis_client.exists(lock_key):
+                        break
+                except Exception as e:
+                    return await loader()
+            else:
+                return await loader()
+
+
+def _settings() -> dict:
+    return {
+        "redis_lock": os.getenv('CACHE_SINGLE_FLIGHT_REDIS_LOCK', 'false').lower() == 'true',
+        "lock_ttl": float(os.getenv('CACHE_SINGLE_FLIGHT_LOCK_TTL', '5'))
+    }
+
+
+_single_flight = SingleFlight(**_settings())
+_async_single_flight = AsyncSingleFlight(**_settings())
+
+
+def get_single_flight() -> SingleFlight:
+    return _single_flight
+
+
+def get_async_single_flight() -> AsyncSingleFlight:
+    return _async_single_flight
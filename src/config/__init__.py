@@ -1,4 +1,3 @@
-from .database import get_db_connection
-
-__all__ = ['get_db_connection']
+from .database import get_db_connection, get_connection_pool, get_pool_stats, close_connection_pool
 
+__all__ = ['get_db_connection', 'get_connection_pool', 'get_pool_stats', 'close_connection_pool']
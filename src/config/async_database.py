@@ -0,0 +1,121 @@
+import time
+import asyncio
+import asyncpg
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from .database import PoolConfig, _PooledConnection
+
+_async_pool: Optional[asyncpg.Pool] = None
+_async_pool_config: Optional[PoolConfig] = None
+_async_pool_lock: Optional[asyncio.Lock] = None
+# Возраст и время последнего использования соединений asyncpg по PID их бэкенда
+_async_connections: Dict[int, _PooledConnection] = {}
+_async_discarded = 0
+
+
+async def _register_connection(connection) -> None:
+    # Соединения, которые asyncpg закрыл сам (простой, обрыв), забываются при открытии новых
+    for pid in [pid for pid, pooled in _async_connections.items() if pooled.connection.is_closed()]:
+        del _async_connections[pid]
+    _async_connections[connection.get_server_pid()] = _PooledConnection(connection)
+
+
+async def get_async_pool() -> asyncpg.Pool:
+    global _async_pool, _async_pool_config, _async_pool_lock
+    if _async_pool is not None:
+        return _async_pool
+    if _async_pool_lock is None:
+        _async_pool_lock = asyncio.Lock()
+    async with _async_pool_lock:
+        if _async_pool is None:
+            config = PoolConfig.from_env()
+            _async_pool_config = config
+            # max_lifetime и health_check_interval проверяются при выдаче соединения в _acquire, как в
+            # синхронном пуле; простаивающие соединения asyncpg закрывает сам по своему таймауту
+            _async_pool = await asyncpg.create_pool(
+                host=config.host,
+                port=config.port,
+                database=config.database,
+                user=config.user,
+                password=config.password,
+                timeout=config.connect_timeout,
+                min_size=config.min_size,
+                max_size=config.max_size,
+                init=_register_connection
+            )
+    return _async_pool
+
+
+async def close_async_pool() -> None:
+    global _async_pool
+    if _async_pool is not None:
+        pool = _async_pool
+        _async_pool = None
+        _async_connections.clear()
+        await pool.close()
+
+
+def get_async_pool_stats() -> dict:
+    if _async_pool is None:
+        return {"size": 0, "in_use": 0, "idle": 0}
+    size = _async_pool.get_size()
+    idle = _async_pool.get_idle_size()
+    return {
+        "size": size,
+        "in_use": size - idle,
+        "idle": idle,
+        "min_size": _async_pool.get_min_size(),
+        "max_size": _async_pool.get_max_size(),
+        "discarded": _async_discarded
+    }
+
+
+async def _acquire(pool: asyncpg.Pool, config: PoolConfig):
+    # Соединение старше max_lifetime или не прошедшее проверку после простоя закрывается, и
+    # asyncpg откроет на его месте новое при следующей выдаче
+    global _async_discarded
+    deadline = time.monotonic() + config.checkout_timeout
+    while True:
+        connection = await pool.acquire(timeout=max(deadline - time.monotonic(), 0))
+        pid = connection.get_server_pid()
+        pooled = _async_connections.get(pid)
+        if pooled is None or await _is_usable(pooled, connection, config):
+            return connection
+        _async_connections.pop(pid, None)
+        _async_discarded += 1
+        connection.terminate()
+        await pool.release(connection)
+
+
+async def _is_usable(pooled: _PooledConnection, connection, config: PoolConfig) -> bool:
+    now = time.monotonic()
+    if connection.is_closed() or now - pooled.created_at >= config.max_lifetime:
+        return False
+    if now - pooled.last_used_at < config.health_check_interval:
+        return True
+    try:
+        await connection.execute("SELECT 1")
+        return True
+    except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError):
+        return False
+
+
+@asynccontextmanager
+async def get_async_db_connection():
+    try:
+        pool = await get_async_pool()
+        connection = await _acquire(pool, _async_pool_config)
+        try:
+            async with connection.transaction():
+                yield connection
+        finally:
+            pooled = _async_connections.get(connection.get_server_pid())
+            if pooled is not None:
+                pooled.last_used_at = time.monotonic()
+            await pool.release(connection)
+    except asyncpg.PostgresError as e:
+        error_msg = str(e) if str(e) else f"Database connection error: {type(e).__name__}"
+        raise RuntimeError(f"Ошибка подключения к базе данных: {error_msg}") from e
+    except Exception as e:
+        error_msg = str(e) if str(e) else f"Unexpected error: {type(e).__name__}"
+        raise RuntimeError(f"Ошибка подключения к базе данных: {error_msg}") from e
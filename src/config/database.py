@@ -1,38 +1,282 @@
 import os
+import time
+import threading
 import psycopg2
+from collections import deque
 from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional, Deque
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
+class PoolTimeoutError(RuntimeError):
+    pass
+
+
+@dataclass
+class PoolConfig:
+    host: str = 'localhost'
+    port: int = 5432
+    database: str = 'db'
+    user: str = 'username'
+    password: str = 'password'
+    connect_timeout: int = 5
+    min_size: int = 1
+    max_size: int = 10
+    max_lifetime: float = 1800.0
+    checkout_timeout: float = 5.0
+    health_check_interval: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> 'PoolConfig':
+        return cls(
+            host=os.getenv('DB_HOST', 'localhost'),
+            port=int(os.getenv('DB_PORT', '5432')),
+            database=os.getenv('DB_NAME', 'db'),
+            user=os.getenv('DB_USER', 'username'),
+            password=os.getenv('DB_PASSWORD', 'password'),
+            connect_timeout=int(os.getenv('DB_CONNECT_TIMEOUT', '5')),
+            min_size=int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+            max_size=int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+            max_lifetime=float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+            checkout_timeout=float(os.getenv('DB_POOL_CHECKOUT_TIMEOUT', '5')),
+            health_check_interval=float(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', '30'))
+        )
+
+
+class _PooledConnection:
+    __slots__ = ('connection', 'created_at', 'last_used_at')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+
+
+class ConnectionPool:
+
+    def __init__(self, config: PoolConfig):
+        if config.min_size < 0 or config.max_size < 1 or config.min_size > config.max_size:
+            raise ValueError("Некорректные размеры пула соединений")
+        self.config = config
+        self._idle: Deque[_PooledConnection] = deque()
+        self._checked_out = {}
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition(threading.Lock())
+
+        self._checkouts = 0
+        self._timeouts = 0
+        self._created = 0
+        self._discarded = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def open(self) -> None:
+        while True:
+            with self._condition:
+                if self._closed or self._size >= self.config.min_size:
+                    return
+                self._size += 1
+            try:
+                pooled = self._connect()
+            except Exception:
+                with self._condition:
+                    self._size -= 1
+                    self._condition.notify()
+                raise
+            with self._condition:
+                self._idle.append(pooled)
+                self._condition.notify()
+
+    def getconn(self):
+        started = time.monotonic()
+        deadline = started + self.config.checkout_timeout
+        pooled = None
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Пул соединений закрыт")
+                if self._idle:
+                    pooled = self._idle.pop()
+                    break
+                if self._size < self.config.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"Не удалось получить соединение из пула за {self.config.checkout_timeout} с"
+                    )
+                self._condition.wait(remaining)
+
+        try:
+            if pooled is not None and not self._is_usable(pooled):
+                self._close_quietly(pooled.connection)
+                with self._condition:
+                    self._discarded += 1
+                pooled = None
+            if pooled is None:
+                pooled = self._connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+        waited = time.monotonic() - started
+        with self._condition:
+            self._checked_out[id(pooled.connection)] = pooled
+            self._checkouts += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+        return pooled.connection
+
+    def putconn(self, connection, discard: bool = False) -> None:
+        with self._condition:
+            pooled = self._checked_out.pop(id(connection), None)
+        if pooled is None:
+            self._close_quietly(connection)
+            return
+
+        now = time.monotonic()
+        if not discard and not connection.closed:
+            try:
+                if connection.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+            except psycopg2.Error:
+                discard = True
+        if discard or connection.closed or now - pooled.created_at >= self.config.max_lifetime:
+            self._close_quietly(connection)
+            with self._condition:
+                self._size -= 1
+                self._discarded += 1
+                self._condition.notify()
+            return
+
+        pooled.last_used_at = now
+        with self._condition:
+            if self._closed:
+                self._size -= 1
+                self._close_quietly(connection)
+            else:
+                self._idle.append(pooled)
+            self._condition.notify()
+
+    def closeall(self) -> None:
+        with self._condition:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for pooled in idle:
+            self._close_quietly(pooled.connection)
+
+    def stats(self) -> dict:
+        with self._condition:
+            in_use = len(self._checked_out)
+            return {
+                "size": self._size,
+                "in_use": in_use,
+                "idle": len(self._idle),
+                "min_size": self.config.min_size,
+                "max_size": self.config.max_size,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "created": self._created,
+                "discarded": self._discarded,
+                "wait_time_total": round(self._total_wait, 6),
+                "wait_time_max": round(self._max_wait, 6),
+                "wait_time_avg": round(self._total_wait / self._checkouts, 6) if self._checkouts else 0.0
+            }
+
+    def _connect(self) -> _PooledConnection:
+        connection = psycopg2.connect(
+            host=self.config.host,
+            port=self.config.port,
+            database=self.config.database,
+            user=self.config.user,
+            password=self.config.password,
+            connect_timeout=self.config.connect_timeout
+        )
+        with self._condition:
+            self._created += 1
+        return _PooledConnection(connection)
+
+    def _is_usable(self, pooled: _PooledConnection) -> bool:
+        connection = pooled.connection
+        now = time.monotonic()
+        if connection.closed or now - pooled.created_at >= self.config.max_lifetime:
+            return False
+        if now - pooled.last_used_at < self.config.health_check_interval:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    @staticmethod
+    def _close_quietly(connection) -> None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_connection_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(PoolConfig.from_env())
+    return _pool
+
+
+def close_connection_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+
+def get_pool_stats() -> dict:
+    if _pool is None:
+        return {"size": 0, "in_use": 0, "idle": 0}
+    return _pool.stats()
+
+
 @contextmanager
 def get_db_connection():
 
+    pool = None
     connection = None
+    discard = False
     try:
-        # connection = psycopg2.connect(
-        #     host=os.getenv('DB_HOST', 'localhost'),
-        #     port=os.getenv('DB_PORT', '5432'),
-        #     database=os.getenv('DB_NAME', 'db'),
-        #     user=os.getenv('DB_USER', 'username'),
-        #     password=os.getenv('DB_PASSWORD', 'password'),
-        #
-        #
-        connection = psycopg2.connect(
-            host='localhost',      
-            port=5432,            
-            database='db',        
-            user='username',      
-            password='password',  
-            connect_timeout=5
-        )
+        pool = get_connection_pool()
+        connection = pool.getconn()
         try:
             yield connection
             connection.commit()
         except Exception as e:
-            if connection:
-                connection.rollback()
+            if isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+                discard = True
+            if connection and not connection.closed:
+                try:
+                    connection.rollback()
+                except psycopg2.Error:
+                    discard = True
             raise
     except psycopg2.Error as e:
         error_msg = str(e) if str(e) else f"Database connection error: {type(e).__name__}"
@@ -41,5 +285,5 @@ def get_db_connection():
         error_msg = str(e) if str(e) else f"Unexpected error: {type(e).__name__}"
         raise RuntimeError(f"Ошибка подключения к базе данных: {error_msg}") from e
     finally:
-        if connection:
-            connection.close()
+        if pool and connection:
+            pool.putconn(connection, discard=discard)
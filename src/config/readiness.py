@@ -0,0 +1,99 @@
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+# Модуль импортируется первым в main.py, поэтому момент импорта близок к старту процесса
+PROCESS_STARTED_AT = time.monotonic()
+
+
+class Readiness:
+    """Состояние прогрева приложения для GET /ready и /metrics.
+
+    Каждый шаг прогрева (Redis, БД, граф курсов) выполняется через run(): время и ошибка шага
+    запоминаются, а сама ошибка не прерывает старт, кроме исключений из fatal. Приложение готово,
+    когда прогрев завершён и все обязательные компоненты подняты; упавший обязательный компонент
+    перепроверяется в recheck() той же пробой, и здесь любая ошибка только оставляет его неготовым.
+    Одновременные GET /ready ждут одну перепроверку, а не запускают пробы параллельно.
+    """
+
+    def __init__(self, required: Iterable[str] = ("database",), started_at: float = PROCESS_STARTED_AT):
+        self.required = set(required)
+        self.started_at = started_at
+        self.warmup_started_at: Optional[float] = None
+        self.warmup_finished_at: Optional[float] = None
+        self.components: Dict[str, dict] = {}
+        self._probes: Dict[str, Callable[[], Awaitable[None]]] = {}
+        self._recheck: Optional[asyncio.Future] = None
+
+    def begin(self) -> None:
+        self.warmup_started_at = time.monotonic()
+        self.warmup_finished_at = None
+
+    def finish(self) -> None:
+        self.warmup_finished_at = time.monotonic()
+        logger.info("Прогрев завершён за %.3f с, холодный старт %.3f с",
+                    self.warmup_finished_at - self.warmup_started_at, self.cold_start_seconds)
+
+    async def run(self, name: str, probe: Callable[[], Awaitable[None]],
+                  fatal: Tuple[Type[BaseException], ...] = ()) -> bool:
+        self._probes[name] = probe
+        started = time.monotonic()
+        try:
+            await probe()
+        except Exception as e:
+            logger.warning("Компонент %s не готов: %s", name, e)
+            self.components[name] = {"ready": False, "seconds": round(time.monotonic() - started, 3), "error": str(e)}
+            if isinstance(e, fatal):
+                raise
+            return False
+        self.components[name] = {"ready": True, "seconds": round(time.monotonic() - started, 3), "error": None}
+        return True
+
+    async def recheck(self) -> bool:
+        if self._recheck is None or self._recheck.done():
+            self._recheck = asyncio.ensure_future(self._recheck_failed())
+        # shield: отменённый запрос не прерывает пробу, которую ждут остальные
+        return await asyncio.shield(self._recheck)
+
+    async def _recheck_failed(self) -> bool:
+        for name in self.required:
+            component = self.components.get(name)
+            if component is not None and not component["ready"]:
+                await self.run(name, self._probes[name])
+        return self.ready
+
+    @property
+    def ready(self) -> bool:
+        if self.warmup_finished_at is None:
+            return False
+        return all(self.components.get(name, {}).get("ready") for name in self.required)
+
+    @property
+    def cold_start_seconds(self) -> Optional[float]:
+        if self.warmup_finished_at is None:
+            return None
+        return self.warmup_finished_at - self.started_at
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "import_seconds": None if self.warmup_started_at is None
+            else round(self.warmup_started_at - self.started_at, 3),
+            "warmup_seconds": None if self.warmup_finished_at is None
+            else round(self.warmup_finished_at - self.warmup_started_at, 3),
+            "cold_start_seconds": None if self.cold_start_seconds is None else round(self.cold_start_seconds, 3),
+            "components": dict(self.components)
+        }
+
+
+_readiness: Optional[Readiness] = None
+
+
+def get_readiness() -> Readiness:
+    global _readiness
+    if _readiness is None:
+        _readiness = Readiness()
+    return _readiness
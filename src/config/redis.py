@@ -1,39 +1,358 @@
+import os
+import time
+import threading
 import redis
+import redis.asyncio as async_redis
+from dataclasses import dataclass
 from typing import Optional
+from redis.backoff import ExponentialBackoff
+from redis.retry import Retry
+from redis.asyncio.retry import Retry as AsyncRetry
+from dotenv import load_dotenv
 
+load_dotenv()
 
-class RedisClient:    
+# Ошибки, после которых Redis считается недоступным; остальные (например, ResponseError) - ответ сервера
+_FAILURE_ERRORS = (redis.ConnectionError, redis.TimeoutError)
+
+
+class RedisUnavailableError(redis.ConnectionError):
+    pass
+
+
+@dataclass
+class RedisConfig:
+    host: str = 'localhost'
+    port: int = 6379
+    db: int = 0
+    password: Optional[str] = None
+    max_connections: int = 50
+    pool_timeout: float = 1.0
+    socket_connect_timeout: float = 1.0
+    socket_timeout: float = 0.5
+    retries: int = 1
+    backoff_base: float = 0.01
+    backoff_cap: float = 0.1
+    health_check_interval: int = 30
+    breaker_threshold: int = 5
+    breaker_cooldown: float = 10.0
+
+    @classmethod
+    def from_env(cls) -> 'RedisConfig':
+        return cls(
+            host=os.getenv('REDIS_HOST', 'localhost'),
+            port=int(os.getenv('REDIS_PORT', '6379')),
+            db=int(os.getenv('REDIS_DB', '0')),
+            password=os.getenv('REDIS_PASSWORD') or None,
+            max_connections=int(os.getenv('REDIS_POOL_MAX_SIZE', '50')),
+            pool_timeout=float(os.getenv('REDIS_POOL_TIMEOUT', '1')),
+            socket_connect_timeout=float(os.getenv('REDIS_CONNECT_TIMEOUT', '1')),
+            socket_timeout=float(os.getenv('REDIS_SOCKET_TIMEOUT', '0.5')),
+            retries=int(os.getenv('REDIS_RETRIES', '1')),
+            backoff_base=float(os.getenv('REDIS_RETRY_BACKOFF_BASE', '0.01')),
+            backoff_cap=float(os.getenv('REDIS_RETRY_BACKOFF_CAP', '0.1')),
+            health_check_interval=int(os.getenv('REDIS_HEALTH_CHECK_INTERVAL', '30')),
+            breaker_threshold=int(os.getenv('REDIS_BREAKER_THRESHOLD', '5')),
+            breaker_cooldown=float(os.getenv('REDIS_BREAKER_COOLDOWN', '10'))
+        )
+
+    def connection_pool(self, pool_class, retry_class):
+        # retry задаётся соединениям пула: при явном connection_pool redis.Redis его не передаёт
+        return pool_class(
+            host=self.host,
+            port=self.port,
+            db=self.db,
+            password=self.password,
+            decode_responses=True,
+            socket_connect_timeout=self.socket_connect_timeout,
+            socket_timeout=self.socket_timeout,
+            health_check_interval=self.health_check_interval,
+            max_connections=self.max_connections,
+            timeout=self.pool_timeout,
+            retry=retry_class(ExponentialBackoff(cap=self.backoff_cap, base=self.backoff_base), self.retries),
+            retry_on_error=list(_FAILURE_ERRORS)
+        )
+
+
+class CircuitBreaker:
+    """Выключатель для Redis: после threshold ошибок подряд Redis не вызывается cooldown секунд.
+
+    Пока выключатель разомкнут, команды сразу падают с RedisUnavailableError, и сервисы без
+    ожидания таймаутов идут в L1 и БД. По истечении cooldown пропускается одна пробная команда:
+    успех замыкает выключатель, ошибка размыкает его на следующий cooldown.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold: int = 5, cooldown: float = 10.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.rejected = 0
+        self.failed = 0
+        self.last_error: Optional[str] = None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self.state = self.CLOSED
+
+    def _abort_probe(self) -> None:
+        # Пробная команда прервана (например, отменена задача) - следующая команда станет новой пробой
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def record_failure(self, error: Exception) -> None:
+        with self._lock:
+            self.failed += 1
+            self._failures += 1
+            self.last_error = str(error)
+            if self.state == self.HALF_OPEN or self._failures >= self.threshold:
+                if self.state != self.OPEN:
+                    self.opened += 1
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def call(self, func, *args, **kwargs):
+        if not self.allow():
+            raise RedisUnavailableError("Redis временно отключён после серии ошибок")
+        try:
+            result = func(*args, **kwargs)
+        except _FAILURE_ERRORS as e:
+            self.record_failure(e)
+            raise
+        except Exception:
+            # Redis ответил, пусть и ошибкой, - соединение живо
+            self.record_success()
+            raise
+        except BaseException:
+            self._abort_probe()
+            raise
+        self.record_success()
+        return result
+
+    async def acall(self, func, *args, **kwargs):
+        if not self.allow():
+            raise RedisUnavailableError("Redis временно отключён после серии ошибок")
+        try:
+            result = await func(*args, **kwargs)
+        except _FAILURE_ERRORS as e:
+            self.record_failure(e)
+            raise
+        except Exception:
+            # Redis ответил, пусть и ошибкой, - соединение живо
+            self.record_success()
+            raise
+        except BaseException:
+            self._abort_probe()
+            raise
+        self.record_success()
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "opened": self.opened,
+            "last_error": self.last_error
+        }
+
+
+# Методы без сетевого обмена: через выключатель их не пропускаем, иначе они «лечили» бы его
+_PASSTHROUGH = frozenset({"pubsub", "close", "aclose", "lock", "get_encoder", "get_connection_kwargs"})
+
+
+class _GuardedBase:
+
+    def __init__(self, client, breaker: CircuitBreaker):
+        self._client = client
+        self._breaker = breaker
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if name in _PASSTHROUGH or not callable(attr):
+            return attr
+        if name == "pipeline":
+            wrapper = self._wrap_pipeline(attr)
+        else:
+            wrapper = self._wrap(attr)
+        # Обёртка кэшируется в экземпляре: следующий вызов не проходит через __getattr__
+        self.__dict__[name] = wrapper
+        return wrapper
+
+
+class GuardedRedis(_GuardedBase):
+    """redis.Redis, все команды которого идут через CircuitBreaker."""
+
+    def _wrap(self, method):
+        def call(*args, **kwargs):
+            return self._breaker.call(method, *args, **kwargs)
+        return call
+
+    def _wrap_pipeline(self, method):
+        def pipeline(*args, **kwargs):
+            return _GuardedPipeline(method(*args, **kwargs), self._breaker)
+        return pipeline
+
+
+class _GuardedPipeline:
+
+    def __init__(self, pipeline, breaker: CircuitBreaker):
+        self._pipeline = pipeline
+        self._breaker = breaker
+
+    def __getattr__(self, name: str):
+        return getattr(self._pipeline, name)
+
+    def execute(self, *args, **kwargs):
+        return self._breaker.call(self._pipeline.execute, *args, **kwargs)
+
+
+class AsyncGuardedRedis(_GuardedBase):
+    """redis.asyncio.Redis, все команды которого идут через CircuitBreaker."""
+
+    def _wrap(self, method):
+        async def call(*args, **kwargs):
+            return await self._breaker.acall(method, *args, **kwargs)
+        return call
+
+    def _wrap_pipeline(self, method):
+        def pipeline(*args, **kwargs):
+            return _AsyncGuardedPipeline(method(*args, **kwargs), self._breaker)
+        return pipeline
+
+
+class _AsyncGuardedPipeline(_GuardedPipeline):
+
+    async def execute(self, *args, **kwargs):
+        return await self._breaker.acall(self._pipeline.execute, *args, **kwargs)
+
+
+class RedisClient:
     _instance: Optional['RedisClient'] = None
     _redis_client: Optional[redis.Redis] = None
-    
+    _guarded_client: Optional[GuardedRedis] = None
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
-    
+
     def __init__(self):
+        # Соединения открываются пулом при первой команде: создание клиента не ходит в сеть
         if self._redis_client is None:
-            try:
-                self._redis_client = redis.Redis(
-                    host='localhost',
-                    port=6379,
-                    db=0,
-                    decode_responses=True,
-                    socket_connect_timeout=5
-                )
-                self._redis_client.ping()
-            except redis.ConnectionError as e:
-                raise RuntimeError(f"Ошибка подключения к Redis: {e}")
-    
+            pool = get_redis_config().connection_pool(redis.BlockingConnectionPool, Retry)
+            self._redis_client = redis.Redis(connection_pool=pool)
+            self._guarded_client = GuardedRedis(self._redis_client, get_redis_breaker())
+
     @property
-    def client(self) -> redis.Redis:
-        if self._redis_client is None:
+    def client(self) -> GuardedRedis:
+        if self._guarded_client is None:
             raise RuntimeError("Redis клиент не инициализирован")
-        return self._redis_client
+        return self._guarded_client
+
+
+class AsyncRedisClient:
+    _instance: Optional['AsyncRedisClient'] = None
+    _redis_client: Optional[async_redis.Redis] = None
+    _guarded_client: Optional[AsyncGuardedRedis] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._redis_client is None:
+            pool = get_redis_config().connection_pool(async_redis.BlockingConnectionPool, AsyncRetry)
+            self._redis_client = async_redis.Redis(connection_pool=pool)
+            self._guarded_client = AsyncGuardedRedis(self._redis_client, get_redis_breaker())
+
+    @property
+    def client(self) -> AsyncGuardedRedis:
+        return self._guarded_client
+
+
+_redis_config: Optional[RedisConfig] = None
+_redis_breaker: Optional[CircuitBreaker] = None
 
 
-def get_redis_client() -> redis.Redis:
+def get_redis_config() -> RedisConfig:
+    global _redis_config
+    if _redis_config is None:
+        _redis_config = RedisConfig.from_env()
+    return _redis_config
+
+
+def get_redis_breaker() -> CircuitBreaker:
+    # Один выключатель на процесс: синхронный и асинхронный клиенты ходят в один и тот же Redis
+    global _redis_breaker
+    if _redis_breaker is None:
+        config = get_redis_config()
+        _redis_breaker = CircuitBreaker(config.breaker_threshold, config.breaker_cooldown)
+    return _redis_breaker
+
+
+def get_redis_health() -> dict:
+    config = get_redis_config()
+    health = {
+        "host": f"{config.host}:{config.port}/{config.db}",
+        "breaker": get_redis_breaker().stats(),
+        "pool": None,
+        "async_pool": None
+    }
+    sync_client = RedisClient._instance._redis_client if RedisClient._instance else None
+    if sync_client is not None:
+        pool = sync_client.connection_pool
+        idle = sum(1 for connection in list(pool.pool.queue) if connection is not None)
+        health["pool"] = {
+            "max_size": pool.max_connections,
+            "created": len(pool._connections),
+            "in_use": len(pool._connections) - idle
+        }
+    async_client = AsyncRedisClient._instance._redis_client if AsyncRedisClient._instance else None
+    if async_client is not None:
+        pool = async_client.connection_pool
+        health["async_pool"] = {
+            "max_size": pool.max_connections,
+            "created": len(pool._available_connections) + len(pool._in_use_connections),
+            "in_use": len(pool._in_use_connections)
+        }
+    return health
+
+
+def get_redis_client() -> GuardedRedis:
     redis_instance = RedisClient()
     return redis_instance.client
 
 
+def get_async_redis_client() -> AsyncGuardedRedis:
+    return AsyncRedisClient().client
+
+
+async def close_async_redis_client() -> None:
+    instance = AsyncRedisClient._instance
+    if instance is not None and instance._redis_client is not None:
+        client = instance._redis_client
+        instance._redis_client = None
+        instance._guarded_client = None
+        await client.aclose()
@@ -1,5 +1,13 @@
 from .currency_controller import currency_router
 from .exchange_rates_controller import exchange_rates_router
+from .async_currency_controller import async_currency_router
+from .async_exchange_rates_controller import async_exchange_rates_router
+from .monitoring_controller import monitoring_router
 
-__all__ = ['currency_router', 'exchange_rates_router']
-
+__all__ = [
+    'currency_router',
+    'exchange_rates_router',
+    'async_currency_router',
+    'async_exchange_rates_router',
+    'monitoring_router'
+]
@@ -0,0 +1,78 @@
+from fastapi import APIRouter, Header, HTTPException, Query
+from typing import List, Optional
+from ..models.currency import Currency
+from ..repositories.currency_repository import CURRENCY_SORT_COLUMNS
+from .schemas import BulkUpsertResponse, CurrenciesBulkRequest, CurrencyRequest, CurrencyResponse
+from .dependencies import AsyncCurrencyService
+from .pagination import MAX_PAGE_LIMIT, page_request, page_response
+from .rendering import render_currencies, rendered_response
+
+async_currency_router = APIRouter(tags=["currencies"])
+
+
+@async_currency_router.get("/currencies", response_model=List[CurrencyResponse])
+async def find_all(
+    currency_service: AsyncCurrencyService,
+    if_none_match: Optional[str] = Header(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    sort: Optional[str] = Query(None, pattern="^-?(id|code)$")
+):
+    page = page_request(limit, cursor, sort, CURRENCY_SORT_COLUMNS)
+    if page is not None:
+        return page_response(await currency_service.find_page(page), render_currencies, if_none_match)
+    return rendered_response(await currency_service.find_all_rendered(render_currencies), if_none_match)
+
+
+@async_currency_router.get("/currency/{id}", response_model=CurrencyResponse)
+async def find_by_id(id: int, currency_service: AsyncCurrencyService):
+    currency = await currency_service.find_by_id(id)
+    if currency is None:
+        raise HTTPException(status_code=404, detail="Валюта не найдена")
+    return CurrencyResponse(**currency.__dict__)
+
+
+@async_currency_router.get("/currency", response_model=CurrencyResponse)
+async def find_by_name(name: str, currency_service: AsyncCurrencyService):
+    currency = await currency_service.find_by_name(name)
+    if currency is None:
+        raise HTTPException(status_code=404, detail="Валюта не найдена")
+    return CurrencyResponse(**currency.__dict__)
+
+
+@async_currency_router.post("/currencies", status_code=201)
+async def post_currency(currency: CurrencyRequest, currency_service: AsyncCurrencyService):
+    currency_obj = Currency(
+        code=currency.code,
+        fullname=currency.fullname,
+        sign=currency.sign
+    )
+    await currency_service.create_currency(currency_obj)
+    return {"message": "Валюта успешно создана"}
+
+
+@async_currency_router.post("/currencies/bulk", response_model=BulkUpsertResponse)
+async def post_currencies_bulk(request: CurrenciesBulkRequest, currency_service: AsyncCurrencyService):
+    result = await currency_service.upsert_currencies(
+        [Currency(code=c.code, fullname=c.fullname, sign=c.sign) for c in request.currencies]
+    )
+    return BulkUpsertResponse(created=result.created, updated=result.updated, unchanged=result.unchanged)
+
+
+@async_currency_router.patch("/currencies/{id}", status_code=200)
+async def update_currency(currency: CurrencyRequest, id: int, currency_service: AsyncCurrencyService):
+    currency_obj = Currency(
+        code=currency.code,
+        fullname=currency.fullname,
+        sign=currency.sign
+    )
+    if await currency_service.update_currency(currency_obj, id) is None:
+        raise HTTPException(status_code=404, detail="Валюта не найдена")
+    return {"message": "Валюта успешно обновлена"}
+
+
+@async_currency_router.delete("/currencies/{id}", status_code=204)
+async def delete_currency(id: int, currency_service: AsyncCurrencyService):
+    if await currency_service.delete_by_id(id) is None:
+        raise HTTPException(status_code=404, detail="Валюта не найдена")
+    return None
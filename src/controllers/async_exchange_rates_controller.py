@@ -0,0 +1,193 @@
+from fastapi import APIRouter, Header, HTTPException, Query
+from typing import List, Optional
+from datetime import datetime
+from decimal import Decimal
+from ..models.exchange_rates import ExchangeRates
+from ..models.currency import Currency
+from ..dto.exchange_dto import ExchangeDTO
+from ..util.mapping_dto import MappingDTO
+from ..repositories.exchange_rates_repository import EXCHANGE_RATE_SORT_COLUMNS
+from .schemas import (
+    CurrencyModel,
+    ExchangeRatesRequest,
+    ExchangeRatesResponse,
+    ExchangeDTOResponse,
+    ExchangeBatchRequest,
+    ExchangeBatchResponse,
+    ExchangeRatesBulkRequest,
+    BulkUpsertResponse,
+    OhlcSeriesResponse
+)
+from .dependencies import AsyncExchangeRatesService
+from .export import async_export_response
+from .ohlc import ohlc_response, ohlc_window
+from .pagination import MAX_PAGE_LIMIT, page_request, page_response
+from .rendering import render_exchange_rates, rendered_response
+
+async_exchange_rates_router = APIRouter(tags=["exchange_rates"])
+
+
+def _to_response(exchange_rates: ExchangeRates) -> ExchangeRatesResponse:
+    return ExchangeRatesResponse(
+        id=exchange_rates.id,
+        rate=exchange_rates.rate,
+        base_currency=CurrencyModel(**exchange_rates.base_currency.__dict__),
+        target_currency=CurrencyModel(**exchange_rates.target_currency.__dict__)
+    )
+
+
+def _to_entity(request: ExchangeRatesRequest, id: int = None) -> ExchangeRates:
+    return ExchangeRates(
+        id=id,
+        base_currency=Currency(**request.base_currency.model_dump()),
+        target_currency=Currency(**request.target_currency.model_dump()),
+        rate=request.rate
+    )
+
+
+@async_exchange_rates_router.get("/exchangeRates", response_model=List[ExchangeRatesResponse])
+async def find_all(
+    exchange_rates_service: AsyncExchangeRatesService,
+    if_none_match: Optional[str] = Header(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    sort: Optional[str] = Query(None, pattern="^-?(id|rate)$"),
+    base: Optional[str] = None,
+    target: Optional[str] = None
+):
+    page = page_request(limit, cursor, sort, EXCHANGE_RATE_SORT_COLUMNS, base, target)
+    if page is not None:
+        return page_response(await exchange_rates_service.find_page(page), render_exchange_rates, if_none_match)
+    return rendered_response(await exchange_rates_service.find_all_rendered(render_exchange_rates), if_none_match)
+
+
+@async_exchange_rates_router.get("/exchangeRates/export")
+async def export_exchange_rates(
+    exchange_rates_service: AsyncExchangeRatesService,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$")
+):
+    return await async_export_response(exchange_rates_service.iter_export(), format)
+
+
+@async_exchange_rates_router.get("/exchangeRates/ohlc", response_model=List[OhlcSeriesResponse])
+async def find_ohlc(
+    exchange_rates_service: AsyncExchangeRatesService,
+    name: Optional[str] = None,
+    interval: str = Query("1m", pattern="^(1m|1h)$"),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to")
+):
+    start, end = ohlc_window(interval, start, end)
+    return ohlc_response(await exchange_rates_service.find_ohlc(interval, start, end, name))
+
+
+@async_exchange_rates_router.get("/exchangeRate", response_model=ExchangeRatesResponse)
+async def find_by_name(name: str, exchange_rates_service: AsyncExchangeRatesService, as_of: Optional[datetime] = None):
+    if as_of is not None:
+        exchange_rates = await exchange_rates_service.find_by_name_as_of(name, as_of)
+    else:
+        exchange_rates = await exchange_rates_service.find_by_name(name)
+    if exchange_rates is None:
+        raise HTTPException(status_code=404, detail="Курс обмена не найден")
+    return _to_response(exchange_rates)
+
+
+@async_exchange_rates_router.get("/exchangeRate/{id}", response_model=ExchangeRatesResponse)
+async def find_by_id(id: int, exchange_rates_service: AsyncExchangeRatesService):
+    exchange_rates = await exchange_rates_service.find_by_id(id)
+    if exchange_rates is None:
+        raise HTTPException(status_code=404, detail="Курс обмена не найден")
+    return _to_response(exchange_rates)
+
+
+@async_exchange_rates_router.post("/exchangeRates", status_code=201)
+async def post_exchange_rate(exchange_rates: ExchangeRatesRequest, exchange_rates_service: AsyncExchangeRatesService):
+    await exchange_rates_service.create_exchange_rate(_to_entity(exchange_rates))
+    return {"message": "Курс обмена успешно создан"}
+
+
+@async_exchange_rates_router.put("/exchangeRates/bulk", response_model=BulkUpsertResponse)
+async def put_exchange_rates_bulk(request: ExchangeRatesBulkRequest, exchange_rates_service: AsyncExchangeRatesService):
+    result = await exchange_rates_service.upsert_exchange_rates(request.rows())
+    if result.unknown_codes:
+        raise HTTPException(status_code=404, detail=f"Валюта не найдена: {', '.join(result.unknown_codes)}")
+    return BulkUpsertResponse(created=result.created, updated=result.updated, unchanged=result.unchanged)
+
+
+@async_exchange_rates_router.delete("/exchangeRates/{id}", status_code=204)
+async def delete_exchange_rate(id: int, exchange_rates_service: AsyncExchangeRatesService):
+    if await exchange_rates_service.delete_by_id(id) is None:
+        raise HTTPException(status_code=404, detail="Курс обмена не найден")
+    return None
+
+
+@async_exchange_rates_router.patch("/exchangeRates/{id}")
+async def update_exchange_rate(
+    id: int,
+    exchange_rates_update: ExchangeRatesRequest,
+    exchange_rates_service: AsyncExchangeRatesService
+):
+    updated = await exchange_rates_service.update_exchange_rate(_to_entity(exchange_rates_update, id), id)
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Курс обмена не найден")
+    return {
+        "message": f"Курс обмена с ID {id} успешно обновлен",
+        "id": id,
+        "rate": updated.rate,
+        "base_currency": updated.base_currency.code,
+        "target_currency": updated.target_currency.code
+    }
+
+
+@async_exchange_rates_router.get("/exchange", response_model=ExchangeDTOResponse)
+async def exchange(
+    exchange_rates_service: AsyncExchangeRatesService,
+    from_currency: str = Query(..., alias="from"),
+    to: str = Query(...),
+    amount: Decimal = Query(...),
+    as_of: Optional[datetime] = None
+):
+    if as_of is not None:
+        exchange_rates_by_name = await exchange_rates_service.find_rate_as_of(from_currency, to, as_of)
+    else:
+        exchange_rates_by_name = await exchange_rates_service.find_rate(from_currency, to)
+    if exchange_rates_by_name is None:
+        raise HTTPException(status_code=404, detail="Курс обмена не найден")
+
+    exchange_dto = MappingDTO.map_to_exchange_dto(exchange_rates_by_name)
+    exchange_dto.amount = amount
+    exchange_dto.get_converted_amount()
+
+    return ExchangeDTOResponse(
+        id=exchange_dto.id,
+        rate=exchange_dto.rate,
+        base_currency=CurrencyModel(**exchange_dto.base_currency.__dict__),
+        target_currency=CurrencyModel(**exchange_dto.target_currency.__dict__),
+        amount=exchange_dto.amount,
+        converted_amount=exchange_dto.converted_amount
+    )
+
+
+@async_exchange_rates_router.post("/exchange/batch", response_model=ExchangeBatchResponse)
+async def exchange_batch(request: ExchangeBatchRequest, exchange_rates_service: AsyncExchangeRatesService):
+    from_codes, to_codes, amounts = request.columns()
+    pairs = list(zip(from_codes, to_codes))
+    rates_by_pair = await exchange_rates_service.find_rates(pairs)
+    missing = sorted({base + target for (base, target), er in rates_by_pair.items() if er is None})
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Курс обмена не найден: {', '.join(missing)}")
+
+    rates = [rates_by_pair[pair].rate for pair in pairs]
+    converted_amounts = ExchangeDTO.convert_amounts(rates, amounts)
+    return {
+        "results": [
+            {
+                "from_currency": base,
+                "to": target,
+                "rate": rate,
+                "amount": amount,
+                "converted_amount": converted_amount
+            }
+            for (base, target), rate, amount, converted_amount in zip(pairs, rates, amounts, converted_amounts)
+        ]
+    }
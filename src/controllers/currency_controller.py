@@ -1,43 +1,31 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query
 from typing import List, Optional
-from pydantic import BaseModel
 from ..models.currency import Currency
-from ..services.currency_service import CurrencyServiceImpl
-from ..repositories.currency_repository import CurrencyRepository
+from ..repositories.currency_repository import CURRENCY_SORT_COLUMNS
+from .schemas import BulkUpsertResponse, CurrenciesBulkRequest, CurrencyRequest, CurrencyResponse
+from .dependencies import CurrencyService
+from .pagination import MAX_PAGE_LIMIT, page_request, page_response
+from .rendering import render_currencies, rendered_response
 
 currency_router = APIRouter(tags=["currencies"])
 
-currency_repository = CurrencyRepository()
-currency_service = CurrencyServiceImpl(currency_repository)
-
-
-class CurrencyRequest(BaseModel):
-    code: str
-    fullname: str
-    sign: str
-
-    class Config:
-        from_attributes = True
-
-
-class CurrencyResponse(BaseModel):
-    id: Optional[int] = None
-    code: Optional[str] = None
-    fullname: Optional[str] = None
-    sign: Optional[str] = None
-
-    class Config:
-        from_attributes = True
-
 
 @currency_router.get("/currencies", response_model=List[CurrencyResponse])
-def find_all():
-    currencies = currency_service.find_all()
-    return [CurrencyResponse(**currency.__dict__) for currency in currencies]
+def find_all(
+    currency_service: CurrencyService,
+    if_none_match: Optional[str] = Header(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    sort: Optional[str] = Query(None, pattern="^-?(id|code)$")
+):
+    page = page_request(limit, cursor, sort, CURRENCY_SORT_COLUMNS)
+    if page is not None:
+        return page_response(currency_service.find_page(page), render_currencies, if_none_match)
+    return rendered_response(currency_service.find_all_rendered(render_currencies), if_none_match)
 
 
 @currency_router.get("/currency/{id}", response_model=CurrencyResponse)
-def find_by_id(id: int):
+def find_by_id(id: int, currency_service: CurrencyService):
     currency = currency_service.find_by_id(id)
     if currency is None:
         raise HTTPException(status_code=404, detail="Валюта не найдена")
@@ -45,7 +33,7 @@ def find_by_id(id: int):
 
 
 @currency_router.get("/currency", response_model=CurrencyResponse)
-def find_by_name(name: str):
+def find_by_name(name: str, currency_service: CurrencyService):
     currency = currency_service.find_by_name(name)
     if currency is None:
         raise HTTPException(status_code=404, detail="Валюта не найдена")
@@ -53,7 +41,7 @@ def find_by_name(name: str):
 
 
 @currency_router.post("/currencies", status_code=201)
-def post_currency(currency: CurrencyRequest):
+def post_currency(currency: CurrencyRequest, currency_service: CurrencyService):
     currency_obj = Currency(
         code=currency.code,
         fullname=currency.fullname,
@@ -63,19 +51,29 @@ def post_currency(currency: CurrencyRequest):
     return {"message": "Валюта успешно создана"}
 
 
+@currency_router.post("/currencies/bulk", response_model=BulkUpsertResponse)
+def post_currencies_bulk(request: CurrenciesBulkRequest, currency_service: CurrencyService):
+    result = currency_service.upsert_currencies(
+        [Currency(code=c.code, fullname=c.fullname, sign=c.sign) for c in request.currencies]
+    )
+    return BulkUpsertResponse(created=result.created, updated=result.updated, unchanged=result.unchanged)
+
+
 @currency_router.patch("/currencies/{id}", status_code=200)
-def update_currency(currency: CurrencyRequest, id: int):
+def update_currency(currency: CurrencyRequest, id: int, currency_service: CurrencyService):
     currency_obj = Currency(
         code=currency.code,
         fullname=currency.fullname,
         sign=currency.sign
     )
-    currency_service.update_currency(currency_obj, id)
+    if currency_service.update_currency(currency_obj, id) is None:
+        raise HTTPException(status_code=404, detail="Валюта не найдена")
     return {"message": "Валюта успешно обновлена"}
 
 
 @currency_router.delete("/currencies/{id}", status_code=204)
-def delete_currency(id: int):
-    currency_service.delete_by_id(id)
+def delete_currency(id: int, currency_service: CurrencyService):
+    if currency_service.delete_by_id(id) is None:
+        raise HTTPException(status_code=404, detail="Валюта не найдена")
     return None
 
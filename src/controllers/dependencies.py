@@ -0,0 +1,52 @@
+from typing import Optional
+from typing_extensions import Annotated
+from fastapi import Depends
+from ..services.currency_service import CurrencyServiceImpl
+from ..services.exchange_rates_service import ExchangeRatesServiceImpl
+from ..services.async_currency_service import AsyncCurrencyServiceImpl
+from ..services.async_exchange_rates_service import AsyncExchangeRatesServiceImpl
+from ..repositories.currency_repository import CurrencyRepository
+from ..repositories.exchange_rates_repository import ExchangeRatesRepository
+from ..repositories.async_currency_repository import AsyncCurrencyRepository
+from ..repositories.async_exchange_rates_repository import AsyncExchangeRatesRepository
+
+# Сервисы создаются при первом запросе, а не при импорте контроллеров. Провайдеры объявлены
+# async: синхронные зависимости FastAPI вызывает в пуле потоков, а здесь нет ввода-вывода.
+_currency_service: Optional[CurrencyServiceImpl] = None
+_exchange_rates_service: Optional[ExchangeRatesServiceImpl] = None
+_async_currency_service: Optional[AsyncCurrencyServiceImpl] = None
+_async_exchange_rates_service: Optional[AsyncExchangeRatesServiceImpl] = None
+
+
+async def get_currency_service() -> CurrencyServiceImpl:
+    global _currency_service
+    if _currency_service is None:
+        _currency_service = CurrencyServiceImpl(CurrencyRepository())
+    return _currency_service
+
+
+async def get_exchange_rates_service() -> ExchangeRatesServiceImpl:
+    global _exchange_rates_service
+    if _exchange_rates_service is None:
+        _exchange_rates_service = ExchangeRatesServiceImpl(ExchangeRatesRepository())
+    return _exchange_rates_service
+
+
+async def get_async_currency_service() -> AsyncCurrencyServiceImpl:
+    global _async_currency_service
+    if _async_currency_service is None:
+        _async_currency_service = AsyncCurrencyServiceImpl(AsyncCurrencyRepository())
+    return _async_currency_service
+
+
+async def get_async_exchange_rates_service() -> AsyncExchangeRatesServiceImpl:
+    global _async_exchange_rates_service
+    if _async_exchange_rates_service is None:
+        _async_exchange_rates_service = AsyncExchangeRatesServiceImpl(AsyncExchangeRatesRepository())
+    return _async_exchange_rates_service
+
+
+CurrencyService = Annotated[CurrencyServiceImpl, Depends(get_currency_service)]
+ExchangeRatesService = Annotated[ExchangeRatesServiceImpl, Depends(get_exchange_rates_service)]
+AsyncCurrencyService = Annotated[AsyncCurrencyServiceImpl, Depends(get_async_currency_service)]
+AsyncExchangeRatesService = Annotated[AsyncExchangeRatesServiceImpl, Depends(get_async_exchange_rates_service)]
@@ -1,66 +1,74 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Header, HTTPException, Query
 from typing import List, Optional
-from decimal import Decimal, ROUND_HALF_UP
-from pydantic import BaseModel
+from datetime import datetime
+from decimal import Decimal
 from ..models.exchange_rates import ExchangeRates
 from ..models.currency import Currency
 from ..dto.exchange_dto import ExchangeDTO
-from ..services.exchange_rates_service import ExchangeRatesServiceImpl
-from ..repositories.exchange_rates_repository import ExchangeRatesRepository
 from ..util.mapping_dto import MappingDTO
+from ..repositories.exchange_rates_repository import EXCHANGE_RATE_SORT_COLUMNS
+from .schemas import (
+    CurrencyModel,
+    ExchangeRatesRequest,
+    ExchangeRatesResponse,
+    ExchangeDTOResponse,
+    ExchangeBatchRequest,
+    ExchangeBatchResponse,
+    ExchangeRatesBulkRequest,
+    BulkUpsertResponse,
+    OhlcSeriesResponse
+)
+from .dependencies import ExchangeRatesService
+from .export import export_response
+from .ohlc import ohlc_response, ohlc_window
+from .pagination import MAX_PAGE_LIMIT, page_request, page_response
+from .rendering import render_exchange_rates, rendered_response
 
 exchange_rates_router = APIRouter(tags=["exchange_rates"])
 
-exchange_rates_repository = ExchangeRatesRepository()
-exchange_rates_service = ExchangeRatesServiceImpl(exchange_rates_repository)
 
-
-class CurrencyModel(BaseModel):
-    id: Optional[int] = None
-    code: Optional[str] = None
-    fullname: Optional[str] = None
-    sign: Optional[str] = None
-
-
-class ExchangeRatesRequest(BaseModel):
-    rate: Decimal
-    base_currency: CurrencyModel
-    target_currency: CurrencyModel
-
-
-class ExchangeRatesResponse(BaseModel):
-    id: Optional[int] = None
-    rate: Optional[Decimal] = None
-    base_currency: Optional[CurrencyModel] = None
-    target_currency: Optional[CurrencyModel] = None
+@exchange_rates_router.get("/exchangeRates", response_model=List[ExchangeRatesResponse])
+def find_all(
+    exchange_rates_service: ExchangeRatesService,
+    if_none_match: Optional[str] = Header(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    sort: Optional[str] = Query(None, pattern="^-?(id|rate)$"),
+    base: Optional[str] = None,
+    target: Optional[str] = None
+):
+    page = page_request(limit, cursor, sort, EXCHANGE_RATE_SORT_COLUMNS, base, target)
+    if page is not None:
+        return page_response(exchange_rates_service.find_page(page), render_exchange_rates, if_none_match)
+    return rendered_response(exchange_rates_service.find_all_rendered(render_exchange_rates), if_none_match)
 
 
-class ExchangeDTOResponse(BaseModel):
-    id: Optional[int] = None
-    rate: Optional[Decimal] = None
-    base_currency: Optional[CurrencyModel] = None
-    target_currency: Optional[CurrencyModel] = None
-    amount: Optional[Decimal] = None
-    converted_amount: Optional[Decimal] = None
+@exchange_rates_router.get("/exchangeRates/export")
+def export_exchange_rates(
+    exchange_rates_service: ExchangeRatesService,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$")
+):
+    return export_response(exchange_rates_service.iter_export(), format)
 
 
-@exchange_rates_router.get("/exchangeRates", response_model=List[ExchangeRatesResponse])
-def find_all():
-    exchange_rates_list = exchange_rates_service.find_all()
-    result = []
-    for er in exchange_rates_list:
-        result.append(ExchangeRatesResponse(
-            id=er.id,
-            rate=er.rate,
-            base_currency=CurrencyModel(**er.base_currency.__dict__),
-            target_currency=CurrencyModel(**er.target_currency.__dict__)
-        ))
-    return result
+@exchange_rates_router.get("/exchangeRates/ohlc", response_model=List[OhlcSeriesResponse])
+def find_ohlc(
+    exchange_rates_service: ExchangeRatesService,
+    name: Optional[str] = None,
+    interval: str = Query("1m", pattern="^(1m|1h)$"),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to")
+):
+    start, end = ohlc_window(interval, start, end)
+    return ohlc_response(exchange_rates_service.find_ohlc(interval, start, end, name))
 
 
 @exchange_rates_router.get("/exchangeRate", response_model=ExchangeRatesResponse)
-def find_by_name(name: str):
-    exchange_rates = exchange_rates_service.find_by_name(name)
+def find_by_name(name: str, exchange_rates_service: ExchangeRatesService, as_of: Optional[datetime] = None):
+    if as_of is not None:
+        exchange_rates = exchange_rates_service.find_by_name_as_of(name, as_of)
+    else:
+        exchange_rates = exchange_rates_service.find_by_name(name)
     if exchange_rates is None:
         raise HTTPException(status_code=404, detail="Курс обмена не найден")
     return ExchangeRatesResponse(
@@ -72,7 +80,7 @@ def find_by_name(name: str):
 
 
 @exchange_rates_router.get("/exchangeRate/{id}", response_model=ExchangeRatesResponse)
-def find_by_id(id: int):
+def find_by_id(id: int, exchange_rates_service: ExchangeRatesService):
     exchange_rates = exchange_rates_service.find_by_id(id)
     if exchange_rates is None:
         raise HTTPException(status_code=404, detail="Курс обмена не найден")
@@ -85,7 +93,7 @@ def find_by_id(id: int):
 
 
 @exchange_rates_router.post("/exchangeRates", status_code=201)
-def post_exchange_rate(exchange_rates: ExchangeRatesRequest):
+def post_exchange_rate(exchange_rates: ExchangeRatesRequest, exchange_rates_service: ExchangeRatesService):
     base_currency = Currency(
         id=exchange_rates.base_currency.id,
         code=exchange_rates.base_currency.code,
@@ -108,15 +116,25 @@ def post_exchange_rate(exchange_rates: ExchangeRatesRequest):
 
 
 
+@exchange_rates_router.put("/exchangeRates/bulk", response_model=BulkUpsertResponse)
+def put_exchange_rates_bulk(request: ExchangeRatesBulkRequest, exchange_rates_service: ExchangeRatesService):
+    result = exchange_rates_service.upsert_exchange_rates(request.rows())
+    if result.unknown_codes:
+        raise HTTPException(status_code=404, detail=f"Валюта не найдена: {', '.join(result.unknown_codes)}")
+    return BulkUpsertResponse(created=result.created, updated=result.updated, unchanged=result.unchanged)
+
+
 @exchange_rates_router.delete("/exchangeRates/{id}", status_code=204)
-def delete_exchange_rate(id: int):
-    exchange_rates_service.delete_by_id(id)
+def delete_exchange_rate(id: int, exchange_rates_service: ExchangeRatesService):
+    if exchange_rates_service.delete_by_id(id) is None:
+        raise HTTPException(status_code=404, detail="Курс обмена не найден")
     return None
 
 @exchange_rates_router.patch("/exchangeRates/{id}")  
 def update_exchange_rate(
     id: int, 
-    exchange_rates_update: ExchangeRatesRequest
+    exchange_rates_update: ExchangeRatesRequest,
+    exchange_rates_service: ExchangeRatesService
 ):
     base_currency = Currency(
         id=exchange_rates_update.base_currency.id,
@@ -138,31 +156,36 @@ def update_exchange_rate(
         rate=exchange_rates_update.rate
     )
     
-    exchange_rates_service.update_exchange_rate(exchange_rates_obj, id)
+    updated = exchange_rates_service.update_exchange_rate(exchange_rates_obj, id)
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Курс обмена не найден")
     
     return {
         "message": f"Курс обмена с ID {id} успешно обновлен",
         "id": id,
-        "rate": exchange_rates_update.rate,
-        "base_currency": exchange_rates_update.base_currency.code,
-        "target_currency": exchange_rates_update.target_currency.code
+        "rate": updated.rate,
+        "base_currency": updated.base_currency.code,
+        "target_currency": updated.target_currency.code
     }
 
 @exchange_rates_router.get("/exchange", response_model=ExchangeDTOResponse)
 def exchange(
+    exchange_rates_service: ExchangeRatesService,
     from_currency: str = Query(..., alias="from"),
     to: str = Query(...),
-    amount: Decimal = Query(...)
+    amount: Decimal = Query(...),
+    as_of: Optional[datetime] = None
 ):
-    exchange_rates_by_name = exchange_rates_service.find_by_name(from_currency + to)
+    if as_of is not None:
+        exchange_rates_by_name = exchange_rates_service.find_rate_as_of(from_currency, to, as_of)
+    else:
+        exchange_rates_by_name = exchange_rates_service.find_rate(from_currency, to)
     if exchange_rates_by_name is None:
         raise HTTPException(status_code=404, detail="Курс обмена не найден")
     
     exchange_dto = MappingDTO.map_to_exchange_dto(exchange_rates_by_name)
     exchange_dto.amount = amount
-    exchange_dto.converted_amount = (amount * exchange_dto.rate).quantize(
-        Decimal('0.01'), rounding=ROUND_HALF_UP
-    )
+    exchange_dto.get_converted_amount()
     
     return ExchangeDTOResponse(
         id=exchange_dto.id,
@@ -173,3 +196,27 @@ def exchange(
         converted_amount=exchange_dto.converted_amount
     )
 
+
+@exchange_rates_router.post("/exchange/batch", response_model=ExchangeBatchResponse)
+def exchange_batch(request: ExchangeBatchRequest, exchange_rates_service: ExchangeRatesService):
+    from_codes, to_codes, amounts = request.columns()
+    pairs = list(zip(from_codes, to_codes))
+    rates_by_pair = exchange_rates_service.find_rates(pairs)
+    missing = sorted({base + target for (base, target), er in rates_by_pair.items() if er is None})
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Курс обмена не найден: {', '.join(missing)}")
+
+    rates = [rates_by_pair[pair].rate for pair in pairs]
+    converted_amounts = ExchangeDTO.convert_amounts(rates, amounts)
+    return {
+        "results": [
+            {
+                "from_currency": base,
+                "to": target,
+                "rate": rate,
+                "amount": amount,
+                "converted_amount": converted_amount
+            }
+            for (base, target), rate, amount, converted_amount in zip(pairs, rates, amounts, converted_amounts)
+        ]
+    }
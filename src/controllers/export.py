@@ -0,0 +1,43 @@
+from typing import AsyncIterator, Iterator, List
+from fastapi.responses import StreamingResponse
+from ..models.exchange_rates import ExchangeRates
+from .rendering import EXCHANGE_RATES_CSV_HEADER, render_exchange_rates_csv, render_exchange_rates_ndjson
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", render_exchange_rates_ndjson, b""),
+    "csv": ("text/csv", render_exchange_rates_csv, EXCHANGE_RATES_CSV_HEADER)
+}
+
+
+def _export_response(body, export_format: str) -> StreamingResponse:
+    media_type = EXPORT_FORMATS[export_format][0]
+    headers = {"Content-Disposition": f'attachment; filename="exchange_rates.{export_format}"'}
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
+
+def export_response(chunks: Iterator[List[ExchangeRates]], export_format: str) -> StreamingResponse:
+    # Первая пачка читается до ответа: ошибка БД вернётся статусом 500, а не оборванным потоком
+    _, render, header = EXPORT_FORMATS[export_format]
+    first = next(chunks, [])
+
+    def body():
+        yield header + render(first)
+        for chunk in chunks:
+            yield render(chunk)
+
+    return _export_response(body(), export_format)
+
+
+async def async_export_response(chunks: AsyncIterator[List[ExchangeRates]], export_format: str) -> StreamingResponse:
+    _, render, header = EXPORT_FORMATS[export_format]
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = []
+
+    async def body():
+        yield header + render(first)
+        async for chunk in chunks:
+            yield render(chunk)
+
+    return _export_response(body(), export_format)
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Response
+from ..config.database import get_pool_stats
+from ..config.async_database import get_async_pool_stats
+from ..config.redis import get_redis_health
+from ..config.readiness import get_readiness
+from ..services.rate_graph import get_rate_graph
+from ..cache.local_cache import get_local_cache
+from ..cache.invalidation_bus import get_invalidation_bus
+from ..cache.single_flight import get_single_flight, get_async_single_flight
+from ..cache.refresh import get_background_refresher, get_async_background_refresher
+
+monitoring_router = APIRouter(tags=["monitoring"])
+
+
+@monitoring_router.get("/metrics")
+def metrics():
+    return {
+        "startup": get_readiness().stats(),
+        "db_pool": get_pool_stats(),
+        "async_db_pool": get_async_pool_stats(),
+        "redis": get_redis_health(),
+        "rate_graph": get_rate_graph().stats(),
+        "local_cache": get_local_cache().stats(),
+        "invalidation_bus": get_invalidation_bus().stats(),
+        "single_flight": get_single_flight().stats(),
+        "async_single_flight": get_async_single_flight().stats(),
+        "cache_refresh": get_background_refresher().stats(),
+        "async_cache_refresh": get_async_background_refresher().stats()
+    }
+
+
+@monitoring_router.get("/ready")
+async def ready(response: Response):
+    readiness = get_readiness()
+    if not readiness.ready and readiness.warmup_finished_at is not None:
+        await readiness.recheck()
+    if not readiness.ready:
+        response.status_code = 503
+    return readiness.stats()
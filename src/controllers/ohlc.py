@@ -0,0 +1,35 @@
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+from fastapi import HTTPException
+from ..models.ohlc import OHLC_INTERVALS, OhlcSeries
+from ..repositories.exchange_rates_repository import history_timestamp
+from .schemas import CandleResponse, CurrencyModel, OhlcSeriesResponse
+
+DEFAULT_OHLC_CANDLES = 60
+MAX_OHLC_CANDLES = 1440
+
+
+def ohlc_window(interval: str, start: Optional[datetime], end: Optional[datetime]) -> Tuple[datetime, datetime]:
+    # Без границ отдаются последние DEFAULT_OHLC_CANDLES свечей; начало выравнивается на границу свечи
+    step = OHLC_INTERVALS[interval]
+    end = history_timestamp(end) if end is not None else datetime.now(timezone.utc)
+    start = history_timestamp(start) if start is not None else end - step * DEFAULT_OHLC_CANDLES
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    start = start - (start - epoch) % step
+    if start >= end:
+        raise HTTPException(status_code=400, detail="Начало периода должно быть раньше конца")
+    if (end - start) / step > MAX_OHLC_CANDLES:
+        raise HTTPException(status_code=400, detail=f"Период больше {MAX_OHLC_CANDLES} свечей интервала {interval}")
+    return start, end
+
+
+def ohlc_response(series_list: List[OhlcSeries]) -> List[OhlcSeriesResponse]:
+    return [
+        OhlcSeriesResponse(
+            interval=series.interval,
+            base_currency=CurrencyModel(**series.base_currency.__dict__),
+            target_currency=CurrencyModel(**series.target_currency.__dict__),
+            candles=[CandleResponse(**candle.__dict__) for candle in series.candles]
+        )
+        for series in series_list
+    ]
@@ -0,0 +1,32 @@
+from typing import Callable, Dict, List, Optional
+from fastapi import HTTPException, Response
+from ..cache.rendered import RenderedResponse
+from ..models.page import Page, PageRequest
+from ..repositories.keyset import SortColumn
+from .rendering import rendered_response
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def page_request(limit: Optional[int], cursor: Optional[str], sort: Optional[str],
+                 sort_columns: Dict[str, SortColumn],
+                 base_code: Optional[str] = None, target_code: Optional[str] = None) -> Optional[PageRequest]:
+    # Без параметров пагинации список отдаётся целиком, как раньше
+    if limit is None and cursor is None and sort is None and base_code is None and target_code is None:
+        return None
+    sort_types = {name: column.cast for name, column in sort_columns.items()}
+    try:
+        return PageRequest.from_params(
+            limit or DEFAULT_PAGE_LIMIT, sort or "id", cursor, base_code, target_code, sort_types
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def page_response(page: Page, render: Callable[[List], bytes], if_none_match: Optional[str]) -> Response:
+    response = rendered_response(RenderedResponse.from_body(render(page.items)), if_none_match)
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return response
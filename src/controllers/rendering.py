@@ -0,0 +1,55 @@
+import io
+import csv
+from typing import List, Optional
+from fastapi import Response
+from pydantic import TypeAdapter
+from ..cache.rendered import RenderedResponse
+from ..models.currency import Currency
+from ..models.exchange_rates import ExchangeRates
+from .schemas import CurrencyModel, CurrencyResponse, ExchangeRatesResponse
+
+_currencies_adapter = TypeAdapter(List[CurrencyResponse])
+_exchange_rates_adapter = TypeAdapter(List[ExchangeRatesResponse])
+_exchange_rate_adapter = TypeAdapter(ExchangeRatesResponse)
+
+EXCHANGE_RATES_CSV_HEADER = b"id,base_currency_id,base_currency_code,target_currency_id,target_currency_code,rate\n"
+
+
+def render_currencies(currencies: List[Currency]) -> bytes:
+    return _currencies_adapter.dump_json([CurrencyResponse(**currency.__dict__) for currency in currencies])
+
+
+def _exchange_rate_response(er: ExchangeRates) -> ExchangeRatesResponse:
+    return ExchangeRatesResponse(
+        id=er.id,
+        rate=er.rate,
+        base_currency=CurrencyModel(**er.base_currency.__dict__),
+        target_currency=CurrencyModel(**er.target_currency.__dict__)
+    )
+
+
+def render_exchange_rates(exchange_rates_list: List[ExchangeRates]) -> bytes:
+    return _exchange_rates_adapter.dump_json([_exchange_rate_response(er) for er in exchange_rates_list])
+
+
+def render_exchange_rates_ndjson(exchange_rates_list: List[ExchangeRates]) -> bytes:
+    # Строка NDJSON - тот же объект, что и элемент GET /exchangeRates
+    return b"".join(_exchange_rate_adapter.dump_json(_exchange_rate_response(er)) + b"\n" for er in exchange_rates_list)
+
+
+def render_exchange_rates_csv(exchange_rates_list: List[ExchangeRates]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows(
+        (er.id, er.base_currency.id, er.base_currency.code, er.target_currency.id, er.target_currency.code, er.rate)
+        for er in exchange_rates_list
+    )
+    return buffer.getvalue().encode()
+
+
+def rendered_response(rendered: RenderedResponse, if_none_match: Optional[str]) -> Response:
+    # no-cache: клиент может хранить ответ, но обязан перепроверить его по ETag
+    headers = {"ETag": rendered.etag, "Cache-Control": "no-cache"}
+    if rendered.matches(if_none_match):
+        return Response(status_code=304, headers=headers)
+    return Response(content=rendered.body, media_type="application/json", headers=headers)
@@ -0,0 +1,137 @@
+from typing import List, Optional
+from datetime import datetime
+from decimal import Decimal
+from pydantic import BaseModel, Field, model_validator
+
+
+class CurrencyRequest(BaseModel):
+    code: str
+    fullname: str
+    sign: str
+
+    class Config:
+        from_attributes = True
+
+
+class CurrenciesBulkRequest(BaseModel):
+    currencies: List[CurrencyRequest] = Field(..., min_length=1)
+
+
+class CurrencyResponse(BaseModel):
+    id: Optional[int] = None
+    code: Optional[str] = None
+    fullname: Optional[str] = None
+    sign: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class CurrencyModel(BaseModel):
+    id: Optional[int] = None
+    code: Optional[str] = None
+    fullname: Optional[str] = None
+    sign: Optional[str] = None
+
+
+class ExchangeRatesRequest(BaseModel):
+    rate: Decimal
+    base_currency: CurrencyModel
+    target_currency: CurrencyModel
+
+
+class ExchangeRatesResponse(BaseModel):
+    id: Optional[int] = None
+    rate: Optional[Decimal] = None
+    base_currency: Optional[CurrencyModel] = None
+    target_currency: Optional[CurrencyModel] = None
+
+
+class ExchangeDTOResponse(BaseModel):
+    id: Optional[int] = None
+    rate: Optional[Decimal] = None
+    base_currency: Optional[CurrencyModel] = None
+    target_currency: Optional[CurrencyModel] = None
+    amount: Optional[Decimal] = None
+    converted_amount: Optional[Decimal] = None
+
+
+class ExchangeItemRequest(BaseModel):
+    from_currency: str = Field(..., alias="from")
+    to: str
+    amount: Decimal
+
+
+class ExchangeBatchRequest(BaseModel):
+    items: Optional[List[ExchangeItemRequest]] = None
+    from_currencies: Optional[List[str]] = Field(None, alias="from")
+    to: Optional[List[str]] = None
+    amount: Optional[List[Decimal]] = None
+
+    @model_validator(mode="after")
+    def check_shape(self) -> 'ExchangeBatchRequest':
+        columns = (self.from_currencies, self.to, self.amount)
+        if self.items is None:
+            if any(column is None for column in columns):
+                raise ValueError("Нужно передать items или колонки from, to, amount")
+            if not len(self.from_currencies) == len(self.to) == len(self.amount):
+                raise ValueError("Колонки from, to, amount должны быть одной длины")
+        elif any(column is not None for column in columns):
+            raise ValueError("Нельзя одновременно передавать items и колонки")
+        return self
+
+    def columns(self):
+        if self.items is not None:
+            return (
+                [item.from_currency for item in self.items],
+                [item.to for item in self.items],
+                [item.amount for item in self.items]
+            )
+        return self.from_currencies, self.to, self.amount
+
+
+class ExchangeBatchItemResponse(BaseModel):
+    from_currency: str = Field(..., serialization_alias="from")
+    to: str
+    rate: Decimal
+    amount: Decimal
+    converted_amount: Decimal
+
+
+class ExchangeBatchResponse(BaseModel):
+    results: List[ExchangeBatchItemResponse]
+
+
+class ExchangeRateSheetItem(BaseModel):
+    base: str
+    target: str
+    rate: Decimal
+
+
+class ExchangeRatesBulkRequest(BaseModel):
+    rates: List[ExchangeRateSheetItem] = Field(..., min_length=1)
+
+    def rows(self):
+        return [(item.base, item.target, item.rate) for item in self.rates]
+
+
+class BulkUpsertResponse(BaseModel):
+    created: int
+    updated: int
+    unchanged: int
+
+
+class CandleResponse(BaseModel):
+    time: datetime
+    open: Decimal
+    high: Decimal
+    low: Decimal
+    close: Decimal
+    samples: int
+
+
+class OhlcSeriesResponse(BaseModel):
+    interval: str
+    base_currency: CurrencyModel
+    target_currency: CurrencyModel
+    candles: List[CandleResponse]
@@ -1,8 +1,10 @@
 from decimal import Decimal, ROUND_HALF_UP
 from dataclasses import dataclass
-from typing import Optional
+from typing import List, Optional
 from ..models.currency import Currency
 
+AMOUNT_QUANTUM = Decimal('0.01')
+
 
 @dataclass
 class ExchangeDTO:
@@ -16,10 +18,16 @@ class ExchangeDTO:
     def get_converted_amount(self) -> Decimal:
         if self.amount is not None and self.rate is not None:
             self.converted_amount = (self.amount * self.rate).quantize(
-                Decimal('0.01'), rounding=ROUND_HALF_UP
+                AMOUNT_QUANTUM, rounding=ROUND_HALF_UP
             )
         return self.converted_amount
 
+    @staticmethod
+    def convert_amounts(rates: List[Decimal], amounts: List[Decimal]) -> List[Decimal]:
+        quantum = AMOUNT_QUANTUM
+        rounding = ROUND_HALF_UP
+        return [(amount * rate).quantize(quantum, rounding=rounding) for rate, amount in zip(rates, amounts)]
+
     def __str__(self):
         return f"ExchangeRates{{id={self.id}, rate={self.rate}, baseCurrency={self.base_currency}, targetCurrency={self.target_currency}}}"
 
@@ -0,0 +1,16 @@
+from .migration import Migration
+from .versions import MIGRATIONS
+from .runner import apply_migrations, create_history_partitions, get_applied_versions
+from .verify import RequiredIndex, REQUIRED_INDEXES, SchemaNotReadyError, verify_schema
+
+__all__ = [
+    'Migration',
+    'MIGRATIONS',
+    'apply_migrations',
+    'create_history_partitions',
+    'get_applied_versions',
+    'RequiredIndex',
+    'REQUIRED_INDEXES',
+    'SchemaNotReadyError',
+    'verify_schema'
+]
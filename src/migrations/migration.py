@@ -0,0 +1,12 @@
+from dataclasses import dataclass, field
+from typing import List
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    statements: List[str] = field(default_factory=list)
+
+    def __str__(self):
+        return f"{self.version:04d}_{self.name}"
@@ -0,0 +1,66 @@
+from typing import List, Set
+from .migration import Migration
+from .versions import MIGRATIONS
+from ..config.database import get_db_connection
+
+MIGRATIONS_LOCK_ID = 4217
+
+# Сколько помесячных секций истории курсов держать созданными заранее
+HISTORY_PARTITION_MONTHS_AHEAD = 3
+
+
+def get_applied_versions(data_source=get_db_connection) -> Set[int]:
+    try:
+        with data_source() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT to_regclass('schema_migrations') IS NOT NULL")
+                if not cursor.fetchone()[0]:
+                    return set()
+                cursor.execute("SELECT version FROM schema_migrations")
+                return {row[0] for row in cursor.fetchall()}
+    except Exception as e:
+        raise RuntimeError(f"Ошибка при чтении списка миграций: {e}")
+
+
+def apply_migrations(data_source=get_db_connection, migrations: List[Migration] = MIGRATIONS) -> List[Migration]:
+    applied = []
+    try:
+        with data_source() as connection:
+            with connection.cursor() as cursor:
+                # Параллельно стартующие воркеры не должны применять миграции одновременно
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATIONS_LOCK_ID,))
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS schema_migrations (
+                        version INT PRIMARY KEY,
+                        name VARCHAR(200) NOT NULL,
+                        applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                    )
+                """)
+                cursor.execute("SELECT version FROM schema_migrations")
+                done = {row[0] for row in cursor.fetchall()}
+                for migration in sorted(migrations, key=lambda m: m.version):
+                    if migration.version in done:
+                        continue
+                    for statement in migration.statements:
+                        cursor.execute(statement)
+                    cursor.execute(
+                        "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                        (migration.version, migration.name)
+                    )
+                    applied.append(migration)
+    except Exception as e:
+        raise RuntimeError(f"Ошибка при применении миграций: {e}")
+    return applied
+
+
+def create_history_partitions(data_source=get_db_connection,
+                              months_ahead: int = HISTORY_PARTITION_MONTHS_AHEAD) -> int:
+    # Запускается по расписанию (manage.py history-partitions); строки, успевшие попасть в DEFAULT, переносятся в новую секцию
+    try:
+        with data_source() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT exchangerates_history_create_partitions(%s)", (months_ahead,))
+                created = cursor.fetchone()[0]
+    except Exception as e:
+        raise RuntimeError(f"Ошибка при создании секций истории курсов: {e}")
+    return created
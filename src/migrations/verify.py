@@ -0,0 +1,81 @@
+from dataclasses import dataclass
+from typing import List, Tuple
+from .versions import MIGRATIONS
+from .runner import get_applied_versions
+from ..config.database import get_db_connection
+
+
+class SchemaNotReadyError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class RequiredIndex:
+    table: str
+    columns: Tuple[str, ...]
+    unique: bool = False
+
+    def __str__(self):
+        kind = "UNIQUE " if self.unique else ""
+        return f"{kind}INDEX {self.table} ({', '.join(self.columns)})"
+
+
+# Индексы, без которых деградируют горячие запросы ExchangeRatesRepository и CurrencyRepository
+REQUIRED_INDEXES: List[RequiredIndex] = [
+    RequiredIndex("currencies", ("code",), unique=True),
+    RequiredIndex("exchangerates", ("basecurrencyid", "targetcurrencyid"), unique=True),
+    RequiredIndex("exchangerates", ("targetcurrencyid",)),
+    RequiredIndex("exchangerates", ("basecurrencyid", "id")),
+    RequiredIndex("exchangerates", ("targetcurrencyid", "id")),
+    RequiredIndex("exchangerates", ("rate", "id")),
+    RequiredIndex("exchangerates", ("basecurrencyid", "rate", "id")),
+    RequiredIndex("exchangerates", ("targetcurrencyid", "rate", "id")),
+    RequiredIndex("exchangerates_history", ("basecurrencyid", "targetcurrencyid", "valid_from")),
+    RequiredIndex("exchangerates_ohlc", ("resolution", "basecurrencyid", "targetcurrencyid", "bucket"), unique=True),
+    RequiredIndex("exchangerates_ohlc", ("resolution", "bucket"))
+]
+
+
+def verify_schema(data_source=get_db_connection) -> List[str]:
+    problems = []
+    query = """
+        SELECT
+            t.relname AS table_name,
+            i.indisunique AS is_unique,
+            array_agg(a.attname::text ORDER BY k.ord) AS columns
+        FROM pg_index i
+            JOIN pg_class t ON t.oid = i.indrelid
+            JOIN pg_namespace n ON n.oid = t.relnamespace
+            CROSS JOIN LATERAL generate_series(0, i.indnkeyatts - 1) AS k(ord)
+            JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = i.indkey[k.ord]
+        WHERE n.nspname = current_schema()
+          AND t.relname = ANY(%s)
+          AND i.indisvalid
+        GROUP BY i.indexrelid, t.relname, i.indisunique
+    """
+    tables = sorted({index.table for index in REQUIRED_INDEXES})
+    try:
+        with data_source() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(query, (tables,))
+                existing = [(row[0], row[1], tuple(row[2])) for row in cursor.fetchall()]
+    except Exception as e:
+        raise RuntimeError(f"Ошибка при проверке схемы БД: {e}")
+
+    applied = get_applied_versions(data_source)
+    for migration in MIGRATIONS:
+        if migration.version not in applied:
+            problems.append(f"Не применена миграция {migration}")
+    for required in REQUIRED_INDEXES:
+        if not any(_covers(required, index) for index in existing):
+            problems.append(f"Отсутствует {required}")
+    return problems
+
+
+def _covers(required: RequiredIndex, index: Tuple[str, bool, Tuple[str, ...]]) -> bool:
+    table, is_unique, columns = index
+    if table != required.table:
+        return False
+    if required.unique:
+        return is_unique and columns == required.columns
+    return columns[:len(required.columns)] == required.columns
@@ -0,0 +1,364 @@
+from typing import List
+from .migration import Migration
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        version=0,
+        name="base_schema",
+        statements=[
+            """
+            CREATE TABLE IF NOT EXISTS currencies (
+                id SERIAL PRIMARY KEY,
+                code VARCHAR(3) NOT NULL UNIQUE,
+                fullname VARCHAR(100),
+                sign VARCHAR(10)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS exchangerates (
+                id SERIAL PRIMARY KEY,
+                basecurrencyid INT NOT NULL REFERENCES currencies (id),
+                targetcurrencyid INT NOT NULL REFERENCES currencies (id),
+                rate DECIMAL
+            )
+            """
+        ]
+    ),
+    Migration(
+        version=1,
+        name="exchangerates_pair_lookup_indexes",
+        statements=[
+            # Уникальный индекс по коду валюты, если его ещё нет (например, от UNIQUE в CREATE TABLE)
+            """
+            DO $$
+            BEGIN
+                IF NOT EXISTS (
+                    SELECT 1
+                    FROM pg_index i
+                        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+                    WHERE i.indrelid = 'currencies'::regclass
+                      AND i.indisunique
+                      AND i.indnkeyatts = 1
+                      AND a.attname = 'code'
+                ) THEN
+                    CREATE UNIQUE INDEX currencies_code_uidx ON currencies (code);
+                END IF;
+            END
+            $$
+            """,
+            # Поиск пары идёт по (basecurrencyid, targetcurrencyid); id и rate в INCLUDE дают index-only scan
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS exchangerates_pair_uidx
+                ON exchangerates (basecurrencyid, targetcurrencyid) INCLUDE (id, rate)
+            """
+        ]
+    ),
+    Migration(
+        version=2,
+        name="foreign_key_indexes",
+        statements=[
+            # basecurrencyid покрыт первым столбцом exchangerates_pair_uidx, targetcurrencyid - нет
+            """
+            CREATE INDEX IF NOT EXISTS exchangerates_targetcurrencyid_idx
+                ON exchangerates (targetcurrencyid)
+            """
+        ]
+    ),
+    Migration(
+        version=3,
+        name="keyset_pagination_indexes",
+        statements=[
+            # Страницы GET /exchangeRates читаются по (поле сортировки, id) с фильтром по валютам
+            """
+            CREATE INDEX IF NOT EXISTS exchangerates_basecurrencyid_id_idx
+                ON exchangerates (basecurrencyid, id)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS exchangerates_targetcurrencyid_id_idx
+                ON exchangerates (targetcurrencyid, id)
+            """,
+            # Индекс (targetcurrencyid) теперь префикс предыдущего и только замедляет запись
+            "DROP INDEX IF EXISTS exchangerates_targetcurrencyid_idx",
+            """
+            CREATE INDEX IF NOT EXISTS exchangerates_rate_id_idx
+                ON exchangerates (rate, id)
+            """
+        ]
+    ),
+    Migration(
+        version=4,
+        name="exchange_rate_history",
+        statements=[
+            # Журнал курсов только дописывается; exchangerates остаётся таблицей последних курсов,
+            # и чтение текущего курса не зависит от размера истории. rate IS NULL - пара удалена
+            """
+            CREATE TABLE IF NOT EXISTS exchangerates_history (
+                exchangerateid INT NOT NULL,
+                basecurrencyid INT NOT NULL,
+                targetcurrencyid INT NOT NULL,
+                rate DECIMAL,
+                valid_from TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+            ) PARTITION BY RANGE (valid_from)
+            """,
+            # Строки вне помесячных секций попадают сюда, а не теряются с ошибкой
+            """
+            CREATE TABLE IF NOT EXISTS exchangerates_history_default
+                PARTITION OF exchangerates_history DEFAULT
+            """,
+            # Границы месяцев - в UTC, как у свечей, а не в TimeZone сессии, применившей миграцию
+            """
+            CREATE OR REPLACE FUNCTION exchangerates_history_create_partitions(months_ahead INT)
+            RETURNS INT LANGUAGE plpgsql AS $$
+            DECLARE
+                month_start TIMESTAMP := date_trunc('month', now(), 'UTC') AT TIME ZONE 'UTC';
+                partition_name TEXT;
+                created INT := 0;
+            BEGIN
+                FOR i IN 0..months_ahead LOOP
+                    partition_name := format('exchangerates_history_%s', to_char(month_start, 'YYYY_MM'));
+                    IF to_regclass(partition_name) IS NULL THEN
+                        EXECUTE format(
+                            'CREATE TABLE %I PARTITION OF exchangerates_history FOR VALUES FROM (%L) TO (%L)',
+                            partition_name, month_start AT TIME ZONE 'UTC',
+                            (month_start + INTERVAL '1 month') AT TIME ZONE 'UTC'
+                        );
+                        created := created + 1;
+                    END IF;
+                    month_start := month_start + INTERVAL '1 month';
+                END LOOP;
+                RETURN created;
+            END
+            $$
+            """,
+            "SELECT exchangerates_history_create_partitions(3)",
+            # Курс пары на момент времени - один спуск по индексу в каждой секции не новее этого момента
+            """
+            CREATE INDEX IF NOT EXISTS exchangerates_history_pair_valid_from_idx
+                ON exchangerates_history (basecurrencyid, targetcurrencyid, valid_from)
+            """,
+            # Выборки за период по всем парам: BRIN по времени вставки почти ничего не весит
+            """
+            CREATE INDEX IF NOT EXISTS exchangerates_history_valid_from_brin
+                ON exchangerates_history USING brin (valid_from)
+            """,
+            """
+            CREATE OR REPLACE FUNCTION exchangerates_history_record()
+            RETURNS TRIGGER LANGUAGE plpgsql AS $$
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    INSERT INTO exchangerates_history (exchangerateid, basecurrencyid, targetcurrencyid, rate)
+                    VALUES (OLD.id, OLD.basecurrencyid, OLD.targetcurrencyid, NULL);
+                    RETURN NULL;
+                END IF;
+                IF TG_OP = 'UPDATE'
+                        AND (OLD.basecurrencyid, OLD.targetcurrencyid) <> (NEW.basecurrencyid, NEW.targetcurrencyid) THEN
+                    INSERT INTO exchangerates_history (exchangerateid, basecurrencyid, targetcurrencyid, rate)
+                    VALUES (OLD.id, OLD.basecurrencyid, OLD.targetcurrencyid, NULL);
+                END IF;
+                INSERT INTO exchangerates_history (exchangerateid, basecurrencyid, targetcurrencyid, rate)
+                VALUES (NEW.id, NEW.basecurrencyid, NEW.targetcurrencyid, NEW.rate);
+                RETURN NULL;
+            END
+            $$
+            """,
+            "DROP TRIGGER IF EXISTS exchangerates_history_insert_delete ON exchangerates",
+            """
+            CREATE TRIGGER exchangerates_history_insert_delete
+                AFTER INSERT OR DELETE ON exchangerates
+                FOR EACH ROW EXECUTE FUNCTION exchangerates_history_record()
+            """,
+            "DROP TRIGGER IF EXISTS exchangerates_history_update ON exchangerates",
+            """
+            CREATE TRIGGER exchangerates_history_update
+                AFTER UPDATE ON exchangerates
+                FOR EACH ROW
+                WHEN ((OLD.rate, OLD.basecurrencyid, OLD.targetcurrencyid)
+                      IS DISTINCT FROM (NEW.rate, NEW.basecurrencyid, NEW.targetcurrencyid))
+                EXECUTE FUNCTION exchangerates_history_record()
+            """,
+            # Отправная точка истории - курсы на момент миграции
+            """
+            INSERT INTO exchangerates_history (exchangerateid, basecurrencyid, targetcurrencyid, rate)
+            SELECT id, basecurrencyid, targetcurrencyid, rate FROM exchangerates
+            """
+        ]
+    ),
+    Migration(
+        version=5,
+        name="exchange_rate_ohlc_rollups",
+        statements=[
+            # Свечи по минутам и часам; open_at/close_at хранят время первого и последнего курса в свече,
+            # чтобы open и close были верными, даже если строки истории придут не по порядку
+            """
+            CREATE TABLE IF NOT EXISTS exchangerates_ohlc (
+                resolution VARCHAR(2) NOT NULL,
+                basecurrencyid INT NOT NULL,
+                targetcurrencyid INT NOT NULL,
+                bucket TIMESTAMPTZ NOT NULL,
+                open DECIMAL NOT NULL,
+                high DECIMAL NOT NULL,
+                low DECIMAL NOT NULL,
+                close DECIMAL NOT NULL,
+                open_at TIMESTAMPTZ NOT NULL,
+                close_at TIMESTAMPTZ NOT NULL,
+                samples INT NOT NULL,
+                PRIMARY KEY (resolution, basecurrencyid, targetcurrencyid, bucket)
+            )
+            """,
+            # Серия по всем парам за период
+            """
+            CREATE INDEX IF NOT EXISTS exchangerates_ohlc_resolution_bucket_idx
+                ON exchangerates_ohlc (resolution, bucket)
+            """,
+            # Каждая строка истории дописывается в свою минутную и часовую свечу, сырые курсы
+            # при запросе не перечитываются. Свечи режутся по UTC
+            """
+            CREATE OR REPLACE FUNCTION exchangerates_ohlc_record()
+            RETURNS TRIGGER LANGUAGE plpgsql AS $$
+            BEGIN
+                INSERT INTO exchangerates_ohlc AS o (
+                    resolution, basecurrencyid, targetcurrencyid, bucket,
+                    open, high, low, close, open_at, close_at, samples
+                )
+                SELECT
+                    r.resolution, NEW.basecurrencyid, NEW.targetcurrencyid, date_trunc(r.unit, NEW.valid_from, 'UTC'),
+                    NEW.rate, NEW.rate, NEW.rate, NEW.rate, NEW.valid_from, NEW.valid_from, 1
+                FROM (VALUES ('1m', 'minute'), ('1h', 'hour')) AS r (resolution, unit)
+                ON CONFLICT (resolution, basecurrencyid, targetcurrencyid, bucket) DO UPDATE SET
+                    open = CASE WHEN EXCLUDED.open_at < o.open_at THEN EXCLUDED.open ELSE o.open END,
+                    high = GREATEST(o.high, EXCLUDED.high),
+                    low = LEAST(o.low, EXCLUDED.low),
+                    close = CASE WHEN EXCLUDED.close_at >= o.close_at THEN EXCLUDED.close ELSE o.close END,
+                    open_at = LEAST(o.open_at, EXCLUDED.open_at),
+                    close_at = GREATEST(o.close_at, EXCLUDED.close_at),
+                    samples = o.samples + 1;
+                RETURN NULL;
+            END
+            $$
+            """,
+            "DROP TRIGGER IF EXISTS exchangerates_ohlc_insert ON exchangerates_history",
+            # Отметки об удалении пары (rate IS NULL) в свечи не попадают
+            """
+            CREATE TRIGGER exchangerates_ohlc_insert
+                AFTER INSERT ON exchangerates_history
+                FOR EACH ROW
+                WHEN (NEW.rate IS NOT NULL)
+                EXECUTE FUNCTION exchangerates_ohlc_record()
+            """,
+            # Свечи по уже накопленной истории
+            """
+            INSERT INTO exchangerates_ohlc (
+                resolution, basecurrencyid, targetcurrencyid, bucket,
+                open, high, low, close, open_at, close_at, samples
+            )
+            SELECT
+                r.resolution, h.basecurrencyid, h.targetcurrencyid, date_trunc(r.unit, h.valid_from, 'UTC'),
+                (array_agg(h.rate ORDER BY h.valid_from))[1], max(h.rate), min(h.rate),
+                (array_agg(h.rate ORDER BY h.valid_from DESC))[1], min(h.valid_from), max(h.valid_from), count(*)
+            FROM exchangerates_history h
+                CROSS JOIN (VALUES ('1m', 'minute'), ('1h', 'hour')) AS r (resolution, unit)
+            WHERE h.rate IS NOT NULL
+            GROUP BY 1, 2, 3, 4
+            ON CONFLICT DO NOTHING
+            """
+        ]
+    ),
+    Migration(
+        version=6,
+        name="exchange_rate_history_partitions_utc",
+        statements=[
+            # Базы, где 0004 ещё резала секции в TimeZone сессии, дальше получают секции по UTC.
+            # Если задание history-partitions пропустило границу месяца, строки этого месяца уже лежат в секции
+            # DEFAULT и CREATE TABLE ... PARTITION OF упадёт: такие строки переносятся в новую
+            # таблицу, и она подключается секцией. DEFAULT блокируется до конца транзакции, чтобы
+            # новые строки месяца не попали туда между переносом и ATTACH PARTITION
+            """
+            CREATE OR REPLACE FUNCTION exchangerates_history_create_partitions(months_ahead INT)
+            RETURNS INT LANGUAGE plpgsql AS $$
+            DECLARE
+                month_start TIMESTAMP := date_trunc('month', now(), 'UTC') AT TIME ZONE 'UTC';
+                range_start TIMESTAMPTZ;
+                range_end TIMESTAMPTZ;
+                partition_name TEXT;
+                created INT := 0;
+            BEGIN
+                FOR i IN 0..months_ahead LOOP
+                    partition_name := format('exchangerates_history_%s', to_char(month_start, 'YYYY_MM'));
+                    range_start := month_start AT TIME ZONE 'UTC';
+                    range_end := (month_start + INTERVAL '1 month') AT TIME ZONE 'UTC';
+                    IF to_regclass(partition_name) IS NULL THEN
+                        LOCK TABLE exchangerates_history_default IN ACCESS EXCLUSIVE MODE;
+                        IF EXISTS (
+                            SELECT 1 FROM exchangerates_history_default
+                            WHERE valid_from >= range_start AND valid_from < range_end
+                        ) THEN
+                            EXECUTE format(
+                                'CREATE TABLE %I (LIKE exchangerates_history INCLUDING DEFAULTS)', partition_name
+                            );
+                            EXECUTE format(
+                                'WITH moved AS (DELETE FROM exchangerates_history_default '
+                                'WHERE valid_from >= %L AND valid_from < %L RETURNING *) '
+                                'INSERT INTO %I SELECT * FROM moved',
+                                range_start, range_end, partition_name
+                            );
+                            EXECUTE format(
+                                'ALTER TABLE exchangerates_history ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                                partition_name, range_start, range_end
+                            );
+                        ELSE
+                            EXECUTE format(
+                                'CREATE TABLE %I PARTITION OF exchangerates_history FOR VALUES FROM (%L) TO (%L)',
+                                partition_name, range_start, range_end
+                            );
+                        END IF;
+                        created := created + 1;
+                    END IF;
+                    month_start := month_start + INTERVAL '1 month';
+                END LOOP;
+                RETURN created;
+            END
+            $$
+            """
+        ]
+    ),
+    Migration(
+        version=7,
+        name="exchangerates_rate_not_null",
+        statements=[
+            # Keyset-пагинация по (rate, id) сравнивает кортежи, и строка с пустым курсом из неё выпадает.
+            # API курс без значения не создаёт; строки, записанные в обход API, миграция не удаляет сама:
+            # она останавливается, и оператор решает, задать им курс или удалить
+            """
+            DO $$
+            DECLARE
+                null_rates BIGINT;
+            BEGIN
+                SELECT count(*) INTO null_rates FROM exchangerates WHERE rate IS NULL;
+                IF null_rates > 0 THEN
+                    RAISE EXCEPTION 'exchangerates has % rows with NULL rate', null_rates
+                        USING HINT = 'Set a rate for these rows or delete them '
+                                     '(SELECT * FROM exchangerates WHERE rate IS NULL), then rerun manage.py migrate';
+                END IF;
+            END
+            $$
+            """,
+            "ALTER TABLE exchangerates ALTER COLUMN rate SET NOT NULL"
+        ]
+    ),
+    Migration(
+        version=8,
+        name="keyset_filtered_rate_indexes",
+        statements=[
+            # Страницы sort=rate с фильтром base или target: без валюты в индексе PostgreSQL выбирает
+            # между (rate, id) с отбрасыванием чужих строк и сортировкой всех строк валюты
+            """
+            CREATE INDEX IF NOT EXISTS exchangerates_basecurrencyid_rate_id_idx
+                ON exchangerates (basecurrencyid, rate, id)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS exchangerates_targetcurrencyid_rate_id_idx
+                ON exchangerates (targetcurrencyid, rate, id)
+            """
+        ]
+    )
+]
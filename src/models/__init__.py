@@ -1,5 +1,7 @@
 from .currency import Currency
 from .exchange_rates import ExchangeRates
+from .ohlc import Candle, OhlcSeries
+from .page import Page, PageRequest
+from .upsert_result import UpsertResult
 
-__all__ = ['Currency', 'ExchangeRates']
-
+__all__ = ['Candle', 'Currency', 'ExchangeRates', 'OhlcSeries', 'Page', 'PageRequest', 'UpsertResult']
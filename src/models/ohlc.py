@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from dataclasses import dataclass, field
+from typing import List, Optional
+from .currency import Currency
+
+# Длительность свечи для каждого интервала из таблицы exchangerates_ohlc
+OHLC_INTERVALS = {
+    "1m": timedelta(minutes=1),
+    "1h": timedelta(hours=1)
+}
+
+
+@dataclass
+class Candle:
+    time: Optional[datetime] = None
+    open: Optional[Decimal] = None
+    high: Optional[Decimal] = None
+    low: Optional[Decimal] = None
+    close: Optional[Decimal] = None
+    samples: int = 0
+
+
+@dataclass
+class OhlcSeries:
+    """Свечи одной пары по возрастанию времени; свечей нет за интервалы, в которые курс не менялся."""
+    interval: str = "1m"
+    base_currency: Optional[Currency] = None
+    target_currency: Optional[Currency] = None
+    candles: List[Candle] = field(default_factory=list)
@@ -0,0 +1,87 @@
+import json
+import base64
+import binascii
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+@dataclass
+class Page(Generic[T]):
+    items: List[T] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class PageRequest:
+    """Запрос страницы при keyset-пагинации: limit строк строго после after в порядке sort.
+
+    after - (значение поля сортировки, id) последней строки предыдущей страницы; id разрешает
+    равенство значений. sort совпадает с именем атрибута модели.
+    """
+    limit: int = 100
+    sort: str = "id"
+    descending: bool = False
+    after: Optional[Tuple[object, int]] = None
+    base_code: Optional[str] = None
+    target_code: Optional[str] = None
+
+    @property
+    def sort_param(self) -> str:
+        return ("-" if self.descending else "") + self.sort
+
+    @classmethod
+    def from_params(cls, limit: int, sort: str = "id", cursor: Optional[str] = None,
+                    base_code: Optional[str] = None, target_code: Optional[str] = None,
+                    sort_types: Optional[Dict[str, Callable[[object], object]]] = None) -> 'PageRequest':
+        # sort_types: поле сортировки -> приведение значения из курсора к типу столбца
+        cast = sort_types.get(sort.lstrip("-")) if sort_types else None
+        return cls(
+            limit=limit,
+            sort=sort.lstrip("-"),
+            descending=sort.startswith("-"),
+            after=decode_cursor(cursor, sort, cast) if cursor else None,
+            base_code=base_code,
+            target_code=target_code
+        )
+
+    def cache_suffix(self) -> str:
+        after = json.dumps(self.after, separators=(",", ":"), default=str) if self.after else ""
+        return f"page:{self.sort_param}:{self.base_code or ''}:{self.target_code or ''}:{self.limit}:{after}"
+
+    def to_page(self, rows: List[T]) -> Page[T]:
+        # Репозиторий отдаёт limit + 1 строк: лишняя строка означает, что есть следующая страница
+        items = rows[:self.limit]
+        next_cursor = None
+        if len(rows) > self.limit:
+            last = items[-1]
+            next_cursor = encode_cursor(self.sort_param, (getattr(last, self.sort), last.id))
+        return Page(items, next_cursor)
+
+
+def encode_cursor(sort_param: str, after: Tuple[object, int]) -> str:
+    raw = json.dumps([sort_param, *after], separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_param: str,
+                  cast: Optional[Callable[[object], object]] = None) -> Tuple[object, int]:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        cursor_sort, value, last_id = data
+        last_id = int(last_id)
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise ValueError(f"Некорректный курсор: {cursor}")
+    if cursor_sort != sort_param:
+        raise ValueError(f"Курсор получен для сортировки {cursor_sort}, а не {sort_param}")
+    if cast is not None:
+        # Значение курсора уходит параметром в SQL: подделанное или пустое отклоняется здесь, а не в БД
+        try:
+            value = cast(value) if value is not None else None
+        except (ValueError, TypeError, ArithmeticError) as e:
+            value = None
+        if value is None or (isinstance(value, Decimal) and not value.is_finite()):
+            raise ValueError(f"Некорректное значение в курсоре: {cursor}")
+    return value, last_id
@@ -0,0 +1,18 @@
+from dataclasses import dataclass, field
+from typing import Generic, List, TypeVar
+
+T = TypeVar('T')
+
+
+@dataclass
+class UpsertResult(Generic[T]):
+    """Итог пакетной записи: сколько строк создано, обновлено и осталось как было.
+
+    changed - записи, которые действительно изменились в БД (по ним правятся кэш и граф курсов);
+    unknown_codes - коды валют, которых нет в справочнике: при них ничего не записывается.
+    """
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    changed: List[T] = field(default_factory=list)
+    unknown_codes: List[str] = field(default_factory=list)
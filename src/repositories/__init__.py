@@ -1,6 +1,15 @@
 from .crud_repository import CrudRepository
 from .currency_repository import CurrencyRepository
 from .exchange_rates_repository import ExchangeRatesRepository
+from .async_crud_repository import AsyncCrudRepository
+from .async_currency_repository import AsyncCurrencyRepository
+from .async_exchange_rates_repository import AsyncExchangeRatesRepository
 
-__all__ = ['CrudRepository', 'CurrencyRepository', 'ExchangeRatesRepository']
-
+__all__ = [
+    'CrudRepository',
+    'CurrencyRepository',
+    'ExchangeRatesRepository',
+    'AsyncCrudRepository',
+    'AsyncCurrencyRepository',
+    'AsyncExchangeRatesRepository'
+]
@@ -0,0 +1,31 @@
+from abc import ABC, abstractmethod
+from typing import List, TypeVar, Generic, Optional
+
+T = TypeVar('T')
+ID = TypeVar('ID')
+
+
+class AsyncCrudRepository(ABC, Generic[T, ID]):
+    @abstractmethod
+    async def find_by_id(self, id: ID) -> Optional[T]:
+        pass
+
+    @abstractmethod
+    async def find_by_name(self, name: str) -> Optional[T]:
+        pass
+
+    @abstractmethod
+    async def find_all(self) -> List[T]:
+        pass
+
+    @abstractmethod
+    async def create(self, entity: T) -> Optional[T]:
+        pass
+
+    @abstractmethod
+    async def update(self, entity: T, id: ID) -> Optional[T]:
+        pass
+
+    @abstractmethod
+    async def delete(self, id: ID) -> Optional[T]:
+        pass
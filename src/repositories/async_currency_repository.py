@@ -0,0 +1,101 @@
+from typing import List, Optional
+from ..models.currency import Currency
+from ..models.page import PageRequest
+from ..models.upsert_result import UpsertResult
+from .async_crud_repository import AsyncCrudRepository
+from .currency_repository import CurrencyRepository, CURRENCY_SORT_COLUMNS, CURRENCIES_UPSERT_CONFLICT
+from .keyset import build_page_query, asyncpg_placeholder
+from ..config.async_database import get_async_db_connection
+
+
+class AsyncCurrencyRepository(AsyncCrudRepository[Currency, int]):
+    def __init__(self):
+        self.data_source = get_async_db_connection
+
+    async def find_by_id(self, id: int) -> Optional[Currency]:
+        query = "SELECT * FROM currencies WHERE id=$1"
+        try:
+            async with self.data_source() as connection:
+                row = await connection.fetchrow(query, id)
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при поиске валюты по id: {e}")
+        return self._parse_from_result_set(row) if row else None
+
+    async def find_by_name(self, name: str) -> Optional[Currency]:
+        query = "SELECT * FROM currencies WHERE code=$1"
+        try:
+            async with self.data_source() as connection:
+                row = await connection.fetchrow(query, name)
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при поиске валюты по имени: {e}")
+        return self._parse_from_result_set(row) if row else None
+
+    async def find_all(self) -> List[Currency]:
+        query = "SELECT * FROM currencies"
+        try:
+            async with self.data_source() as connection:
+                rows = await connection.fetch(query)
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при получении всех валют: {e}")
+        return [self._parse_from_result_set(row) for row in rows]
+
+    async def find_page(self, page: PageRequest) -> List[Currency]:
+        query, params = build_page_query(
+            "SELECT * FROM currencies", page, CURRENCY_SORT_COLUMNS, "id", [], asyncpg_placeholder
+        )
+        try:
+            async with self.data_source() as connection:
+                rows = await connection.fetch(query, *params)
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при получении страницы валют: {e}")
+        return [self._parse_from_result_set(row) for row in rows]
+
+    async def create(self, currency: Currency) -> None:
+        query = "INSERT INTO currencies (code, fullname, sign) VALUES ($1, $2, $3)"
+        try:
+            async with self.data_source() as connection:
+                await connection.execute(query, currency.code, currency.fullname, currency.sign)
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при создании валюты: {e}")
+
+    async def upsert_many(self, currencies: List[Currency]) -> UpsertResult[Currency]:
+        rows = CurrencyRepository.deduplicate_by_code(currencies)
+        if not rows:
+            return UpsertResult()
+        query = (
+            "INSERT INTO currencies (code, fullname, sign) SELECT * FROM unnest($1::text[], $2::text[], $3::text[])"
+            + CURRENCIES_UPSERT_CONFLICT
+        )
+        try:
+            async with self.data_source() as connection:
+                changed = await connection.fetch(
+                    query,
+                    [c.code for c in rows.values()],
+                    [c.fullname for c in rows.values()],
+                    [c.sign for c in rows.values()]
+                )
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при пакетной записи валют: {e}")
+        return CurrencyRepository.parse_upsert_result(len(rows), changed)
+
+    async def update(self, currency: Currency, id: int) -> Optional[Currency]:
+        query = "UPDATE currencies SET code=$1, fullname=$2, sign=$3 WHERE id=$4 RETURNING *"
+        try:
+            async with self.data_source() as connection:
+                row = await connection.fetchrow(query, currency.code, currency.fullname, currency.sign, id)
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при обновлении валюты: {e}")
+        return self._parse_from_result_set(row) if row else None
+
+    async def delete(self, id: int) -> Optional[Currency]:
+        query = "DELETE FROM currencies WHERE id=$1 RETURNING *"
+        try:
+            async with self.data_source() as connection:
+                row = await connection.fetchrow(query, id)
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при удалении валюты: {e}")
+        return self._parse_from_result_set(row) if row else None
+
+    @staticmethod
+    def _parse_from_result_set(row) -> Currency:
+        return CurrencyRepository._parse_from_result_set(dict(row))
@@ -0,0 +1,184 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import AsyncIterator, List, Optional, Tuple
+from ..models.exchange_rates import ExchangeRates
+from ..models.ohlc import OhlcSeries
+from ..models.page import PageRequest
+from ..models.upsert_result import UpsertResult
+from .async_crud_repository import AsyncCrudRepository
+from .currency_repository import CurrencyRepository
+from .exchange_rates_repository import (
+    ExchangeRatesRepository,
+    EXCHANGE_RATE_SELECT_QUERY,
+    EXCHANGE_RATES_UPSERT_QUERY,
+    EXCHANGE_RATE_INSERT_QUERY,
+    EXCHANGE_RATE_UPDATE_QUERY,
+    EXCHANGE_RATE_DELETE_QUERY,
+    EXCHANGE_RATE_AS_OF_QUERY,
+    EXCHANGE_RATES_AS_OF_QUERY,
+    build_ohlc_query,
+    history_timestamp,
+    EXCHANGE_RATE_SORT_COLUMNS,
+    EXCHANGE_RATE_BASE_FILTER,
+    EXCHANGE_RATE_TARGET_FILTER
+)
+from .keyset import build_page_query, asyncpg_placeholder
+from ..config.async_database import get_async_db_connection
+
+
+class AsyncExchangeRatesRepository(AsyncCrudRepository[ExchangeRates, int]):
+
+    _select_query = EXCHANGE_RATE_SELECT_QUERY
+
+    def __init__(self):
+        self.data_source = get_async_db_connection
+
+    async def find_by_id(self, id: int) -> Optional[ExchangeRates]:
+        query = self._select_query + " WHERE e.id = $1"
+        try:
+            async with self.data_source() as connection:
+                row = await connection.fetchrow(query, id)
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при поиске курса обмена по id: {e}")
+        return self._parse_from_result_set(row) if row else None
+
+    async def find_by_name(self, name: str) -> Optional[ExchangeRates]:
+        base_code, target_code = ExchangeRatesRepository.split_pair_name(name)
+        return await self.find_by_codes(base_code, target_code)
+
+    async def find_by_codes(self, base_code: str, target_code: str) -> Optional[ExchangeRates]:
+        query = self._select_query + " WHERE baseCurrency.code = $1 AND targetCurrency.code = $2"
+        try:
+            async with self.data_source() as connection:
+                row = await connection.fetchrow(query, base_code, target_code)
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при поиске курса обмена по имени: {e}")
+        return self._parse_from_result_set(row) if row else None
+
+    async def find_by_name_as_of(self, name: str, as_of: datetime) -> Optional[ExchangeRates]:
+        base_code, target_code = ExchangeRatesRepository.split_pair_name(name)
+        return await self.find_by_codes_as_of(base_code, target_code, as_of)
+
+    async def find_by_codes_as_of(self, base_code: str, target_code: str, as_of: datetime) -> Optional[ExchangeRates]:
+        query = EXCHANGE_RATE_AS_OF_QUERY.format("$1", "$2", "$3")
+        try:
+            async with self.data_source() as connection:
+                row = await connection.fetchrow(query, base_code, target_code, history_timestamp(as_of))
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при поиске курса обмена на момент времени: {e}")
+        return self._parse_from_result_set(row) if row else None
+
+    async def find_all_as_of(self, as_of: datetime) -> List[ExchangeRates]:
+        try:
+            async with self.data_source() as connection:
+                rows = await connection.fetch(EXCHANGE_RATES_AS_OF_QUERY.format("$1"), history_timestamp(as_of))
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при получении курсов обмена на момент времени: {e}")
+        return [self._parse_from_result_set(row) for row in rows]
+
+    async def find_ohlc(self, interval: str, start: datetime, end: datetime,
+                        name: Optional[str] = None) -> List[OhlcSeries]:
+        base_code, target_code = ExchangeRatesRepository.split_pair_name(name) if name else (None, None)
+        query, params = build_ohlc_query(interval, start, end, base_code, target_code, asyncpg_placeholder)
+        try:
+            async with self.data_source() as connection:
+                rows = await connection.fetch(query, *params)
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при получении свечей курсов обмена: {e}")
+        return ExchangeRatesRepository.parse_ohlc_series(interval, rows)
+
+    async def find_all(self) -> List[ExchangeRates]:
+        try:
+            async with self.data_source() as connection:
+                rows = await connection.fetch(self._select_query)
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при получении всех курсов обмена: {e}")
+        return [self._parse_from_result_set(row) for row in rows]
+
+    async def find_page(self, page: PageRequest) -> List[ExchangeRates]:
+        query, params = build_page_query(
+            self._select_query, page, EXCHANGE_RATE_SORT_COLUMNS, "e.id",
+            [(EXCHANGE_RATE_BASE_FILTER, page.base_code), (EXCHANGE_RATE_TARGET_FILTER, page.target_code)],
+            asyncpg_placeholder
+        )
+        try:
+            async with self.data_source() as connection:
+                rows = await connection.fetch(query, *params)
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при получении страницы курсов обмена: {e}")
+        return [self._parse_from_result_set(row) for row in rows]
+
+    async def iter_chunks(self, chunk_size: int = 1000) -> AsyncIterator[List[ExchangeRates]]:
+        # Серверный курсор внутри транзакции get_async_db_connection: строки читаются пачками
+        try:
+            async with self.data_source() as connection:
+                cursor = await connection.cursor(self._select_query + " ORDER BY e.id")
+                while True:
+                    rows = await cursor.fetch(chunk_size)
+                    if not rows:
+                        break
+                    yield [self._parse_from_result_set(row) for row in rows]
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при выгрузке курсов обмена: {e}")
+
+    async def create(self, exchange_rates: ExchangeRates) -> Optional[ExchangeRates]:
+        query = EXCHANGE_RATE_INSERT_QUERY.format("$1", "$2", "$3")
+        try:
+            async with self.data_source() as connection:
+                row = await connection.fetchrow(
+                    query,
+                    exchange_rates.base_currency.id,
+                    exchange_rates.target_currency.id,
+                    exchange_rates.rate
+                )
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при создании курса обмена: {e}")
+        return self._parse_from_result_set(row) if row else None
+
+    async def upsert_by_codes(self, rates: List[Tuple[str, str, Decimal]]) -> UpsertResult[ExchangeRates]:
+        sheet = ExchangeRatesRepository.deduplicate_sheet(rates)
+        codes = sorted({code for pair in sheet for code in pair})
+        try:
+            async with self.data_source() as connection:
+                rows = await connection.fetch("SELECT * FROM currencies WHERE code = ANY($1::text[])", codes)
+                currencies = [CurrencyRepository._parse_from_result_set(dict(row)) for row in rows]
+                unknown_codes = sorted(set(codes) - {currency.code for currency in currencies})
+                if unknown_codes:
+                    return UpsertResult(unknown_codes=unknown_codes)
+                ids = {currency.code: currency.id for currency in currencies}
+                rows = await connection.fetch(
+                    EXCHANGE_RATES_UPSERT_QUERY.format("$1", "$2", "$3"),
+                    [ids[base_code] for base_code, _ in sheet],
+                    [ids[target_code] for _, target_code in sheet],
+                    list(sheet.values())
+                )
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при пакетной записи курсов обмена: {e}")
+        return ExchangeRatesRepository.parse_upsert_result(len(sheet), currencies, rows)
+
+    async def update(self, exchange_rate: ExchangeRates, id: int) -> Optional[ExchangeRates]:
+        query = EXCHANGE_RATE_UPDATE_QUERY.format("$1", "$2", "$3", "$4")
+        try:
+            async with self.data_source() as connection:
+                row = await connection.fetchrow(
+                    query,
+                    exchange_rate.rate,
+                    exchange_rate.base_currency.id,
+                    exchange_rate.target_currency.id,
+                    id
+                )
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при обновлении курса обмена: {e}")
+        return self._parse_from_result_set(row) if row else None
+
+    async def delete(self, id: int) -> Optional[ExchangeRates]:
+        try:
+            async with self.data_source() as connection:
+                row = await connection.fetchrow(EXCHANGE_RATE_DELETE_QUERY.format("$1"), id)
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при удалении курса обмена: {e}")
+        return self._parse_from_result_set(row) if row else None
+
+    @staticmethod
+    def _parse_from_result_set(row) -> ExchangeRates:
+        return ExchangeRatesRepository._parse_from_result_set(dict(row))
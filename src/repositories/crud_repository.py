@@ -19,14 +19,14 @@ class CrudRepository(ABC, Generic[T, ID]):
         pass
 
     @abstractmethod
-    def create(self, entity: T) -> None:
+    def create(self, entity: T) -> Optional[T]:
         pass
 
     @abstractmethod
-    def update(self, entity: T, id: ID) -> None:
+    def update(self, entity: T, id: ID) -> Optional[T]:
         pass
 
     @abstractmethod
-    def delete(self, id: ID) -> None:
+    def delete(self, id: ID) -> Optional[T]:
         pass
 
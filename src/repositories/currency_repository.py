@@ -1,11 +1,29 @@
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from typing import List, Optional
+from psycopg2.extras import RealDictCursor, execute_values
+from typing import Dict, List, Optional
 from ..models.currency import Currency
+from ..models.page import PageRequest
+from ..models.upsert_result import UpsertResult
 from .crud_repository import CrudRepository
+from .keyset import SortColumn, build_page_query, psycopg2_placeholder
 from ..config.database import get_db_connection
 
 
+# Поля, по которым можно сортировать страницы валют; code уникален и сам задаёт порядок
+CURRENCY_SORT_COLUMNS = {
+    "id": SortColumn("id", int),
+    "code": SortColumn("code", str, unique=True)
+}
+
+# Конфликт по code обновляет название и знак; строки без изменений не трогаются. xmax = 0 у только что
+# вставленной строки отличает создание от обновления
+CURRENCIES_UPSERT_CONFLICT = """
+    ON CONFLICT (code) DO UPDATE SET fullname = EXCLUDED.fullname, sign = EXCLUDED.sign
+        WHERE (currencies.fullname, currencies.sign) IS DISTINCT FROM (EXCLUDED.fullname, EXCLUDED.sign)
+    RETURNING id, code, fullname, sign, (xmax = 0) AS inserted
+"""
+
+
 class CurrencyRepository(CrudRepository[Currency, int]):
     def __init__(self):
         self.data_source = get_db_connection
@@ -53,6 +71,18 @@ class CurrencyRepository(CrudRepository[Currency, int]):
             raise RuntimeError(f"Ошибка при получении всех валют: {e}")
         return currency_list
 
+    def find_page(self, page: PageRequest) -> List[Currency]:
+        query, params = build_page_query(
+            "SELECT * FROM currencies", page, CURRENCY_SORT_COLUMNS, "id", [], psycopg2_placeholder
+        )
+        try:
+            with self.data_source() as connection:
+                with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+                    cursor.execute(query, params)
+                    return [self._parse_from_result_set(row) for row in cursor.fetchall()]
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при получении страницы валют: {e}")
+
     def create(self, currency: Currency) -> None:
         query = "INSERT INTO currencies (code, fullname, sign) VALUES (%s, %s, %s)"
         connection = None
@@ -66,31 +96,73 @@ class CurrencyRepository(CrudRepository[Currency, int]):
                 connection.rollback()
             raise RuntimeError(f"Ошибка при создании валюты: {e}")
 
-    def update(self, currency: Currency, id: int) -> None:
-        query = "UPDATE currencies SET code=%s, fullname=%s, sign=%s WHERE id=%s"
+    def upsert_many(self, currencies: List[Currency]) -> UpsertResult[Currency]:
+        rows = self.deduplicate_by_code(currencies)
+        if not rows:
+            return UpsertResult()
+        query = "INSERT INTO currencies (code, fullname, sign) VALUES %s" + CURRENCIES_UPSERT_CONFLICT
         connection = None
         try:
             with self.data_source() as connection:
-                with connection.cursor() as cursor:
+                with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+                    # page_size на весь список: один INSERT, а не по запросу на каждые 100 строк
+                    changed = execute_values(
+                        cursor, query, [(c.code, c.fullname, c.sign) for c in rows.values()],
+                        page_size=len(rows), fetch=True
+                    )
+                    connection.commit()
+        except Exception as e:
+            if connection:
+                connection.rollback()
+            raise RuntimeError(f"Ошибка при пакетной записи валют: {e}")
+        return self.parse_upsert_result(len(rows), changed)
+
+    def update(self, currency: Currency, id: int) -> Optional[Currency]:
+        # RETURNING отдаёт новую строку тем же запросом; None - валюты с таким id нет
+        query = "UPDATE currencies SET code=%s, fullname=%s, sign=%s WHERE id=%s RETURNING *"
+        connection = None
+        try:
+            with self.data_source() as connection:
+                with connection.cursor(cursor_factory=RealDictCursor) as cursor:
                     cursor.execute(query, (currency.code, currency.fullname, currency.sign, id))
+                    row = cursor.fetchone()
                     connection.commit()
         except Exception as e:
             if connection: 
                 connection.rollback()
             raise RuntimeError(f"Ошибка при обновлении валюты: {e}")
+        return self._parse_from_result_set(row) if row else None
 
-    def delete(self, id: int) -> None:
-        query = "DELETE FROM currencies WHERE id=%s"
+    def delete(self, id: int) -> Optional[Currency]:
+        query = "DELETE FROM currencies WHERE id=%s RETURNING *"
         connection = None
         try:
             with self.data_source() as connection:
-                with connection.cursor() as cursor:
+                with connection.cursor(cursor_factory=RealDictCursor) as cursor:
                     cursor.execute(query, (id,))
+                    row = cursor.fetchone()
                     connection.commit()
         except Exception as e:
             if connection:
                 connection.rollback()
             raise RuntimeError(f"Ошибка при удалении валюты: {e}")
+        return self._parse_from_result_set(row) if row else None
+
+    @staticmethod
+    def deduplicate_by_code(currencies: List[Currency]) -> Dict[str, Currency]:
+        # Повтор кода в списке оставляет последнюю запись: ON CONFLICT не может изменить строку дважды
+        return {currency.code: currency for currency in currencies}
+
+    @staticmethod
+    def parse_upsert_result(size: int, rows) -> UpsertResult[Currency]:
+        result = UpsertResult(unchanged=size - len(rows))
+        for row in rows:
+            result.changed.append(CurrencyRepository._parse_from_result_set(dict(row)))
+            if row['inserted']:
+                result.created += 1
+            else:
+                result.updated += 1
+        return result
 
     @staticmethod
     def _parse_from_result_set(row) -> Currency:
@@ -1,38 +1,222 @@
-from typing import List, Optional
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from datetime import datetime, timezone
 from decimal import Decimal
 from psycopg2.extras import RealDictCursor
 from ..models.exchange_rates import ExchangeRates
 from ..models.currency import Currency
+from ..models.ohlc import Candle, OhlcSeries
+from ..models.page import PageRequest
+from ..models.upsert_result import UpsertResult
 from .crud_repository import CrudRepository
+from .currency_repository import CurrencyRepository
+from .keyset import SortColumn, build_page_query, psycopg2_placeholder
 from ..config.database import get_db_connection
 
+# Коды валют по ISO 4217 (currencies.code VARCHAR(3)); имя пары - это два кода подряд, например USDEUR
+CURRENCY_CODE_LENGTH = 3
+
+# Поля сортировки страниц курсов; каждой соответствует индекс (поле, id)
+EXCHANGE_RATE_SORT_COLUMNS = {
+    "id": SortColumn("e.id", int),
+    "rate": SortColumn("e.rate", Decimal)
+}
+
+# Фильтр по коду валюты через подзапрос: id валюты известен планировщику до сканирования
+# exchangerates, и страница читается по индексу (basecurrencyid, id) или (targetcurrencyid, id)
+EXCHANGE_RATE_BASE_FILTER = "e.basecurrencyid = (SELECT id FROM currencies WHERE code = {})"
+EXCHANGE_RATE_TARGET_FILTER = "e.targetcurrencyid = (SELECT id FROM currencies WHERE code = {})"
+
+# Лист курсов пишется одним INSERT из массивов; строки с прежним курсом не трогаются (нет мёртвых версий
+# и лишней инвалидации). xmax = 0 у только что вставленной строки отличает создание от обновления
+EXCHANGE_RATES_UPSERT_QUERY = """
+    INSERT INTO exchangerates (basecurrencyid, targetcurrencyid, rate)
+    SELECT * FROM unnest({}::int[], {}::int[], {}::numeric[])
+    ON CONFLICT (basecurrencyid, targetcurrencyid)
+        DO UPDATE SET rate = EXCLUDED.rate WHERE exchangerates.rate IS DISTINCT FROM EXCLUDED.rate
+    RETURNING id, basecurrencyid, targetcurrencyid, rate, (xmax = 0) AS inserted
+"""
+
+
+def exchange_rate_columns(id_column: str = "e.id", rate_column: str = "e.rate") -> str:
+    # Столбцы курса с валютами в порядке, который читает _parse_from_result_set; валюты - под
+    # псевдонимами baseCurrency и targetCurrency
+    return f"""
+        {id_column} AS id,
+        baseCurrency.id AS baseCurrencyId,
+        baseCurrency.fullname AS baseCurrencyName,
+        baseCurrency.code AS baseCurrencyCode,
+        baseCurrency.sign AS baseCurrencySign,
+        targetCurrency.id AS targetCurrencyId,
+        targetCurrency.fullname AS targetCurrencyName,
+        targetCurrency.code AS targetCurrencyCode,
+        targetCurrency.sign AS targetCurrencySign,
+        {rate_column} AS rate"""
+
+
+def exchange_rate_select(source: str) -> str:
+    return f"""
+    SELECT{exchange_rate_columns()}
+    FROM
+        {source} e
+            JOIN
+        currencies baseCurrency ON e.basecurrencyid = baseCurrency.id
+            JOIN
+        currencies targetCurrency ON e.targetcurrencyid = targetCurrency.id
+    """
+
+
+EXCHANGE_RATE_SELECT_QUERY = exchange_rate_select("exchangerates")
+
+# Изменённая строка из CTE changed (INSERT/UPDATE/DELETE ... RETURNING *) вместе с валютами, в том же виде,
+# что и выборки курсов: запись и чтение результата укладываются в один запрос
+CHANGED_EXCHANGE_RATE_SELECT = exchange_rate_select("changed")
+
+EXCHANGE_RATE_INSERT_QUERY = """
+    WITH changed AS (
+        INSERT INTO exchangerates (basecurrencyid, targetcurrencyid, rate)
+        VALUES ({}, {}, {})
+        RETURNING *
+    )
+""" + CHANGED_EXCHANGE_RATE_SELECT
+
+# Не переданный id валюты оставляет пару прежней
+EXCHANGE_RATE_UPDATE_QUERY = """
+    WITH changed AS (
+        UPDATE exchangerates
+        SET rate = {}, basecurrencyid = COALESCE({}, basecurrencyid), targetcurrencyid = COALESCE({}, targetcurrencyid)
+        WHERE id = {}
+        RETURNING *
+    )
+""" + CHANGED_EXCHANGE_RATE_SELECT
+
+EXCHANGE_RATE_DELETE_QUERY = """
+    WITH changed AS (DELETE FROM exchangerates WHERE id = {} RETURNING *)
+""" + CHANGED_EXCHANGE_RATE_SELECT
+
+# Курс пары на момент времени из exchangerates_history: последняя запись не позже момента, если это
+# не отметка об удалении. Секции новее момента отсекаются планировщиком, в остальных - спуск по индексу
+EXCHANGE_RATE_AS_OF_QUERY = """
+    SELECT""" + exchange_rate_columns("h.exchangerateid", "h.rate") + """
+    FROM
+        currencies baseCurrency
+            JOIN
+        currencies targetCurrency ON baseCurrency.code = {} AND targetCurrency.code = {}
+            CROSS JOIN LATERAL (
+                SELECT exchangerateid, rate
+                FROM exchangerates_history
+                WHERE basecurrencyid = baseCurrency.id
+                  AND targetcurrencyid = targetCurrency.id
+                  AND valid_from <= {}
+                ORDER BY valid_from DESC
+                LIMIT 1
+            ) h
+    WHERE h.rate IS NOT NULL
+"""
+
+# Все курсы на момент времени: пары перебираются рекурсивным skip scan по индексу
+# (basecurrencyid, targetcurrencyid, valid_from), для каждой берётся последняя запись не позже момента
+EXCHANGE_RATES_AS_OF_QUERY = """
+    WITH RECURSIVE pairs AS (
+        (
+            SELECT basecurrencyid, targetcurrencyid
+            FROM exchangerates_history
+            ORDER BY basecurrencyid, targetcurrencyid
+            LIMIT 1
+        )
+        UNION ALL
+        SELECT next_pair.basecurrencyid, next_pair.targetcurrencyid
+        FROM pairs p
+            CROSS JOIN LATERAL (
+                SELECT basecurrencyid, targetcurrencyid
+                FROM exchangerates_history
+                WHERE (basecurrencyid, targetcurrencyid) > (p.basecurrencyid, p.targetcurrencyid)
+                ORDER BY basecurrencyid, targetcurrencyid
+                LIMIT 1
+            ) next_pair
+    )
+    SELECT""" + exchange_rate_columns("h.exchangerateid", "h.rate") + """
+    FROM
+        pairs p
+            CROSS JOIN LATERAL (
+                SELECT exchangerateid, rate
+                FROM exchangerates_history
+                WHERE basecurrencyid = p.basecurrencyid
+                  AND targetcurrencyid = p.targetcurrencyid
+                  AND valid_from <= {}
+                ORDER BY valid_from DESC
+                LIMIT 1
+            ) h
+            JOIN
+        currencies baseCurrency ON p.basecurrencyid = baseCurrency.id
+            JOIN
+        currencies targetCurrency ON p.targetcurrencyid = targetCurrency.id
+    WHERE h.rate IS NOT NULL
+"""
+
+# Свечи читаются из exchangerates_ohlc, которую поддерживает триггер на истории курсов:
+# запрос - диапазон по первичному ключу (resolution, пара, bucket), сырая история не сканируется
+OHLC_SELECT_QUERY = """
+    SELECT
+        o.bucket AS bucket,
+        o.open AS open,
+        o.high AS high,
+        o.low AS low,
+        o.close AS close,
+        o.samples AS samples,
+        baseCurrency.id AS baseCurrencyId,
+        baseCurrency.fullname AS baseCurrencyName,
+        baseCurrency.code AS baseCurrencyCode,
+        baseCurrency.sign AS baseCurrencySign,
+        targetCurrency.id AS targetCurrencyId,
+        targetCurrency.fullname AS targetCurrencyName,
+        targetCurrency.code AS targetCurrencyCode,
+        targetCurrency.sign AS targetCurrencySign
+    FROM
+        exchangerates_ohlc o
+            JOIN
+        currencies baseCurrency ON o.basecurrencyid = baseCurrency.id
+            JOIN
+        currencies targetCurrency ON o.targetcurrencyid = targetCurrency.id
+"""
+OHLC_BASE_FILTER = "o.basecurrencyid = (SELECT id FROM currencies WHERE code = {})"
+OHLC_TARGET_FILTER = "o.targetcurrencyid = (SELECT id FROM currencies WHERE code = {})"
+
+
+def build_ohlc_query(interval: str, start: datetime, end: datetime, base_code: Optional[str],
+                     target_code: Optional[str], placeholder: Callable[[int], str]) -> Tuple[str, list]:
+    params = []
+
+    def param(value) -> str:
+        params.append(value)
+        return placeholder(len(params))
+
+    conditions = [
+        f"o.resolution = {param(interval)}",
+        f"o.bucket >= {param(history_timestamp(start))}",
+        f"o.bucket < {param(history_timestamp(end))}"
+    ]
+    if base_code is not None:
+        conditions.append(OHLC_BASE_FILTER.format(param(base_code)))
+    if target_code is not None:
+        conditions.append(OHLC_TARGET_FILTER.format(param(target_code)))
+    query = OHLC_SELECT_QUERY + " WHERE " + " AND ".join(conditions) + " ORDER BY o.basecurrencyid, o.targetcurrencyid, o.bucket"
+    return query, params
+
+
+def history_timestamp(as_of: datetime) -> datetime:
+    # Момент без часового пояса считается UTC, чтобы ответ не зависел от TimeZone сессии и драйвера
+    return as_of if as_of.tzinfo is not None else as_of.replace(tzinfo=timezone.utc)
+
 
 class ExchangeRatesRepository(CrudRepository[ExchangeRates, int]):
-    
+
+    _select_query = EXCHANGE_RATE_SELECT_QUERY
+
     def __init__(self):
         self.data_source = get_db_connection
 
     def find_by_id(self, id: int) -> Optional[ExchangeRates]:
-        query = """
-            SELECT
-                e.id AS id,
-                baseCurrency.id AS baseCurrencyId,
-                baseCurrency.fullname AS baseCurrencyName,
-                baseCurrency.code AS baseCurrencyCode,
-                baseCurrency.sign AS baseCurrencySign,
-                targetCurrency.id AS targetCurrencyId,
-                targetCurrency.fullname AS targetCurrencyName,
-                targetCurrency.code AS targetCurrencyCode,
-                targetCurrency.sign AS targetCurrencySign,
-                e.rate AS rate
-            FROM
-                exchangerates e
-                    JOIN
-                currencies baseCurrency ON e.basecurrencyid = baseCurrency.id
-                    JOIN
-                currencies targetCurrency ON e.targetcurrencyid = targetCurrency.id
-            WHERE e.id = %s
-        """
+        query = self._select_query + " WHERE e.id = %s"
         exchange_rates = None
         try:
             with self.data_source() as connection:
@@ -46,31 +230,16 @@ class ExchangeRatesRepository(CrudRepository[ExchangeRates, int]):
         return exchange_rates
 
     def find_by_name(self, name: str) -> Optional[ExchangeRates]:
-        query = """
-            SELECT
-                e.id AS id,
-                baseCurrency.id AS baseCurrencyId,
-                baseCurrency.fullname AS baseCurrencyName,
-                baseCurrency.code AS baseCurrencyCode,
-                baseCurrency.sign AS baseCurrencySign,
-                targetCurrency.id AS targetCurrencyId,
-                targetCurrency.fullname AS targetCurrencyName,
-                targetCurrency.code AS targetCurrencyCode,
-                targetCurrency.sign AS targetCurrencySign,
-                e.rate AS rate
-            FROM
-                exchangerates e
-                    JOIN
-                currencies baseCurrency ON e.basecurrencyid = baseCurrency.id
-                    JOIN
-                currencies targetCurrency ON e.targetcurrencyid = targetCurrency.id
-            WHERE concat(baseCurrency.code, targetCurrency.code) = %s
-        """
+        base_code, target_code = self.split_pair_name(name)
+        return self.find_by_codes(base_code, target_code)
+
+    def find_by_codes(self, base_code: str, target_code: str) -> Optional[ExchangeRates]:
+        query = self._select_query + " WHERE baseCurrency.code = %s AND targetCurrency.code = %s"
         exchange_rates = None
         try:
             with self.data_source() as connection:
                 with connection.cursor(cursor_factory=RealDictCursor) as cursor:
-                    cursor.execute(query, (name,))
+                    cursor.execute(query, (base_code, target_code))
                     row = cursor.fetchone()
                     if row:
                         exchange_rates = self._parse_from_result_set(row)
@@ -78,46 +247,93 @@ class ExchangeRatesRepository(CrudRepository[ExchangeRates, int]):
             raise RuntimeError(f"Ошибка при поиске курса обмена по имени: {e}")
         return exchange_rates
 
+    def find_by_name_as_of(self, name: str, as_of: datetime) -> Optional[ExchangeRates]:
+        base_code, target_code = self.split_pair_name(name)
+        return self.find_by_codes_as_of(base_code, target_code, as_of)
+
+    def find_by_codes_as_of(self, base_code: str, target_code: str, as_of: datetime) -> Optional[ExchangeRates]:
+        query = EXCHANGE_RATE_AS_OF_QUERY.format("%s", "%s", "%s")
+        try:
+            with self.data_source() as connection:
+                with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+                    cursor.execute(query, (base_code, target_code, history_timestamp(as_of)))
+                    row = cursor.fetchone()
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при поиске курса обмена на момент времени: {e}")
+        return self._parse_from_result_set(row) if row else None
+
+    def find_all_as_of(self, as_of: datetime) -> List[ExchangeRates]:
+        try:
+            with self.data_source() as connection:
+                with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+                    cursor.execute(EXCHANGE_RATES_AS_OF_QUERY.format("%s"), (history_timestamp(as_of),))
+                    return [self._parse_from_result_set(row) for row in cursor.fetchall()]
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при получении курсов обмена на момент времени: {e}")
+
+    def find_ohlc(self, interval: str, start: datetime, end: datetime,
+                  name: Optional[str] = None) -> List[OhlcSeries]:
+        base_code, target_code = self.split_pair_name(name) if name else (None, None)
+        query, params = build_ohlc_query(interval, start, end, base_code, target_code, psycopg2_placeholder)
+        try:
+            with self.data_source() as connection:
+                with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+                    cursor.execute(query, params)
+                    return self.parse_ohlc_series(interval, cursor.fetchall())
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при получении свечей курсов обмена: {e}")
+
     def find_all(self) -> List[ExchangeRates]:
         exchange_rates_list = []
-        query = """
-            SELECT
-                e.id AS id,
-                baseCurrency.id AS baseCurrencyId,
-                baseCurrency.fullname AS baseCurrencyName,
-                baseCurrency.code AS baseCurrencyCode,
-                baseCurrency.sign AS baseCurrencySign,
-                targetCurrency.id AS targetCurrencyId,
-                targetCurrency.fullname AS targetCurrencyName,
-                targetCurrency.code AS targetCurrencyCode,
-                targetCurrency.sign AS targetCurrencySign,
-                e.rate AS rate
-            FROM
-                exchangerates e
-                    JOIN
-                currencies baseCurrency ON e.basecurrencyid = baseCurrency.id
-                    JOIN
-                currencies targetCurrency ON e.targetcurrencyid = targetCurrency.id
-        """
         try:
             with self.data_source() as connection:
                 with connection.cursor(cursor_factory=RealDictCursor) as cursor:
-                    cursor.execute(query)
+                    cursor.execute(self._select_query)
                     rows = cursor.fetchall()
                     for row in rows:
                         exchange_rates = self._parse_from_result_set(row)
                         exchange_rates_list.append(exchange_rates)
-                        print(exchange_rates)
         except Exception as e:
             raise RuntimeError(f"Ошибка при получении всех курсов обмена: {e}")
         return exchange_rates_list
 
-    def create(self, exchange_rates: ExchangeRates) -> None:
-        query = "INSERT INTO exchangerates (basecurrencyid, targetcurrencyid, rate) VALUES (%s, %s, %s)"
+    def find_page(self, page: PageRequest) -> List[ExchangeRates]:
+        query, params = build_page_query(
+            self._select_query, page, EXCHANGE_RATE_SORT_COLUMNS, "e.id",
+            [(EXCHANGE_RATE_BASE_FILTER, page.base_code), (EXCHANGE_RATE_TARGET_FILTER, page.target_code)],
+            psycopg2_placeholder
+        )
+        try:
+            with self.data_source() as connection:
+                with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+                    cursor.execute(query, params)
+                    return [self._parse_from_result_set(row) for row in cursor.fetchall()]
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при получении страницы курсов обмена: {e}")
+
+    def iter_chunks(self, chunk_size: int = 1000) -> Iterator[List[ExchangeRates]]:
+        # Именованный (серверный) курсор: PostgreSQL отдаёт строки пачками по chunk_size, и в памяти
+        # держится только текущая пачка. Соединение занято, пока потребитель не дочитает или не закроет генератор
+        try:
+            with self.data_source() as connection:
+                with connection.cursor(name="exchange_rates_export", cursor_factory=RealDictCursor) as cursor:
+                    cursor.itersize = chunk_size
+                    cursor.execute(self._select_query + " ORDER BY e.id")
+                    while True:
+                        rows = cursor.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        yield [self._parse_from_result_set(row) for row in rows]
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при выгрузке курсов обмена: {e}")
+
+    def create(self, exchange_rates: ExchangeRates) -> Optional[ExchangeRates]:
+        # Вставка и чтение созданного курса с валютами - один запрос, как у update и delete
+        query = EXCHANGE_RATE_INSERT_QUERY.format("%s", "%s", "%s")
         connection = None
         try:
             with self.data_source() as connection:
-                with connection.cursor() as cursor:
+                with connection.cursor(cursor_factory=RealDictCursor) as cursor:
                     cursor.execute(
                         query,
                         (
@@ -126,47 +342,128 @@ class ExchangeRatesRepository(CrudRepository[ExchangeRates, int]):
                             exchange_rates.rate
                         )
                     )
+                    row = cursor.fetchone()
                     connection.commit()
         except Exception as e:
             if connection:
                 connection.rollback()
             raise RuntimeError(f"Ошибка при создании курса обмена: {e}")
+        return self._parse_from_result_set(row) if row else None
+
+    def upsert_by_codes(self, rates: List[Tuple[str, str, Decimal]]) -> UpsertResult[ExchangeRates]:
+        sheet = self.deduplicate_sheet(rates)
+        codes = sorted({code for pair in sheet for code in pair})
+        connection = None
+        try:
+            with self.data_source() as connection:
+                with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+                    # Все коды листа переводятся в id одним запросом
+                    cursor.execute("SELECT * FROM currencies WHERE code = ANY(%s)", (codes,))
+                    currencies = [CurrencyRepository._parse_from_result_set(row) for row in cursor.fetchall()]
+                    unknown_codes = sorted(set(codes) - {currency.code for currency in currencies})
+                    if unknown_codes:
+                        return UpsertResult(unknown_codes=unknown_codes)
+                    ids = {currency.code: currency.id for currency in currencies}
+                    cursor.execute(
+                        EXCHANGE_RATES_UPSERT_QUERY.format("%s", "%s", "%s"),
+                        (
+                            [ids[base_code] for base_code, _ in sheet],
+                            [ids[target_code] for _, target_code in sheet],
+                            list(sheet.values())
+                        )
+                    )
+                    rows = cursor.fetchall()
+                    connection.commit()
+        except Exception as e:
+            if connection:
+                connection.rollback()
+            raise RuntimeError(f"Ошибка при пакетной записи курсов обмена: {e}")
+        return self.parse_upsert_result(len(sheet), currencies, rows)
 
-    def update(self, exchange_rate: ExchangeRates, id: int) -> None:
-        query = """
-            UPDATE exchangerates 
-            SET rate = %s, basecurrencyid = %s, targetcurrencyid = %s
-            WHERE id = %s
-        """
+    def update(self, exchange_rate: ExchangeRates, id: int) -> Optional[ExchangeRates]:
+        # Один запрос вместо чтения до и после записи; None - курса с таким id нет
+        query = EXCHANGE_RATE_UPDATE_QUERY.format("%s", "%s", "%s", "%s")
         connection = None
         try:
             with self.data_source() as connection:
-                with connection.cursor() as cursor:
+                with connection.cursor(cursor_factory=RealDictCursor) as cursor:
                     cursor.execute(query, (
                         exchange_rate.rate,
                         exchange_rate.base_currency.id,
                         exchange_rate.target_currency.id,
                         id
                     ))
-                    
+                    row = cursor.fetchone()
                     connection.commit()
         except Exception as e:
             if connection:
                 connection.rollback()
             raise RuntimeError(f"Ошибка при обновлении курса обмена: {e}")
+        return self._parse_from_result_set(row) if row else None
 
-    def delete(self, id: int) -> None:
-        query = "DELETE FROM exchangerates WHERE id=%s"
+    def delete(self, id: int) -> Optional[ExchangeRates]:
+        query = EXCHANGE_RATE_DELETE_QUERY.format("%s")
         connection = None
         try:
             with self.data_source() as connection:
-                with connection.cursor() as cursor:
+                with connection.cursor(cursor_factory=RealDictCursor) as cursor:
                     cursor.execute(query, (id,))
+                    row = cursor.fetchone()
                     connection.commit()
         except Exception as e:
             if connection:
                 connection.rollback()
             raise RuntimeError(f"Ошибка при удалении курса обмена: {e}")
+        return self._parse_from_result_set(row) if row else None
+
+    @staticmethod
+    def split_pair_name(name: str) -> Tuple[str, str]:
+        return name[:CURRENCY_CODE_LENGTH], name[CURRENCY_CODE_LENGTH:]
+
+    @staticmethod
+    def deduplicate_sheet(rates: List[Tuple[str, str, Decimal]]) -> Dict[Tuple[str, str], Decimal]:
+        # Повтор пары в листе оставляет последний курс: ON CONFLICT не может изменить строку дважды
+        return {(base_code, target_code): rate for base_code, target_code, rate in rates}
+
+    @staticmethod
+    def parse_upsert_result(sheet_size: int, currencies: List[Currency], rows) -> UpsertResult[ExchangeRates]:
+        currencies_by_id = {currency.id: currency for currency in currencies}
+        result = UpsertResult()
+        for row in rows:
+            result.changed.append(ExchangeRates(
+                id=row['id'],
+                rate=Decimal(str(row['rate'])),
+                base_currency=currencies_by_id[row['basecurrencyid']],
+                target_currency=currencies_by_id[row['targetcurrencyid']]
+            ))
+            if row['inserted']:
+                result.created += 1
+            else:
+                result.updated += 1
+        result.unchanged = sheet_size - len(rows)
+        return result
+
+    @staticmethod
+    def parse_ohlc_series(interval: str, rows) -> List[OhlcSeries]:
+        # Строки отсортированы по паре: новая серия начинается, когда пара сменилась
+        series_list = []
+        for row in rows:
+            row = dict(row)
+            if not series_list or (series_list[-1].base_currency.id, series_list[-1].target_currency.id) != (
+                    row['basecurrencyid'], row['targetcurrencyid']):
+                pair = ExchangeRatesRepository._parse_from_result_set(row)
+                series_list.append(OhlcSeries(
+                    interval=interval, base_currency=pair.base_currency, target_currency=pair.target_currency
+                ))
+            series_list[-1].candles.append(Candle(
+                time=row['bucket'],
+                open=row['open'],
+                high=row['high'],
+                low=row['low'],
+                close=row['close'],
+                samples=row['samples']
+            ))
+        return series_list
 
     @staticmethod
     def _parse_from_result_set(row) -> ExchangeRates:
@@ -0,0 +1,57 @@
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from ..models.page import PageRequest
+
+
+class SortColumn(NamedTuple):
+    sql: str
+    cast: Callable[[object], object]
+    unique: bool = False
+
+
+def build_page_query(select: str, page: PageRequest, sort_columns: Dict[str, SortColumn], id_column: str,
+                     filters: List[Tuple[str, Optional[object]]],
+                     placeholder: Callable[[int], str]) -> Tuple[str, list]:
+    """Дописывает к select фильтры, условие keyset-пагинации, ORDER BY и LIMIT.
+
+    Вместо OFFSET страница начинается сразу за последней строкой предыдущей: (sort, id) > (after)
+    идёт по индексу (sort, id), и стоимость страницы не растёт с её номером. filters - пары
+    (SQL-выражение с {}, значение); None пропускается. placeholder(n) - n-й параметр драйвера.
+    """
+    column = sort_columns[page.sort]
+    conditions = []
+    params = []
+
+    def param(value) -> str:
+        params.append(value)
+        return placeholder(len(params))
+
+    for sql, value in filters:
+        if value is not None:
+            conditions.append(sql.format(param(value)))
+    direction, operator = ("DESC", "<") if page.descending else ("ASC", ">")
+    if page.after is not None:
+        value, last_id = page.after
+        if column.sql == id_column:
+            conditions.append(f"{id_column} {operator} {param(int(last_id))}")
+        elif column.unique:
+            conditions.append(f"{column.sql} {operator} {param(column.cast(value))}")
+        else:
+            conditions.append(f"({column.sql}, {id_column}) {operator} ({param(column.cast(value))}, {param(int(last_id))})")
+
+    query = select
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    if column.sql == id_column or column.unique:
+        query += f" ORDER BY {column.sql} {direction}"
+    else:
+        query += f" ORDER BY {column.sql} {direction}, {id_column} {direction}"
+    query += f" LIMIT {param(page.limit + 1)}"
+    return query, params
+
+
+def psycopg2_placeholder(index: int) -> str:
+    return "%s"
+
+
+def asyncpg_placeholder(index: int) -> str:
+    return f"${index}"
@@ -1,5 +1,15 @@
 from .currency_service import CurrencyService, CurrencyServiceImpl
 from .exchange_rates_service import ExchangeRatesService, ExchangeRatesServiceImpl
+from .async_currency_service import AsyncCurrencyService, AsyncCurrencyServiceImpl
+from .async_exchange_rates_service import AsyncExchangeRatesService, AsyncExchangeRatesServiceImpl
 
-__all__ = ['CurrencyService', 'CurrencyServiceImpl', 'ExchangeRatesService', 'ExchangeRatesServiceImpl']
-
+__all__ = [
+    'CurrencyService',
+    'CurrencyServiceImpl',
+    'ExchangeRatesService',
+    'ExchangeRatesServiceImpl',
+    'AsyncCurrencyService',
+    'AsyncCurrencyServiceImpl',
+    'AsyncExchangeRatesService',
+    'AsyncExchangeRatesServiceImpl'
+]
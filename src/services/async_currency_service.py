@@ -0,0 +1,214 @@
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, List, Optional, Tuple
+from ..models.currency import Currency
+from ..models.page import Page, PageRequest
+from ..models.upsert_result import UpsertResult
+from ..cache.local_cache import get_local_cache
+from ..cache.invalidation_bus import get_invalidation_bus
+from ..cache.batch import AsyncCacheBatch
+from ..cache.single_flight import get_async_single_flight
+from ..cache.refresh import get_async_background_refresher
+from ..cache.codec import get_cache_codec
+from ..cache.rendered import RenderedResponse
+from ..cache.policy import get_cache_policies
+from ..config.redis import get_async_redis_client
+from .currency_service import CurrencyCacheSupport
+
+
+class AsyncCurrencyService(ABC):
+    @abstractmethod
+    async def create_currency(self, currency: Currency) -> None:
+        pass
+
+    @abstractmethod
+    async def find_by_id(self, id: int) -> Optional[Currency]:
+        pass
+
+    @abstractmethod
+    async def find_by_name(self, name: str) -> Optional[Currency]:
+        pass
+
+    @abstractmethod
+    async def find_all(self) -> List[Currency]:
+        pass
+
+    @abstractmethod
+    async def delete_by_id(self, id: int) -> Optional[Currency]:
+        pass
+
+    @abstractmethod
+    async def update_currency(self, currency: Currency, id: int) -> Optional[Currency]:
+        pass
+
+
+class AsyncCurrencyServiceImpl(CurrencyCacheSupport, AsyncCurrencyService):
+    def __init__(self, currency_repository):
+        self.currency_repository = currency_repository
+        self.redis_client = get_async_redis_client()
+        self.cache_policies = get_cache_policies()
+        self.cache_codec = get_cache_codec()
+        self.refresher = get_async_background_refresher()
+        self.local_cache = get_local_cache()
+        self.invalidation_bus = get_invalidation_bus()
+        self.single_flight = get_async_single_flight()
+
+    async def warm_up(self, batch: AsyncCacheBatch) -> int:
+        generation = await self._get_generation()
+        started = time.monotonic()
+        currencies = await self.currency_repository.find_all()
+        delta = time.monotonic() - started
+        return self._queue_cache_entries(batch, self._warm_up_entries(currencies, generation), delta)
+
+    async def create_currency(self, currency: Currency) -> None:
+        new_currency = self._set_meaning_in_currency(currency.code, currency.fullname, currency.sign)
+        await self.currency_repository.create(new_currency)
+        await self._bump_generation()
+
+    async def upsert_currencies(self, currencies: List[Currency]) -> UpsertResult[Currency]:
+        # Один INSERT на весь список и одна инвалидация в конце. Новые валюты ещё без курсов,
+        # граф перечитывается, только если изменились валюты, которые в нём уже есть
+        result = await self.currency_repository.upsert_many(currencies)
+        if result.changed:
+            await self._bump_generation(rate_graph_changed=result.updated > 0)
+        return result
+
+    async def find_by_id(self, id: int) -> Optional[Currency]:
+        cache_key = self._get_cache_key_by_id(id, await self._get_generation())
+        cached_value = await self._get_from_cache(cache_key, lambda: self._load_by_id(id, cache_key))
+        if cached_value:
+            return cached_value
+        return await self.single_flight.do(
+            cache_key, lambda: self._load_by_id(id, cache_key), self.redis_client,
+            lambda: self._get_from_cache(cache_key)
+        )
+
+    async def _load_by_id(self, id: int, cache_key: Optional[str]) -> Optional[Currency]:
+        started = time.monotonic()
+        currency = await self.currency_repository.find_by_id(id)
+        delta = time.monotonic() - started
+        if currency:
+            await self._set_to_cache(cache_key, currency, delta)
+        return currency
+
+    async def find_by_name(self, name: str) -> Optional[Currency]:
+        generation = await self._get_generation()
+        cache_key = self._get_cache_key_by_code(name, generation)
+        cached_value = await self._get_from_cache(cache_key, lambda: self._load_by_name(name, generation, cache_key))
+        if cached_value:
+            return cached_value
+        return await self.single_flight.do(
+            cache_key, lambda: self._load_by_name(name, generation, cache_key), self.redis_client,
+            lambda: self._get_from_cache(cache_key)
+        )
+
+    async def _load_by_name(self, name: str, generation: Optional[str], cache_key: Optional[str]) -> Optional[Currency]:
+        started = time.monotonic()
+        currency = await self.currency_repository.find_by_name(name)
+        delta = time.monotonic() - started
+        if currency:
+            await self._set_many_to_cache(self._by_code_entries(cache_key, currency, generation), delta)
+        return currency
+
+    async def find_all(self) -> List[Currency]:
+        cache_key = self._get_cache_key_all(await self._get_generation())
+        cached_value = await self._get_from_cache_list(cache_key, lambda: self._load_all(cache_key))
+        if cached_value is not None:
+            return cached_value
+        return await self.single_flight.do(
+            cache_key, lambda: self._load_all(cache_key), self.redis_client,
+            lambda: self._get_from_cache_list(cache_key)
+        )
+
+    async def find_all_rendered(self, render: Callable[[List[Currency]], bytes]) -> RenderedResponse:
+        cache_key = self._get_cache_key_all_rendered(await self._get_generation())
+        rendered = self._local_rendered(cache_key)
+        if rendered is None:
+            rendered = self._remember_rendered(cache_key, render(await self.find_all()))
+        return rendered
+
+    async def find_page(self, page: PageRequest) -> Page[Currency]:
+        cache_key = self._get_cache_key_page(page, await self._get_generation())
+        rows = await self._get_from_cache_list(cache_key, lambda: self._load_page(page, cache_key))
+        if rows is None:
+            rows = await self.single_flight.do(
+                cache_key, lambda: self._load_page(page, cache_key), self.redis_client,
+                lambda: self._get_from_cache_list(cache_key)
+            )
+        return page.to_page(rows)
+
+    async def _load_page(self, page: PageRequest, cache_key: Optional[str]) -> List[Currency]:
+        started = time.monotonic()
+        rows = await self.currency_repository.find_page(page)
+        delta = time.monotonic() - started
+        await self._set_to_cache_list(cache_key, rows, delta)
+        return rows
+
+    async def _load_all(self, cache_key: Optional[str]) -> List[Currency]:
+        started = time.monotonic()
+        currencies = await self.currency_repository.find_all()
+        delta = time.monotonic() - started
+        if currencies:
+            await self._set_to_cache_list(cache_key, currencies, delta)
+        return currencies
+
+    async def delete_by_id(self, id: int) -> Optional[Currency]:
+        # Строка из DELETE ... RETURNING решает, нужна ли инвалидация; None - удалять было нечего
+        deleted = await self.currency_repository.delete(id)
+        if deleted is not None:
+            await self._bump_generation(rate_graph_changed=True)
+        return deleted
+
+    async def update_currency(self, currency: Currency, id: int) -> Optional[Currency]:
+        updated = await self.currency_repository.update(currency, id)
+        if updated is not None:
+            await self._bump_generation(rate_graph_changed=True)
+        return updated
+
+    async def _get_from_cache(self, key: str, refresh: Optional[Callable[[], object]] = None) -> Optional[Currency]:
+        if key is None:
+            return None
+        local_value = self.local_cache.get(key)
+        if local_value is not None:
+            return local_value
+        try:
+            return self._cached_value(key, await self.redis_client.get(key), refresh)
+        except Exception as e:
+            return None
+
+    async def _get_from_cache_list(self, key: str, refresh: Optional[Callable[[], object]] = None) -> Optional[List[Currency]]:
+        return await self._get_from_cache(key, refresh)
+
+    async def _set_to_cache(self, key: str, currency: Currency, delta: float = 0.0) -> None:
+        await self._set_many_to_cache([(key, currency)], delta)
+
+    async def _set_to_cache_list(self, key: str, currencies: List[Currency], delta: float = 0.0) -> None:
+        await self._set_many_to_cache([(key, currencies)], delta)
+
+    async def _set_many_to_cache(self, entries: List[Tuple[Optional[str], object]], delta: float = 0.0) -> None:
+        batch = AsyncCacheBatch(self.redis_client)
+        try:
+            self._queue_cache_entries(batch, entries, delta)
+            await batch.execute()
+        except Exception as e:
+            pass
+
+    async def _get_generation(self) -> Optional[str]:
+        generation = self._local_generation()
+        if generation is None:
+            try:
+                generation = self._remember_generation(await self.redis_client.mget(self.generation_keys))
+            except Exception as e:
+                pass
+        return generation
+
+    async def _bump_generation(self, rate_graph_changed: bool = False) -> None:
+        batch = self._queue_bump(AsyncCacheBatch(self.redis_client, transaction=True), rate_graph_changed)
+        try:
+            results = await batch.execute()
+        except Exception as e:
+            return
+        graph_version = self._bumped_generation(results, rate_graph_changed)
+        await self.invalidation_bus.apublish(
+            self.redis_client, [self.generation_keys[0]], graph_version, sequence=results[1]
+        )
@@ -0,0 +1,309 @@
+import time
+import asyncio
+from datetime import datetime
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+from ..models.exchange_rates import ExchangeRates
+from ..models.ohlc import OhlcSeries
+from ..models.page import Page, PageRequest
+from ..models.upsert_result import UpsertResult
+from ..cache.local_cache import get_local_cache
+from ..cache.invalidation_bus import get_invalidation_bus
+from ..cache.batch import AsyncCacheBatch
+from ..cache.single_flight import get_async_single_flight
+from ..cache.refresh import get_async_background_refresher
+from ..cache.codec import get_cache_codec
+from ..cache.rendered import RenderedResponse
+from ..cache.policy import get_cache_policies
+from ..config.redis import get_async_redis_client
+from .exchange_rates_service import ExchangeRatesCacheSupport
+from .rate_graph import get_rate_graph, invert_rate, RATE_GRAPH_RELOAD_KEY, RATE_GRAPH_VERSION_KEY
+
+
+class AsyncExchangeRatesService(ABC):
+    @abstractmethod
+    async def create_exchange_rate(self, exchange_rates: ExchangeRates) -> None:
+        pass
+
+    @abstractmethod
+    async def find_by_id(self, id: int) -> Optional[ExchangeRates]:
+        pass
+
+    @abstractmethod
+    async def find_by_name(self, name: str) -> Optional[ExchangeRates]:
+        pass
+
+    @abstractmethod
+    async def find_all(self) -> List[ExchangeRates]:
+        pass
+
+    @abstractmethod
+    async def delete_by_id(self, id: int) -> Optional[ExchangeRates]:
+        pass
+
+
+class AsyncExchangeRatesServiceImpl(ExchangeRatesCacheSupport, AsyncExchangeRatesService):
+
+    def __init__(self, exchange_rates_repository):
+        self.exchange_rates_repository = exchange_rates_repository
+        self.redis_client = get_async_redis_client()
+        self.cache_policies = get_cache_policies()
+        self.cache_codec = get_cache_codec()
+        self.refresher = get_async_background_refresher()
+        self.local_cache = get_local_cache()
+        self.invalidation_bus = get_invalidation_bus()
+        self.single_flight = get_async_single_flight()
+        self.rate_graph = get_rate_graph()
+        self.rate_graph_check_interval = 1.0
+        self.rate_graph_retry_interval = 5.0
+        self._rate_graph_checked_at = 0.0
+        self._rate_graph_failed_at: Optional[float] = None
+
+    async def find_rate(self, base_code: str, target_code: str) -> Optional[ExchangeRates]:
+        if await self._ensure_rate_graph_fresh():
+            return self.rate_graph.resolve(base_code, target_code)
+        return await self.find_by_name(base_code + target_code)
+
+    async def find_rate_as_of(self, base_code: str, target_code: str, as_of: datetime) -> Optional[ExchangeRates]:
+        direct = await self.exchange_rates_repository.find_by_codes_as_of(base_code, target_code, as_of)
+        if direct is not None:
+            return direct
+        inverse = invert_rate(await self.exchange_rates_repository.find_by_codes_as_of(target_code, base_code, as_of))
+        if inverse is not None:
+            return inverse
+        return self._cross_rate_as_of(await self.exchange_rates_repository.find_all_as_of(as_of), base_code, target_code)
+
+    async def find_by_name_as_of(self, name: str, as_of: datetime) -> Optional[ExchangeRates]:
+        return await self.exchange_rates_repository.find_by_name_as_of(name, as_of)
+
+    async def find_ohlc(self, interval: str, start: datetime, end: datetime,
+                        name: Optional[str] = None) -> List[OhlcSeries]:
+        return await self.exchange_rates_repository.find_ohlc(interval, start, end, name)
+
+    async def find_rates(self, pairs: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[ExchangeRates]]:
+        pairs = list(dict.fromkeys(pairs))
+        if await self._ensure_rate_graph_fresh():
+            return {pair: await self.find_rate(*pair) for pair in pairs}
+        return self._rates_by_pair(pairs, await self.find_by_names(base + target for base, target in pairs))
+
+    async def find_by_names(self, names: Iterable[str]) -> Dict[str, Optional[ExchangeRates]]:
+        generation = await self._get_generation()
+        keys = self._get_cache_keys_by_name(names, generation)
+        loaders = self._by_name_loaders(keys, generation)
+        cached = await self._get_many_from_cache({key: loaders[name] for name, key in keys.items() if key is not None})
+        rates = {}
+        for name, key in keys.items():
+            rates[name] = cached.get(key) or await self.single_flight.do(
+                key, loaders[name], self.redis_client, lambda: self._get_from_cache(key)
+            )
+        return rates
+
+    async def warm_up(self, batch: AsyncCacheBatch) -> int:
+        generation = await self._get_generation()
+        version = await self._get_rate_graph_version()
+        started = time.monotonic()
+        exchange_rates_list = await self.exchange_rates_repository.find_all()
+        delta = time.monotonic() - started
+        await self._build_rate_graph(exchange_rates_list, version)
+        return self._queue_cache_entries(batch, self._warm_up_entries(exchange_rates_list, generation), delta)
+
+    async def load_rate_graph(self, version: Optional[int] = None) -> None:
+        if version is None:
+            version = await self._get_rate_graph_version()
+        await self._build_rate_graph(await self.exchange_rates_repository.find_all(), version)
+
+    async def _build_rate_graph(self, exchange_rates_list: List[ExchangeRates], version: Optional[int]) -> None:
+        # Пути по всем парам считаются в пуле потоков, чтобы не останавливать цикл событий
+        await asyncio.get_running_loop().run_in_executor(None, self._load_rate_graph_rows, exchange_rates_list, version)
+
+    async def find_all(self) -> List[ExchangeRates]:
+        cache_key = self._get_cache_key_all(await self._get_generation())
+        cached_value = await self._get_from_cache_list(cache_key, lambda: self._load_all(cache_key))
+        if cached_value is not None:
+            return cached_value
+        return await self.single_flight.do(
+            cache_key, lambda: self._load_all(cache_key), self.redis_client,
+            lambda: self._get_from_cache_list(cache_key)
+        )
+
+    async def find_all_rendered(self, render: Callable[[List[ExchangeRates]], bytes]) -> RenderedResponse:
+        cache_key = self._get_cache_key_all_rendered(await self._get_generation())
+        rendered = self._local_rendered(cache_key)
+        if rendered is None:
+            rendered = self._remember_rendered(cache_key, render(await self.find_all()))
+        return rendered
+
+    async def iter_export(self, chunk_size: int = 1000) -> AsyncIterator[List[ExchangeRates]]:
+        async for chunk in self.exchange_rates_repository.iter_chunks(chunk_size):
+            yield chunk
+
+    async def find_page(self, page: PageRequest) -> Page[ExchangeRates]:
+        cache_key = self._get_cache_key_page(page, await self._get_generation())
+        rows = await self._get_from_cache_list(cache_key, lambda: self._load_page(page, cache_key))
+        if rows is None:
+            rows = await self.single_flight.do(
+                cache_key, lambda: self._load_page(page, cache_key), self.redis_client,
+                lambda: self._get_from_cache_list(cache_key)
+            )
+        return page.to_page(rows)
+
+    async def _load_page(self, page: PageRequest, cache_key: Optional[str]) -> List[ExchangeRates]:
+        started = time.monotonic()
+        rows = await self.exchange_rates_repository.find_page(page)
+        delta = time.monotonic() - started
+        await self._set_to_cache_list(cache_key, rows, delta)
+        return rows
+
+    async def _load_all(self, cache_key: Optional[str]) -> List[ExchangeRates]:
+        started = time.monotonic()
+        exchange_rates_list = await self.exchange_rates_repository.find_all()
+        delta = time.monotonic() - started
+        if exchange_rates_list:
+            await self._set_to_cache_list(cache_key, exchange_rates_list, delta)
+        return exchange_rates_list
+
+    async def delete_by_id(self, id: int) -> Optional[ExchangeRates]:
+        deleted = await self.exchange_rates_repository.delete(id)
+        if deleted is not None:
+            self.rate_graph.remove_by_id(id)
+            await self._bump_generation(rate_graph_changed=True)
+        return deleted
+
+    async def update_exchange_rate(self, exchange_rates: ExchangeRates, id: int) -> Optional[ExchangeRates]:
+        updated = await self.exchange_rates_repository.update(exchange_rates, id)
+        if updated is not None:
+            self.rate_graph.upsert(updated)
+            await self._bump_generation(rate_graph_changed=True)
+        return updated
+
+    async def create_exchange_rate(self, exchange_rates: ExchangeRates) -> None:
+        created = await self.exchange_rates_repository.create(self._new_exchange_rate(exchange_rates))
+        self._refresh_rate_graph_entry(created)
+        await self._bump_generation(rate_graph_changed=True)
+
+    async def upsert_exchange_rates(self, rates: List[Tuple[str, str, Decimal]]) -> UpsertResult[ExchangeRates]:
+        result = await self.exchange_rates_repository.upsert_by_codes(rates)
+        if result.changed:
+            self.rate_graph.upsert_many(result.changed)
+            await self._bump_generation(rate_graph_changed=True)
+        return result
+
+    async def find_by_id(self, id: int) -> Optional[ExchangeRates]:
+        cache_key = self._get_cache_key_by_id(id, await self._get_generation())
+        cached_value = await self._get_from_cache(cache_key, lambda: self._load_by_id(id, cache_key))
+        if cached_value:
+            return cached_value
+        return await self.single_flight.do(
+            cache_key, lambda: self._load_by_id(id, cache_key), self.redis_client,
+            lambda: self._get_from_cache(cache_key)
+        )
+
+    async def _load_by_id(self, id: int, cache_key: Optional[str]) -> Optional[ExchangeRates]:
+        started = time.monotonic()
+        exchange_rate = await self.exchange_rates_repository.find_by_id(id)
+        delta = time.monotonic() - started
+        if exchange_rate:
+            await self._set_to_cache(cache_key, exchange_rate, delta)
+        return exchange_rate
+
+    async def find_by_name(self, name: str) -> Optional[ExchangeRates]:
+        generation = await self._get_generation()
+        cache_key = self._get_cache_key_by_name(name, generation)
+        cached_value = await self._get_from_cache(cache_key, lambda: self._load_by_name(name, generation, cache_key))
+        if cached_value:
+            return cached_value
+        return await self.single_flight.do(
+            cache_key, lambda: self._load_by_name(name, generation, cache_key), self.redis_client,
+            lambda: self._get_from_cache(cache_key)
+        )
+
+    async def _load_by_name(self, name: str, generation: Optional[str],
+                            cache_key: Optional[str]) -> Optional[ExchangeRates]:
+        started = time.monotonic()
+        exchange_rate = await self.exchange_rates_repository.find_by_name(name)
+        delta = time.monotonic() - started
+        if exchange_rate:
+            await self._set_many_to_cache(self._by_name_entries(cache_key, exchange_rate, generation), delta)
+        return exchange_rate
+
+    async def _get_from_cache(self, key: str, refresh: Optional[Callable[[], object]] = None) -> Optional[ExchangeRates]:
+        if key is None:
+            return None
+        local_value = self.local_cache.get(key)
+        if local_value is not None:
+            return local_value
+        try:
+            return self._cached_value(key, await self.redis_client.get(key), refresh)
+        except Exception as e:
+            return None
+
+    async def _get_from_cache_list(self, key: str, refresh: Optional[Callable[[], object]] = None) -> Optional[List[ExchangeRates]]:
+        return await self._get_from_cache(key, refresh)
+
+    async def _get_many_from_cache(self, refreshers: Dict[str, Optional[Callable[[], object]]]) -> Dict[str, ExchangeRates]:
+        values, missing = self._split_local(refreshers)
+        try:
+            values.update(self._cached_values(
+                missing, await AsyncCacheBatch(self.redis_client).get_many(missing), refreshers
+            ))
+        except Exception as e:
+            pass
+        return values
+
+    async def _set_to_cache(self, key: str, exchange_rate: ExchangeRates, delta: float = 0.0) -> None:
+        await self._set_many_to_cache([(key, exchange_rate)], delta)
+
+    async def _set_to_cache_list(self, key: str, exchange_rates_list: List[ExchangeRates], delta: float = 0.0) -> None:
+        await self._set_many_to_cache([(key, exchange_rates_list)], delta)
+
+    async def _set_many_to_cache(self, entries: List[Tuple[Optional[str], object]], delta: float = 0.0) -> None:
+        batch = AsyncCacheBatch(self.redis_client)
+        try:
+            self._queue_cache_entries(batch, entries, delta)
+            await batch.execute()
+        except Exception as e:
+            pass
+
+    async def _get_generation(self) -> Optional[str]:
+        generation = self._local_generation()
+        if generation is None:
+            try:
+                generation = self._remember_generation(await self.redis_client.mget(self.generation_keys))
+            except Exception as e:
+                pass
+        return generation
+
+    async def _bump_generation(self, rate_graph_changed: bool = False) -> None:
+        batch = self._queue_bump(AsyncCacheBatch(self.redis_client, transaction=True), rate_graph_changed)
+        try:
+            results = await batch.execute()
+        except Exception as e:
+            self._bump_failed(rate_graph_changed)
+            return
+        graph_version = self._bumped_generation(results, rate_graph_changed)
+        await self.invalidation_bus.apublish(
+            self.redis_client, [self.generation_keys[0]], graph_version, sequence=results[1]
+        )
+
+    async def _ensure_rate_graph_fresh(self) -> bool:
+        if self._serving_rate_graph_snapshot():
+            return True
+        if self._rate_graph_check_due():
+            version = await self._get_rate_graph_version()
+            if self.rate_graph.is_stale(version):
+                try:
+                    await self.single_flight.do(RATE_GRAPH_RELOAD_KEY, lambda: self._reload_rate_graph(version))
+                except Exception as e:
+                    self._rate_graph_reload_failed()
+        return self.rate_graph.loaded
+
+    async def _reload_rate_graph(self, version: Optional[int]) -> None:
+        if self.rate_graph.is_stale(version):
+            await self.load_rate_graph(version)
+
+    async def _get_rate_graph_version(self) -> Optional[int]:
+        try:
+            return self._parse_rate_graph_version(await self.redis_client.get(RATE_GRAPH_VERSION_KEY))
+        except Exception as e:
+            return None
@@ -0,0 +1,31 @@
+import os
+import asyncio
+from ..cache.batch import CacheBatch, AsyncCacheBatch
+from ..config.redis import get_redis_client, get_async_redis_client
+
+
+def is_cache_warmup_enabled() -> bool:
+    return os.getenv('CACHE_WARMUP', 'true').lower() == 'true'
+
+
+def warm_up_cache(currency_service, exchange_rates_service) -> int:
+    """Заполняет кэш всеми валютами и курсами: по одному find_all на таблицу и один pipeline в Redis.
+
+    Заодно загружается граф курсов. Возвращает число записанных ключей; ошибка Redis
+    пробрасывается, но L1 и граф к этому моменту уже заполнены.
+    """
+    batch = CacheBatch(get_redis_client())
+    currency_service.warm_up(batch)
+    exchange_rates_service.warm_up(batch)
+    written = len(batch)
+    batch.execute()
+    return written
+
+
+async def async_warm_up_cache(currency_service, exchange_rates_service) -> int:
+    # Таблицы читаются параллельно по разным соединениям, запись - всё равно одним pipeline
+    batch = AsyncCacheBatch(get_async_redis_client())
+    await asyncio.gather(currency_service.warm_up(batch), exchange_rates_service.warm_up(batch))
+    written = len(batch)
+    await batch.execute()
+    return written
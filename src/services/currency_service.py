@@ -1,8 +1,20 @@
-import json
+import time
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Callable, List, Optional, Tuple
 from ..models.currency import Currency
+from ..models.page import Page, PageRequest
+from ..models.upsert_result import UpsertResult
+from ..cache.local_cache import get_local_cache
+from ..cache.invalidation_bus import get_invalidation_bus
+from ..cache.batch import CacheBatch
+from ..cache.single_flight import get_single_flight
+from ..cache.refresh import get_background_refresher
+from ..cache.codec import get_cache_codec
+from ..cache.rendered import RenderedResponse
+from ..cache.policy import CachePolicySupport, get_cache_policies
+from ..cache.generations import GenerationalCacheSupport, CURRENCY_GENERATION_KEY
 from ..config.redis import get_redis_client
+from .rate_graph import get_rate_graph, RATE_GRAPH_VERSION_KEY
 
 
 class CurrencyService(ABC):
@@ -23,155 +35,238 @@ class CurrencyService(ABC):
         pass
 
     @abstractmethod
-    def delete_by_id(self, id: int) -> None:
+    def delete_by_id(self, id: int) -> Optional[Currency]:
         pass
 
     @abstractmethod
-    def update_currency(self, currency: Currency, id: int) -> None:
+    def update_currency(self, currency: Currency, id: int) -> Optional[Currency]:
         pass
 
 
-class CurrencyServiceImpl(CurrencyService):
+class CurrencyCacheSupport(GenerationalCacheSupport, CachePolicySupport):
+
+    generation_keys = (CURRENCY_GENERATION_KEY,)
+
+    @staticmethod
+    def _set_meaning_in_currency(code: str, fullname: str, sign: str) -> Currency:
+        currency = Currency()
+        currency.code = code
+        currency.fullname = fullname
+        currency.sign = sign
+        return currency
+
+    def _get_cache_key_by_id(self, id: int, generation: Optional[str]) -> Optional[str]:
+        return self._versioned_key("currency", generation, f"id:{id}")
+
+    def _get_cache_key_by_code(self, code: str, generation: Optional[str]) -> Optional[str]:
+        return self._versioned_key("currency", generation, f"code:{code}")
+
+    def _get_cache_key_all(self, generation: Optional[str]) -> Optional[str]:
+        return self._versioned_key("currency", generation, "all")
+
+    def _get_cache_key_all_rendered(self, generation: Optional[str]) -> Optional[str]:
+        return self._versioned_key("currency", generation, "all:rendered")
+
+    def _get_cache_key_page(self, page: PageRequest, generation: Optional[str]) -> Optional[str]:
+        return self._versioned_key("currency", generation, page.cache_suffix())
+
+    def _by_code_entries(self, cache_key: Optional[str], currency: Currency,
+                         generation: Optional[str]) -> List[Tuple[Optional[str], object]]:
+        # Валюта, найденная по коду, заодно кладётся и под ключ своего id
+        entries = [(cache_key, currency)]
+        if currency.id:
+            entries.append((self._get_cache_key_by_id(currency.id, generation), currency))
+        return entries
+
+    def _warm_up_entries(self, currencies: List[Currency], generation: Optional[str]) -> List[Tuple[Optional[str], object]]:
+        entries = [(self._get_cache_key_all(generation), currencies)]
+        for currency in currencies:
+            entries.append((self._get_cache_key_by_id(currency.id, generation), currency))
+            entries.append((self._get_cache_key_by_code(currency.code, generation), currency))
+        return entries
+
+    def _queue_bump(self, batch, rate_graph_changed: bool):
+        if not rate_graph_changed:
+            return self._queue_generation_bump(batch)
+        # Курсы обмена содержат валюту целиком, поэтому граф курсов нужно перечитать
+        get_rate_graph().invalidate()
+        return self._queue_generation_bump(batch, RATE_GRAPH_VERSION_KEY)
+
+    def _bumped_generation(self, results: list, rate_graph_changed: bool) -> Optional[int]:
+        # Возвращает новую версию графа для сообщения шины
+        self._remember_bumped_generation(results[0])
+        return int(results[2]) if rate_graph_changed else None
+
+
+class CurrencyServiceImpl(CurrencyCacheSupport, CurrencyService):
     def __init__(self, currency_repository):
         self.currency_repository = currency_repository
         self.redis_client = get_redis_client()
-        self.cache_ttl = 3600  
+        self.cache_policies = get_cache_policies()
+        self.cache_codec = get_cache_codec()
+        self.refresher = get_background_refresher()
+        self.local_cache = get_local_cache()
+        self.invalidation_bus = get_invalidation_bus()
+        self.single_flight = get_single_flight()
+
+    def warm_up(self, batch: CacheBatch) -> int:
+        # Все валюты читаются одним запросом; ключи списка, id и кода ставятся в общий пакет
+        generation = self._get_generation()
+        started = time.monotonic()
+        currencies = self.currency_repository.find_all()
+        delta = time.monotonic() - started
+        return self._queue_cache_entries(batch, self._warm_up_entries(currencies, generation), delta)
 
     def create_currency(self, currency: Currency) -> None:
         new_currency = self._set_meaning_in_currency(currency.code, currency.fullname, currency.sign)
         self.currency_repository.create(new_currency)
-        self._clear_all_cache()
+        self._bump_generation()
+
+    def upsert_currencies(self, currencies: List[Currency]) -> UpsertResult[Currency]:
+        # Один INSERT на весь список и одна инвалидация в конце. Новые валюты ещё без курсов,
+        # граф перечитывается, только если изменились валюты, которые в нём уже есть
+        result = self.currency_repository.upsert_many(currencies)
+        if result.changed:
+            self._bump_generation(rate_graph_changed=result.updated > 0)
+        return result
 
     def find_by_id(self, id: int) -> Optional[Currency]:
-        cache_key = self._get_cache_key_by_id(id)
-        cached_value = self._get_from_cache(cache_key)
+        generation = self._get_generation()
+        cache_key = self._get_cache_key_by_id(id, generation)
+        cached_value = self._get_from_cache(cache_key, lambda: self._load_by_id(id, cache_key))
         if cached_value:
             return cached_value
-        
+        return self.single_flight.do(
+            cache_key, lambda: self._load_by_id(id, cache_key), self.redis_client,
+            lambda: self._get_from_cache(cache_key)
+        )
+
+    def _load_by_id(self, id: int, cache_key: Optional[str]) -> Optional[Currency]:
+        started = time.monotonic()
         currency = self.currency_repository.find_by_id(id)
+        delta = time.monotonic() - started
         
         if currency:
-            self._set_to_cache(cache_key, currency)
+            self._set_to_cache(cache_key, currency, delta)
         return currency
 
     def find_by_name(self, name: str) -> Optional[Currency]:
-        cache_key = self._get_cache_key_by_code(name)
-        cached_value = self._get_from_cache(cache_key)
+        generation = self._get_generation()
+        cache_key = self._get_cache_key_by_code(name, generation)
+        cached_value = self._get_from_cache(cache_key, lambda: self._load_by_name(name, generation, cache_key))
         if cached_value:
             return cached_value
-        
+        return self.single_flight.do(
+            cache_key, lambda: self._load_by_name(name, generation, cache_key), self.redis_client,
+            lambda: self._get_from_cache(cache_key)
+        )
+
+    def _load_by_name(self, name: str, generation: Optional[str], cache_key: Optional[str]) -> Optional[Currency]:
+        started = time.monotonic()
         currency = self.currency_repository.find_by_name(name)
+        delta = time.monotonic() - started
         if currency:
-            self._set_to_cache(cache_key, currency)
-            if currency.id:
-                id_cache_key = self._get_cache_key_by_id(currency.id)
-                self._set_to_cache(id_cache_key, currency)
+            self._set_many_to_cache(self._by_code_entries(cache_key, currency, generation), delta)
         return currency
 
     def find_all(self) -> List[Currency]:
-        cache_key = self._get_cache_key_all()
-        cached_value = self._get_from_cache_list(cache_key)
+        cache_key = self._get_cache_key_all(self._get_generation())
+        cached_value = self._get_from_cache_list(cache_key, lambda: self._load_all(cache_key))
         if cached_value is not None:
             return cached_value
-        
-        currencies = self.currency_repository.find_all()
-        if currencies:
-            self._set_to_cache_list(cache_key, currencies)
-        return currencies
+        return self.single_flight.do(
+            cache_key, lambda: self._load_all(cache_key), self.redis_client,
+            lambda: self._get_from_cache_list(cache_key)
+        )
 
-    def delete_by_id(self, id: int) -> None:
-        currency = self.currency_repository.find_by_id(id)
-        self.currency_repository.delete(id)
-        self._delete_from_cache(self._get_cache_key_by_id(id))
-        if currency and currency.code:
-            self._delete_from_cache(self._get_cache_key_by_code(currency.code))
-        self._clear_all_cache()
-
-    def update_currency(self, currency: Currency, id: int) -> None:
-        old_currency = self.currency_repository.find_by_id(id)
-        currency_to_be_updated = self.currency_repository.find_by_id(id)
-        currency_to_be_updated.fullname = currency.fullname
-        currency_to_be_updated.code = currency.code
-        currency_to_be_updated.sign = currency.sign
-        self.currency_repository.update(currency_to_be_updated, id)
-        self._clear_all_cache()
+    def find_all_rendered(self, render: Callable[[List[Currency]], bytes]) -> RenderedResponse:
+        cache_key = self._get_cache_key_all_rendered(self._get_generation())
+        rendered = self._local_rendered(cache_key)
+        if rendered is None:
+            rendered = self._remember_rendered(cache_key, render(self.find_all()))
+        return rendered
 
+    def find_page(self, page: PageRequest) -> Page[Currency]:
+        # Страница кэшируется целиком по курсору; лишняя (limit + 1) строка хранится вместе с ней
+        cache_key = self._get_cache_key_page(page, self._get_generation())
+        rows = self._get_from_cache_list(cache_key, lambda: self._load_page(page, cache_key))
+        if rows is None:
+            rows = self.single_flight.do(
+                cache_key, lambda: self._load_page(page, cache_key), self.redis_client,
+                lambda: self._get_from_cache_list(cache_key)
+            )
+        return page.to_page(rows)
 
-    @staticmethod
-    def _set_meaning_in_currency(code: str, fullname: str, sign: str) -> Currency:
-        currency = Currency()
-        currency.code = code
-        currency.fullname = fullname
-        currency.sign = sign
-        return currency
+    def _load_page(self, page: PageRequest, cache_key: Optional[str]) -> List[Currency]:
+        started = time.monotonic()
+        rows = self.currency_repository.find_page(page)
+        delta = time.monotonic() - started
+        self._set_to_cache_list(cache_key, rows, delta)
+        return rows
 
-    def _get_cache_key_by_id(self, id: int) -> str:
-        return f"currency:id:{id}"
-
-    def _get_cache_key_by_code(self, code: str) -> str:
-        return f"currency:code:{code}"
+    def _load_all(self, cache_key: Optional[str]) -> List[Currency]:
+        started = time.monotonic()
+        currencies = self.currency_repository.find_all()
+        delta = time.monotonic() - started
+        if currencies:
+            self._set_to_cache_list(cache_key, currencies, delta)
+        return currencies
 
-    def _get_cache_key_all(self) -> str:
-        return "currency:all"
+    def delete_by_id(self, id: int) -> Optional[Currency]:
+        # Строка из DELETE ... RETURNING решает, нужна ли инвалидация; None - удалять было нечего
+        deleted = self.currency_repository.delete(id)
+        if deleted is not None:
+            self._bump_generation(rate_graph_changed=True)
+        return deleted
 
-    def _currency_to_dict(self, currency: Currency) -> dict:
-        return {
-            "id": currency.id,
-            "code": currency.code,
-            "fullname": currency.fullname,
-            "sign": currency.sign
-        }
+    def update_currency(self, currency: Currency, id: int) -> Optional[Currency]:
+        updated = self.currency_repository.update(currency, id)
+        if updated is not None:
+            self._bump_generation(rate_graph_changed=True)
+        return updated
 
-    def _dict_to_currency(self, data: dict) -> Currency:
-        currency = Currency()
-        currency.id = data.get("id")
-        currency.code = data.get("code")
-        currency.fullname = data.get("fullname")
-        currency.sign = data.get("sign")
-        return currency
-
-    def _get_from_cache(self, key: str) -> Optional[Currency]:
+    def _get_from_cache(self, key: str, refresh: Optional[Callable[[], object]] = None) -> Optional[Currency]:
+        if key is None:
+            return None
+        local_value = self.local_cache.get(key)
+        if local_value is not None:
+            return local_value
         try:
-            cached_data = self.redis_client.get(key)
-            if cached_data:
-                data = json.loads(cached_data)
-                return self._dict_to_currency(data)
+            return self._cached_value(key, self.redis_client.get(key), refresh)
         except Exception as e:
-            pass
-        return None
+            return None
 
-    def _get_from_cache_list(self, key: str) -> Optional[List[Currency]]:
-        try:
-            cached_data = self.redis_client.get(key)
-            if cached_data:
-                data_list = json.loads(cached_data)
-                return [self._dict_to_currency(item) for item in data_list]
-        except Exception as e:
-            pass
-        return None
+    def _get_from_cache_list(self, key: str, refresh: Optional[Callable[[], object]] = None) -> Optional[List[Currency]]:
+        return self._get_from_cache(key, refresh)
 
-    def _set_to_cache(self, key: str, currency: Currency) -> None:
-        try:
-            data = self._currency_to_dict(currency)
-            json_data = json.dumps(data, ensure_ascii=False)
-            self.redis_client.setex(key, self.cache_ttl, json_data)
-        except Exception as e:
-            pass
+    def _set_to_cache(self, key: str, currency: Currency, delta: float = 0.0) -> None:
+        self._set_many_to_cache([(key, currency)], delta)
 
-    def _set_to_cache_list(self, key: str, currencies: List[Currency]) -> None:
-        try:
-            data_list = [self._currency_to_dict(currency) for currency in currencies]
-            json_data = json.dumps(data_list, ensure_ascii=False)
-            self.redis_client.setex(key, self.cache_ttl, json_data)
-        except Exception as e:
-            pass
+    def _set_to_cache_list(self, key: str, currencies: List[Currency], delta: float = 0.0) -> None:
+        self._set_many_to_cache([(key, currencies)], delta)
 
-    def _delete_from_cache(self, key: str) -> None:
+    def _set_many_to_cache(self, entries: List[Tuple[Optional[str], object]], delta: float = 0.0) -> None:
+        batch = CacheBatch(self.redis_client)
         try:
-            self.redis_client.delete(key)
+            self._queue_cache_entries(batch, entries, delta)
+            batch.execute()
         except Exception as e:
             pass
 
-    def _clear_all_cache(self) -> None:
-        self._delete_from_cache(self._get_cache_key_all())
+    def _get_generation(self) -> Optional[str]:
+        generation = self._local_generation()
+        if generation is None:
+            try:
+                generation = self._remember_generation(self.redis_client.mget(self.generation_keys))
+            except Exception as e:
+                pass
+        return generation
 
+    def _bump_generation(self, rate_graph_changed: bool = False) -> None:
+        batch = self._queue_bump(CacheBatch(self.redis_client, transaction=True), rate_graph_changed)
+        try:
+            results = batch.execute()
+        except Exception as e:
+            return
+        graph_version = self._bumped_generation(results, rate_graph_changed)
+        self.invalidation_bus.publish(self.redis_client, [self.generation_keys[0]], graph_version, sequence=results[1])
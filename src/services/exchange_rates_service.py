@@ -1,10 +1,23 @@
-import json
+import time
+from datetime import datetime
 from abc import ABC, abstractmethod
-from typing import List, Optional
 from decimal import Decimal
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from ..models.exchange_rates import ExchangeRates
-from ..models.currency import Currency
+from ..models.ohlc import OhlcSeries
+from ..models.page import Page, PageRequest
+from ..models.upsert_result import UpsertResult
+from ..cache.local_cache import get_local_cache
+from ..cache.invalidation_bus import get_invalidation_bus
+from ..cache.batch import CacheBatch
+from ..cache.single_flight import get_single_flight
+from ..cache.refresh import get_background_refresher
+from ..cache.codec import get_cache_codec
+from ..cache.rendered import RenderedResponse
+from ..cache.policy import CachePolicySupport, get_cache_policies
+from ..cache.generations import GenerationalCacheSupport, CURRENCY_GENERATION_KEY, EXCHANGE_RATE_GENERATION_KEY
 from ..config.redis import get_redis_client
+from .rate_graph import RateGraph, get_rate_graph, invert_rate, RATE_GRAPH_RELOAD_KEY, RATE_GRAPH_VERSION_KEY
 
 
 class ExchangeRatesService(ABC):
@@ -25,171 +38,402 @@ class ExchangeRatesService(ABC):
         pass
 
     @abstractmethod
-    def delete_by_id(self, id: int) -> None:
+    def delete_by_id(self, id: int) -> Optional[ExchangeRates]:
         pass
 
 
-class ExchangeRatesServiceImpl(ExchangeRatesService):
+class ExchangeRatesCacheSupport(GenerationalCacheSupport, CachePolicySupport):
+    """Общая часть синхронного и асинхронного сервиса курсов: ключи, записи кэша и решения по графу.
+
+    Наследник даёт rate_graph, single_flight, настройки проверки графа и _load_by_name;
+    сам он только ждёт Redis и БД.
+    """
+
+    # Курс хранится вместе с валютами, поэтому изменение валюты тоже делает его ключи недействительными
+    generation_keys = (EXCHANGE_RATE_GENERATION_KEY, CURRENCY_GENERATION_KEY)
+
+    def _get_cache_key_by_id(self, id: int, generation: Optional[str]) -> Optional[str]:
+        return self._versioned_key("exchange_rate", generation, f"id:{id}")
+
+    def _get_cache_key_by_name(self, name: str, generation: Optional[str]) -> Optional[str]:
+        return self._versioned_key("exchange_rate", generation, f"name:{name}")
+
+    def _get_cache_key_all(self, generation: Optional[str]) -> Optional[str]:
+        return self._versioned_key("exchange_rate", generation, "all")
+
+    def _get_cache_key_all_rendered(self, generation: Optional[str]) -> Optional[str]:
+        return self._versioned_key("exchange_rate", generation, "all:rendered")
+
+    def _get_cache_key_page(self, page: PageRequest, generation: Optional[str]) -> Optional[str]:
+        return self._versioned_key("exchange_rate", generation, page.cache_suffix())
+
+    def _get_cache_keys_by_name(self, names: Iterable[str], generation: Optional[str]) -> Dict[str, Optional[str]]:
+        return {name: self._get_cache_key_by_name(name, generation) for name in dict.fromkeys(names)}
+
+    def _by_name_loaders(self, keys: Dict[str, Optional[str]], generation: Optional[str]) -> Dict[str, Callable]:
+        return {
+            name: (lambda name=name, key=key: self._load_by_name(name, generation, key))
+            for name, key in keys.items()
+        }
+
+    def _by_name_entries(self, cache_key: Optional[str], exchange_rate: ExchangeRates,
+                         generation: Optional[str]) -> List[Tuple[Optional[str], object]]:
+        # Курс, найденный по паре, заодно кладётся и под ключ своего id
+        entries = [(cache_key, exchange_rate)]
+        if exchange_rate.id:
+            entries.append((self._get_cache_key_by_id(exchange_rate.id, generation), exchange_rate))
+        return entries
+
+    def _warm_up_entries(self, exchange_rates_list: List[ExchangeRates],
+                         generation: Optional[str]) -> List[Tuple[Optional[str], object]]:
+        entries = [(self._get_cache_key_all(generation), exchange_rates_list)]
+        for exchange_rate in exchange_rates_list:
+            name = exchange_rate.base_currency.code + exchange_rate.target_currency.code
+            entries.append((self._get_cache_key_by_id(exchange_rate.id, generation), exchange_rate))
+            entries.append((self._get_cache_key_by_name(name, generation), exchange_rate))
+        return entries
+
+    @staticmethod
+    def _new_exchange_rate(exchange_rates: ExchangeRates) -> ExchangeRates:
+        return ExchangeRates(
+            base_currency=exchange_rates.base_currency,
+            target_currency=exchange_rates.target_currency,
+            rate=exchange_rates.rate
+        )
+
+    @staticmethod
+    def _rates_by_pair(pairs: List[Tuple[str, str]],
+                       found: Dict[str, Optional[ExchangeRates]]) -> Dict[Tuple[str, str], Optional[ExchangeRates]]:
+        return {pair: found[pair[0] + pair[1]] for pair in pairs}
+
+    def _cross_rate_as_of(self, exchange_rates_list: List[ExchangeRates],
+                          base_code: str, target_code: str) -> Optional[ExchangeRates]:
+        # Граф из всех курсов на момент as_of собирается только для кросс-курса, и пути в нём ищутся
+        # лишь из базовой валюты; общий граф и кэш текущих курсов не трогаются
+        graph = RateGraph(self.rate_graph.pivot_code)
+        graph.load(exchange_rates_list, source_codes=[base_code])
+        return graph.resolve(base_code, target_code)
+
+    def _refresh_rate_graph_entry(self, exchange_rate: Optional[ExchangeRates]) -> None:
+        # Граф правится на месте; если записи не нашлось, его перечитают целиком
+        if exchange_rate is not None:
+            self.rate_graph.upsert(exchange_rate)
+        else:
+            self.rate_graph.invalidate()
+
+    def _queue_bump(self, batch, rate_graph_changed: bool):
+        return self._queue_generation_bump(batch, *((RATE_GRAPH_VERSION_KEY,) if rate_graph_changed else ()))
+
+    def _bumped_generation(self, results: list, rate_graph_changed: bool) -> Optional[int]:
+        # Возвращает новую версию графа для сообщения шины; свой граф уже содержит изменение
+        self._remember_bumped_generation(results[0])
+        if not rate_graph_changed:
+            return None
+        graph_version = int(results[2])
+        self.rate_graph.advance(graph_version)
+        return graph_version
+
+    def _bump_failed(self, rate_graph_changed: bool) -> None:
+        # Версия графа в Redis не сдвинулась: остальные процессы правку не увидят, свой граф перечитывается
+        if rate_graph_changed:
+            self.rate_graph.invalidate()
+
+    def _rate_graph_check_due(self) -> bool:
+        # Загруженный граф сверяется с версией в Redis не чаще rate_graph_check_interval,
+        # после неудачной перезагрузки новая попытка - не раньше rate_graph_retry_interval
+        now = time.monotonic()
+        failed_at = self._rate_graph_failed_at
+        if self.rate_graph.loaded:
+            if now - self._rate_graph_checked_at < self.rate_graph_check_interval:
+                return False
+        elif failed_at is not None and now - failed_at < self.rate_graph_retry_interval:
+            return False
+        self._rate_graph_checked_at = now
+        return True
+
+    def _serving_rate_graph_snapshot(self) -> bool:
+        # Пока другой запрос перестраивает граф, остальные читают прежний снимок, а не ждут его
+        return self.rate_graph.has_snapshot and self.single_flight.in_flight(RATE_GRAPH_RELOAD_KEY)
+
+    def _rate_graph_reload_failed(self) -> None:
+        self._rate_graph_failed_at = time.monotonic()
+        self.rate_graph.invalidate()
+
+    def _load_rate_graph_rows(self, exchange_rates_list: List[ExchangeRates], version: Optional[int]) -> None:
+        self.rate_graph.load(exchange_rates_list, version)
+        self._rate_graph_checked_at = time.monotonic()
+        self._rate_graph_failed_at = None
+
+    @staticmethod
+    def _parse_rate_graph_version(value) -> int:
+        return int(value) if value else 0
+
+
+class ExchangeRatesServiceImpl(ExchangeRatesCacheSupport, ExchangeRatesService):
 
     def __init__(self, exchange_rates_repository):
         self.exchange_rates_repository = exchange_rates_repository
         self.redis_client = get_redis_client()
-        self.cache_ttl = 3600  
+        self.cache_policies = get_cache_policies()
+        self.cache_codec = get_cache_codec()
+        self.refresher = get_background_refresher()
+        self.local_cache = get_local_cache()
+        self.invalidation_bus = get_invalidation_bus()
+        self.single_flight = get_single_flight()
+        self.rate_graph = get_rate_graph()
+        self.rate_graph_check_interval = 1.0
+        self.rate_graph_retry_interval = 5.0
+        self._rate_graph_checked_at = 0.0
+        self._rate_graph_failed_at: Optional[float] = None
+
+    def find_rate(self, base_code: str, target_code: str) -> Optional[ExchangeRates]:
+        if self._ensure_rate_graph_fresh():
+            return self.rate_graph.resolve(base_code, target_code)
+        return self.find_by_name(base_code + target_code)
+
+    def find_rate_as_of(self, base_code: str, target_code: str, as_of: datetime) -> Optional[ExchangeRates]:
+        # Прямая и обратная пара - по спуску в индексе истории, граф - только для кросс-курса
+        direct = self.exchange_rates_repository.find_by_codes_as_of(base_code, target_code, as_of)
+        if direct is not None:
+            return direct
+        inverse = invert_rate(self.exchange_rates_repository.find_by_codes_as_of(target_code, base_code, as_of))
+        if inverse is not None:
+            return inverse
+        return self._cross_rate_as_of(self.exchange_rates_repository.find_all_as_of(as_of), base_code, target_code)
+
+    def find_by_name_as_of(self, name: str, as_of: datetime) -> Optional[ExchangeRates]:
+        return self.exchange_rates_repository.find_by_name_as_of(name, as_of)
+
+    def find_ohlc(self, interval: str, start: datetime, end: datetime,
+                  name: Optional[str] = None) -> List[OhlcSeries]:
+        # Свечи уже посчитаны триггером в БД: читается только нужный диапазон по первичному ключу, мимо кэша
+        return self.exchange_rates_repository.find_ohlc(interval, start, end, name)
+
+    def find_rates(self, pairs: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[ExchangeRates]]:
+        pairs = list(dict.fromkeys(pairs))
+        if self._ensure_rate_graph_fresh():
+            return {pair: self.find_rate(*pair) for pair in pairs}
+        # Без графа курсы берутся из кэша пачкой, а не по одному запросу к Redis на пару
+        return self._rates_by_pair(pairs, self.find_by_names(base + target for base, target in pairs))
+
+    def find_by_names(self, names: Iterable[str]) -> Dict[str, Optional[ExchangeRates]]:
+        # Курсы, которых нет в L1, читаются из Redis одним MGET; в БД идут только промахи
+        generation = self._get_generation()
+        keys = self._get_cache_keys_by_name(names, generation)
+        loaders = self._by_name_loaders(keys, generation)
+        cached = self._get_many_from_cache({key: loaders[name] for name, key in keys.items() if key is not None})
+        rates = {}
+        for name, key in keys.items():
+            rates[name] = cached.get(key) or self.single_flight.do(
+                key, loaders[name], self.redis_client, lambda: self._get_from_cache(key)
+            )
+        return rates
+
+    def warm_up(self, batch: CacheBatch) -> int:
+        # Один find_all загружает граф курсов и ставит ключи списка, id и пары в общий пакет
+        generation = self._get_generation()
+        version = self._get_rate_graph_version()
+        started = time.monotonic()
+        exchange_rates_list = self.exchange_rates_repository.find_all()
+        delta = time.monotonic() - started
+        self._load_rate_graph_rows(exchange_rates_list, version)
+        return self._queue_cache_entries(batch, self._warm_up_entries(exchange_rates_list, generation), delta)
+
+    def load_rate_graph(self, version: Optional[int] = None) -> None:
+        if version is None:
+            version = self._get_rate_graph_version()
+        self._load_rate_graph_rows(self.exchange_rates_repository.find_all(), version)
 
     def find_all(self) -> List[ExchangeRates]:
-        cache_key = self._get_cache_key_all()
-        cached_value = self._get_from_cache_list(cache_key)
+        cache_key = self._get_cache_key_all(self._get_generation())
+        cached_value = self._get_from_cache_list(cache_key, lambda: self._load_all(cache_key))
         if cached_value is not None:
             return cached_value
-        
+        return self.single_flight.do(
+            cache_key, lambda: self._load_all(cache_key), self.redis_client,
+            lambda: self._get_from_cache_list(cache_key)
+        )
+
+    def find_all_rendered(self, render: Callable[[List[ExchangeRates]], bytes]) -> RenderedResponse:
+        cache_key = self._get_cache_key_all_rendered(self._get_generation())
+        rendered = self._local_rendered(cache_key)
+        if rendered is None:
+            rendered = self._remember_rendered(cache_key, render(self.find_all()))
+        return rendered
+
+    def iter_export(self, chunk_size: int = 1000) -> Iterator[List[ExchangeRates]]:
+        # Выгрузка идёт мимо кэша: полный набор в Redis и L1 не кладётся
+        return self.exchange_rates_repository.iter_chunks(chunk_size)
+
+    def find_page(self, page: PageRequest) -> Page[ExchangeRates]:
+        # Страница кэшируется целиком по курсору; лишняя (limit + 1) строка хранится вместе с ней
+        cache_key = self._get_cache_key_page(page, self._get_generation())
+        rows = self._get_from_cache_list(cache_key, lambda: self._load_page(page, cache_key))
+        if rows is None:
+            rows = self.single_flight.do(
+                cache_key, lambda: self._load_page(page, cache_key), self.redis_client,
+                lambda: self._get_from_cache_list(cache_key)
+            )
+        return page.to_page(rows)
+
+    def _load_page(self, page: PageRequest, cache_key: Optional[str]) -> List[ExchangeRates]:
+        started = time.monotonic()
+        rows = self.exchange_rates_repository.find_page(page)
+        delta = time.monotonic() - started
+        self._set_to_cache_list(cache_key, rows, delta)
+        return rows
+
+    def _load_all(self, cache_key: Optional[str]) -> List[ExchangeRates]:
+        started = time.monotonic()
         exchange_rates_list = self.exchange_rates_repository.find_all()
+        delta = time.monotonic() - started
         if exchange_rates_list:
-            self._set_to_cache_list(cache_key, exchange_rates_list)
+            self._set_to_cache_list(cache_key, exchange_rates_list, delta)
         return exchange_rates_list
 
-    def delete_by_id(self, id: int) -> None:
-        exchange_rate = self.exchange_rates_repository.find_by_id(id)
-        self.exchange_rates_repository.delete(id)
-        self._delete_from_cache(self._get_cache_key_by_id(id))
-        if exchange_rate and exchange_rate.base_currency and exchange_rate.target_currency:
-            if exchange_rate.base_currency.code and exchange_rate.target_currency.code:
-                name_key = f"{exchange_rate.base_currency.code}{exchange_rate.target_currency.code}"
-                self._delete_from_cache(self._get_cache_key_by_name(name_key))
-        self._clear_all_cache()
-
-    def update_exchange_rate(self, exchange_rates: ExchangeRates, id: int) -> None:
-        old_exchange = self.exchange_rates_repository.find_by_id(id)
-        exchange_to_be_updated = self.exchange_rates_repository.find_by_id(id)
-        exchange_to_be_updated.rate = exchange_rates.rate
-        exchange_to_be_updated.base_currency = exchange_rates.base_currency
-        exchange_to_be_updated.target_currency = exchange_rates.target_currency
-        self.exchange_rates_repository.update(exchange_to_be_updated, id)
-        self._clear_all_cache()
-
+    def delete_by_id(self, id: int) -> Optional[ExchangeRates]:
+        # Строка из DELETE ... RETURNING решает, нужна ли инвалидация; None - удалять было нечего
+        deleted = self.exchange_rates_repository.delete(id)
+        if deleted is not None:
+            self.rate_graph.remove_by_id(id)
+            self._bump_generation(rate_graph_changed=True)
+        return deleted
 
+    def update_exchange_rate(self, exchange_rates: ExchangeRates, id: int) -> Optional[ExchangeRates]:
+        # UPDATE ... RETURNING отдаёт курс с валютами, им граф правится на месте без повторного чтения
+        updated = self.exchange_rates_repository.update(exchange_rates, id)
+        if updated is not None:
+            self.rate_graph.upsert(updated)
+            self._bump_generation(rate_graph_changed=True)
+        return updated
 
     def create_exchange_rate(self, exchange_rates: ExchangeRates) -> None:
-        new_exchange_rates = ExchangeRates(
-            base_currency=exchange_rates.base_currency,
-            target_currency=exchange_rates.target_currency,
-            rate=exchange_rates.rate
-        )
-        self.exchange_rates_repository.create(new_exchange_rates)
-        self._clear_all_cache()
+        # INSERT ... RETURNING отдаёт курс с валютами: граф правится на месте без повторного чтения
+        created = self.exchange_rates_repository.create(self._new_exchange_rate(exchange_rates))
+        self._refresh_rate_graph_entry(created)
+        self._bump_generation(rate_graph_changed=True)
+
+    def upsert_exchange_rates(self, rates: List[Tuple[str, str, Decimal]]) -> UpsertResult[ExchangeRates]:
+        # Весь лист - одна транзакция и одна инвалидация; если ни один курс не изменился, кэш не трогается
+        result = self.exchange_rates_repository.upsert_by_codes(rates)
+        if result.changed:
+            self.rate_graph.upsert_many(result.changed)
+            self._bump_generation(rate_graph_changed=True)
+        return result
 
     def find_by_id(self, id: int) -> Optional[ExchangeRates]:
-        cache_key = self._get_cache_key_by_id(id)
-        cached_value = self._get_from_cache(cache_key)
+        cache_key = self._get_cache_key_by_id(id, self._get_generation())
+        cached_value = self._get_from_cache(cache_key, lambda: self._load_by_id(id, cache_key))
         if cached_value:
             return cached_value
-        
+        return self.single_flight.do(
+            cache_key, lambda: self._load_by_id(id, cache_key), self.redis_client,
+            lambda: self._get_from_cache(cache_key)
+        )
+
+    def _load_by_id(self, id: int, cache_key: Optional[str]) -> Optional[ExchangeRates]:
+        started = time.monotonic()
         exchange_rate = self.exchange_rates_repository.find_by_id(id)
+        delta = time.monotonic() - started
         if exchange_rate:
-            self._set_to_cache(cache_key, exchange_rate)
+            self._set_to_cache(cache_key, exchange_rate, delta)
         return exchange_rate
 
     def find_by_name(self, name: str) -> Optional[ExchangeRates]:
-        cache_key = self._get_cache_key_by_name(name)
-        cached_value = self._get_from_cache(cache_key)
+        generation = self._get_generation()
+        cache_key = self._get_cache_key_by_name(name, generation)
+        cached_value = self._get_from_cache(cache_key, lambda: self._load_by_name(name, generation, cache_key))
         if cached_value:
             return cached_value
-        
+        return self.single_flight.do(
+            cache_key, lambda: self._load_by_name(name, generation, cache_key), self.redis_client,
+            lambda: self._get_from_cache(cache_key)
+        )
+
+    def _load_by_name(self, name: str, generation: Optional[str], cache_key: Optional[str]) -> Optional[ExchangeRates]:
+        started = time.monotonic()
         exchange_rate = self.exchange_rates_repository.find_by_name(name)
+        delta = time.monotonic() - started
         if exchange_rate:
-            self._set_to_cache(cache_key, exchange_rate)
-            if exchange_rate.id:
-                id_cache_key = self._get_cache_key_by_id(exchange_rate.id)
-                self._set_to_cache(id_cache_key, exchange_rate)
-        return exchange_rate
-
-    def _get_cache_key_by_id(self, id: int) -> str:
-        return f"exchange_rate:id:{id}"
-
-    def _get_cache_key_by_name(self, name: str) -> str:
-        return f"exchange_rate:name:{name}"
-
-    def _get_cache_key_all(self) -> str:
-        return "exchange_rate:all"
-
-    def _currency_to_dict(self, currency: Currency) -> dict:
-        return {
-            "id": currency.id,
-            "code": currency.code,
-            "fullname": currency.fullname,
-            "sign": currency.sign
-        }
-
-    def _dict_to_currency(self, data: dict) -> Currency:
-        currency = Currency()
-        currency.id = data.get("id")
-        currency.code = data.get("code")
-        currency.fullname = data.get("fullname")
-        currency.sign = data.get("sign")
-        return currency
-
-    def _exchange_rates_to_dict(self, exchange_rate: ExchangeRates) -> dict:
-        return {
-            "id": exchange_rate.id,
-            "rate": str(exchange_rate.rate) if exchange_rate.rate else None,
-            "base_currency": self._currency_to_dict(exchange_rate.base_currency) if exchange_rate.base_currency else None,
-            "target_currency": self._currency_to_dict(exchange_rate.target_currency) if exchange_rate.target_currency else None
-        }
-
-    def _dict_to_exchange_rates(self, data: dict) -> ExchangeRates:
-        exchange_rate = ExchangeRates()
-        exchange_rate.id = data.get("id")
-        exchange_rate.rate = Decimal(str(data.get("rate"))) if data.get("rate") else None
-        base_currency_data = data.get("base_currency")
-        if base_currency_data:
-            exchange_rate.base_currency = self._dict_to_currency(base_currency_data)
-        target_currency_data = data.get("target_currency")
-        if target_currency_data:
-            exchange_rate.target_currency = self._dict_to_currency(target_currency_data)
+            self._set_many_to_cache(self._by_name_entries(cache_key, exchange_rate, generation), delta)
         return exchange_rate
 
-    def _get_from_cache(self, key: str) -> Optional[ExchangeRates]:
+    def _get_from_cache(self, key: str, refresh: Optional[Callable[[], object]] = None) -> Optional[ExchangeRates]:
+        if key is None:
+            return None
+        local_value = self.local_cache.get(key)
+        if local_value is not None:
+            return local_value
         try:
-            cached_data = self.redis_client.get(key)
-            if cached_data:
-                data = json.loads(cached_data)
-                return self._dict_to_exchange_rates(data)
+            return self._cached_value(key, self.redis_client.get(key), refresh)
         except Exception as e:
-            pass
-        return None
+            return None
 
-    def _get_from_cache_list(self, key: str) -> Optional[List[ExchangeRates]]:
-        try:
-            cached_data = self.redis_client.get(key)
-            if cached_data:
-                data_list = json.loads(cached_data)
-                return [self._dict_to_exchange_rates(item) for item in data_list]
-        except Exception as e:
-            pass
-        return None
+    def _get_from_cache_list(self, key: str, refresh: Optional[Callable[[], object]] = None) -> Optional[List[ExchangeRates]]:
+        return self._get_from_cache(key, refresh)
 
-    def _set_to_cache(self, key: str, exchange_rate: ExchangeRates) -> None:
+    def _get_many_from_cache(self, refreshers: Dict[str, Optional[Callable[[], object]]]) -> Dict[str, ExchangeRates]:
+        # refreshers: ключ -> загрузчик для фонового обновления, если запись в Redis устарела
+        values, missing = self._split_local(refreshers)
         try:
-            data = self._exchange_rates_to_dict(exchange_rate)
-            json_data = json.dumps(data, ensure_ascii=False)
-            self.redis_client.setex(key, self.cache_ttl, json_data)
+            values.update(self._cached_values(missing, CacheBatch(self.redis_client).get_many(missing), refreshers))
         except Exception as e:
             pass
+        return values
+
+    def _set_to_cache(self, key: str, exchange_rate: ExchangeRates, delta: float = 0.0) -> None:
+        self._set_many_to_cache([(key, exchange_rate)], delta)
+
+    def _set_to_cache_list(self, key: str, exchange_rates_list: List[ExchangeRates], delta: float = 0.0) -> None:
+        self._set_many_to_cache([(key, exchange_rates_list)], delta)
 
-    def _set_to_cache_list(self, key: str, exchange_rates_list: List[ExchangeRates]) -> None:
+    def _set_many_to_cache(self, entries: List[Tuple[Optional[str], object]], delta: float = 0.0) -> None:
+        batch = CacheBatch(self.redis_client)
         try:
-            data_list = [self._exchange_rates_to_dict(er) for er in exchange_rates_list]
-            json_data = json.dumps(data_list, ensure_ascii=False)
-            self.redis_client.setex(key, self.cache_ttl, json_data)
+            self._queue_cache_entries(batch, entries, delta)
+            batch.execute()
         except Exception as e:
             pass
 
-    def _delete_from_cache(self, key: str) -> None:
+    def _get_generation(self) -> Optional[str]:
+        generation = self._local_generation()
+        if generation is None:
+            try:
+                generation = self._remember_generation(self.redis_client.mget(self.generation_keys))
+            except Exception as e:
+                pass
+        return generation
+
+    def _bump_generation(self, rate_graph_changed: bool = False) -> None:
+        batch = self._queue_bump(CacheBatch(self.redis_client, transaction=True), rate_graph_changed)
         try:
-            self.redis_client.delete(key)
+            results = batch.execute()
         except Exception as e:
-            pass
+            self._bump_failed(rate_graph_changed)
+            return
+        graph_version = self._bumped_generation(results, rate_graph_changed)
+        self.invalidation_bus.publish(self.redis_client, [self.generation_keys[0]], graph_version, sequence=results[1])
+
+    def _ensure_rate_graph_fresh(self) -> bool:
+        # True - граф можно читать: он свежий или это прежний снимок на время перезагрузки
+        if self._serving_rate_graph_snapshot():
+            return True
+        if self._rate_graph_check_due():
+            version = self._get_rate_graph_version()
+            if self.rate_graph.is_stale(version):
+                try:
+                    self.single_flight.do(RATE_GRAPH_RELOAD_KEY, lambda: self._reload_rate_graph(version))
+                except Exception as e:
+                    self._rate_graph_reload_failed()
+        return self.rate_graph.loaded
 
-    def _clear_all_cache(self) -> None:
-        self._delete_from_cache(self._get_cache_key_all())
-    
+    def _reload_rate_graph(self, version: Optional[int]) -> None:
+        # Граф мог перезагрузить предыдущий лидер, пока этот запрос читал версию
+        if self.rate_graph.is_stale(version):
+            self.load_rate_graph(version)
 
+    def _get_rate_graph_version(self) -> Optional[int]:
+        try:
+            return self._parse_rate_graph_version(self.redis_client.get(RATE_GRAPH_VERSION_KEY))
+        except Exception as e:
+            return None
@@ -0,0 +1,315 @@
+import os
+import threading
+from collections import deque
+from decimal import Decimal
+from typing import Dict, List, Optional, Set, Tuple
+from ..models.currency import Currency
+from ..models.exchange_rates import ExchangeRates
+
+RATE_GRAPH_VERSION_KEY = "exchange_rate:graph:version"
+# Ключ single-flight перезагрузки графа: одновременно граф перестраивает один запрос процесса
+RATE_GRAPH_RELOAD_KEY = "exchange_rate:graph:reload"
+
+# Шаг пути: (a, b, inverse) - ребро a -> b из таблицы курсов, inverse=True значит идём по нему в обратную сторону
+Hop = Tuple[int, int, bool]
+
+
+class _RateGraphState:
+    __slots__ = ('index', 'currencies', 'rates', 'entries', 'paths', 'pairs_by_edge')
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.currencies: List[Currency] = []
+        self.rates: Dict[int, Dict[int, Decimal]] = {}
+        self.entries: Dict[Tuple[int, int], ExchangeRates] = {}
+        self.paths: Dict[Tuple[int, int], Tuple[List[Hop], Decimal]] = {}
+        self.pairs_by_edge: Dict[Tuple[int, int], Set[Tuple[int, int]]] = {}
+
+    def copy(self) -> '_RateGraphState':
+        state = _RateGraphState()
+        state.index = dict(self.index)
+        state.currencies = list(self.currencies)
+        state.rates = {i: dict(row) for i, row in self.rates.items()}
+        state.entries = dict(self.entries)
+        state.paths = dict(self.paths)
+        state.pairs_by_edge = self.pairs_by_edge
+        return state
+
+    def index_of(self, currency: Currency) -> int:
+        i = self.index.get(currency.code)
+        if i is None:
+            i = len(self.currencies)
+            self.index[currency.code] = i
+            self.currencies.append(currency)
+        else:
+            self.currencies[i] = currency
+        return i
+
+    def put(self, exchange_rate: ExchangeRates) -> Tuple[int, int]:
+        i = self.index_of(exchange_rate.base_currency)
+        j = self.index_of(exchange_rate.target_currency)
+        self.rates.setdefault(i, {})[j] = exchange_rate.rate
+        self.entries[(i, j)] = exchange_rate
+        return i, j
+
+    def pop(self, i: int, j: int) -> Optional[ExchangeRates]:
+        row = self.rates.get(i)
+        if row is not None:
+            row.pop(j, None)
+        return self.entries.pop((i, j), None)
+
+    def path_rate(self, hops: List[Hop]) -> Decimal:
+        # Делим один раз в конце, чтобы USD->EUR 0.9 и USD->RUB 90 давали EUR->RUB ровно 100
+        numerator = Decimal(1)
+        denominator = Decimal(1)
+        for a, b, inverse in hops:
+            if inverse:
+                denominator *= self.rates[a][b]
+            else:
+                numerator *= self.rates[a][b]
+        return numerator / denominator
+
+    def build_paths(self, pivot: Optional[int], sources: Optional[List[int]] = None) -> None:
+        # BFS из каждой валюты (или только из sources): кратчайший по числу шагов путь,
+        # среди равных - прямые рёбра и путь через pivot
+        adjacency: Dict[int, List[Tuple[int, Hop]]] = {}
+        for (a, b), rate in ((edge, self.rates[edge[0]][edge[1]]) for edge in self.entries):
+            adjacency.setdefault(a, []).append((b, (a, b, False)))
+            if rate:
+                adjacency.setdefault(b, []).append((a, (a, b, True)))
+        for neighbours in adjacency.values():
+            neighbours.sort(key=lambda item: (item[0] != pivot, item[1][2]))
+
+        paths = {}
+        pairs_by_edge: Dict[Tuple[int, int], Set[Tuple[int, int]]] = {}
+        for source in (adjacency if sources is None else [i for i in sources if i in adjacency]):
+            previous: Dict[int, Optional[Tuple[int, Hop]]] = {source: None}
+            queue = deque([source])
+            while queue:
+                u = queue.popleft()
+                for v, hop in adjacency.get(u, ()):
+                    if v not in previous:
+                        previous[v] = (u, hop)
+                        queue.append(v)
+            for target in previous:
+                if target == source:
+                    continue
+                hops = []
+                node = target
+                while node != source:
+                    node, hop = previous[node]
+                    hops.append(hop)
+                hops.reverse()
+                paths[(source, target)] = (hops, self.path_rate(hops))
+                for a, b, _ in hops:
+                    pairs_by_edge.setdefault((a, b), set()).add((source, target))
+        self.paths = paths
+        self.pairs_by_edge = pairs_by_edge
+
+    def refresh_paths_through(self, edge: Tuple[int, int]) -> None:
+        for pair in self.pairs_by_edge.get(edge, ()):
+            hops, _ = self.paths[pair]
+            self.paths[pair] = (hops, self.path_rate(hops))
+
+
+class RateGraph:
+    """Матрица курсов в памяти процесса: код валюты -> индекс, смежность i -> j -> rate.
+
+    Для каждой пары валют заранее считается кратчайший путь по графу (прямой, обратный
+    или кросс-курс через промежуточные валюты), поэтому кросс-курс стоит столько же,
+    сколько прямой. invalidate() снимает loaded, но оставляет прежнее состояние: has_snapshot
+    говорит, что его можно читать, пока граф перестраивается.
+    """
+
+    def __init__(self, pivot_code: Optional[str] = None):
+        self._state = _RateGraphState()
+        self._write_lock = threading.Lock()
+        self.pivot_code = pivot_code
+        self.version = 0
+        self.loaded = False
+        self.has_snapshot = False
+
+    def load(self, exchange_rates_list: List[ExchangeRates], version: Optional[int] = None,
+             source_codes: Optional[List[str]] = None) -> None:
+        # source_codes ограничивает пути парами из этих валют: для разового графа не нужен BFS из всех вершин
+        state = _RateGraphState()
+        for exchange_rate in exchange_rates_list:
+            if self._is_complete(exchange_rate):
+                state.put(exchange_rate)
+        sources = None
+        if source_codes is not None:
+            sources = [state.index[code] for code in source_codes if code in state.index]
+        state.build_paths(state.index.get(self.pivot_code), sources)
+        with self._write_lock:
+            self._state = state
+            if version is not None:
+                self.version = version
+            self.loaded = True
+            self.has_snapshot = True
+
+    def upsert(self, exchange_rate: ExchangeRates) -> None:
+        self.upsert_many([exchange_rate])
+
+    def upsert_many(self, exchange_rates_list: List[ExchangeRates]) -> None:
+        # Пачка курсов применяется к одной копии состояния, пути пересчитываются один раз
+        exchange_rates_list = [er for er in exchange_rates_list if self._is_complete(er)]
+        if not exchange_rates_list:
+            return
+        with self._write_lock:
+            state = self._state.copy()
+            edges_by_id = {entry.id: edge for edge, entry in state.entries.items()}
+            changed_edges = []
+            rebuild = False
+            for exchange_rate in exchange_rates_list:
+                old_edge = edges_by_id.get(exchange_rate.id)
+                if old_edge is None:
+                    old_edge = (
+                        state.index.get(exchange_rate.base_currency.code),
+                        state.index.get(exchange_rate.target_currency.code)
+                    )
+                old_rate = state.rates.get(old_edge[0], {}).get(old_edge[1])
+                if old_rate is not None:
+                    state.pop(*old_edge)
+                new_edge = state.put(exchange_rate)
+                edges_by_id[exchange_rate.id] = new_edge
+                if old_edge == new_edge and old_rate and exchange_rate.rate:
+                    changed_edges.append(new_edge)
+                else:
+                    rebuild = True
+            if rebuild:
+                state.build_paths(state.index.get(self.pivot_code))
+            else:
+                # Изменились только курсы: пересчитываем лишь пары, чей путь проходит через эти рёбра
+                for edge in changed_edges:
+                    state.refresh_paths_through(edge)
+            self._state = state
+
+    def remove_by_id(self, id: int) -> Optional[ExchangeRates]:
+        with self._write_lock:
+            state = self._state.copy()
+            edge = self._find_edge_by_id(state, id)
+            if edge is None:
+                return None
+            removed = state.pop(*edge)
+            state.build_paths(state.index.get(self.pivot_code))
+            self._state = state
+            return removed
+
+    def invalidate(self) -> None:
+        with self._write_lock:
+            self.loaded = False
+
+    def advance(self, new_version: int) -> None:
+        # Локальная версия сдвигается, только если между нашими изменениями никто другой не писал
+        with self._write_lock:
+            if self.loaded and new_version == self.version + 1:
+                self.version = new_version
+            else:
+                self.loaded = False
+
+    def apply_invalidation(self, message: Optional[dict]) -> None:
+        # Подписчик шины инвалидации: None - воркер пропустил сообщения, граф тоже надо перечитать
+        if message is None:
+            self.invalidate()
+            return
+        version = message.get("graph_version")
+        if version is not None and version != self.version:
+            self.invalidate()
+
+    def is_stale(self, version: Optional[int]) -> bool:
+        return not self.loaded or (version is not None and version != self.version)
+
+    def find(self, base_code: str, target_code: str) -> Optional[ExchangeRates]:
+        state = self._state
+        i = state.index.get(base_code)
+        j = state.index.get(target_code)
+        if i is None or j is None:
+            return None
+        return state.entries.get((i, j))
+
+    def get_rate(self, base_code: str, target_code: str) -> Optional[Decimal]:
+        state = self._state
+        i = state.index.get(base_code)
+        j = state.index.get(target_code)
+        if i is None or j is None:
+            return None
+        return state.rates.get(i, {}).get(j)
+
+    def resolve(self, base_code: str, target_code: str) -> Optional[ExchangeRates]:
+        state = self._state
+        i = state.index.get(base_code)
+        j = state.index.get(target_code)
+        if i is None or j is None:
+            return None
+        entry = state.entries.get((i, j))
+        if entry is not None:
+            return entry
+        path = state.paths.get((i, j))
+        if path is None:
+            return None
+        return ExchangeRates(
+            rate=path[1],
+            base_currency=state.currencies[i],
+            target_currency=state.currencies[j]
+        )
+
+    def resolve_path(self, base_code: str, target_code: str) -> Optional[List[str]]:
+        state = self._state
+        path = state.paths.get((state.index.get(base_code), state.index.get(target_code)))
+        if path is None:
+            return None
+        codes = [base_code]
+        for a, b, inverse in path[0]:
+            codes.append(state.currencies[a if inverse else b].code)
+        return codes
+
+    def stats(self) -> dict:
+        state = self._state
+        return {
+            "loaded": self.loaded,
+            "version": self.version,
+            "currencies": len(state.currencies),
+            "rates": len(state.entries),
+            "paths": len(state.paths)
+        }
+
+    def __len__(self) -> int:
+        return len(self._state.entries)
+
+    @staticmethod
+    def _find_edge_by_id(state: _RateGraphState, id: Optional[int]) -> Optional[Tuple[int, int]]:
+        if id is None:
+            return None
+        for edge, entry in state.entries.items():
+            if entry.id == id:
+                return edge
+        return None
+
+    @staticmethod
+    def _is_complete(exchange_rate: Optional[ExchangeRates]) -> bool:
+        return (
+            exchange_rate is not None
+            and exchange_rate.rate is not None
+            and exchange_rate.base_currency is not None
+            and exchange_rate.target_currency is not None
+            and exchange_rate.base_currency.code is not None
+            and exchange_rate.target_currency.code is not None
+        )
+
+
+def invert_rate(exchange_rate: Optional[ExchangeRates]) -> Optional[ExchangeRates]:
+    # Обратный курс так же, как путь из одного обратного ребра графа; нулевой курс не обращается
+    if exchange_rate is None or not exchange_rate.rate:
+        return None
+    return ExchangeRates(
+        rate=Decimal(1) / exchange_rate.rate,
+        base_currency=exchange_rate.target_currency,
+        target_currency=exchange_rate.base_currency
+    )
+
+
+_rate_graph = RateGraph(pivot_code=os.getenv('EXCHANGE_PIVOT_CURRENCY', 'USD'))
+
+
+def get_rate_graph() -> RateGraph:
+    return _rate_graph
@@ -0,0 +1,71 @@
+import time
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from src.services.async_currency_service import AsyncCurrencyServiceImpl
+from src.models.currency import Currency
+from src.cache.local_cache import LocalCache
+from src.cache.codec import CacheEntryCodec
+
+
+class TestAsyncCurrencyService:
+
+    @pytest.fixture
+    def mock_repository(self):
+        return AsyncMock()
+
+    @pytest.fixture
+    def mock_redis_client(self):
+        mock_client = AsyncMock()
+        mock_client.get.return_value = None
+        mock_client.mget.return_value = [None]
+        mock_client.setex.return_value = True
+        mock_client.delete.return_value = 1
+        mock_client.pipeline = Mock(return_value=Mock(execute=AsyncMock(return_value=[1, 1])))
+        return mock_client
+
+    @pytest.fixture
+    def currency_service(self, mock_repository, mock_redis_client):
+        with patch('src.services.async_currency_service.get_async_redis_client', return_value=mock_redis_client), \
+                patch('src.services.async_currency_service.get_local_cache', return_value=LocalCache()):
+            return AsyncCurrencyServiceImpl(mock_repository)
+
+    def test_find_by_id_cache_hit(self, currency_service, mock_repository, mock_redis_client):
+        mock_redis_client.get.return_value = CacheEntryCodec().dumps(
+            Currency(id=1, code="USD", fullname="US Dollar", sign="$"), time.time() + 600, 0.0
+        )
+
+        result = asyncio.run(currency_service.find_by_id(1))
+
+        assert result.code == "USD"
+        mock_redis_client.get.assert_awaited_once_with("currency:g0:id:1")
+        mock_repository.find_by_id.assert_not_awaited()
+
+    def test_find_by_id_cache_miss(self, currency_service, mock_repository, mock_redis_client):
+        mock_repository.find_by_id.return_value = Currency(id=1, code="USD", fullname="US Dollar", sign="$")
+
+        result = asyncio.run(currency_service.find_by_id(1))
+
+        assert result.code == "USD"
+        mock_repository.find_by_id.assert_awaited_once_with(1)
+        mock_redis_client.setex.assert_awaited_once()
+
+    def test_create_currency_bumps_generation(self, currency_service, mock_repository, mock_redis_client):
+        asyncio.run(currency_service.create_currency(Currency(code="EUR", fullname="Euro", sign="€")))
+
+        mock_repository.create.assert_awaited_once()
+        pipeline = mock_redis_client.pipeline.return_value
+        pipeline.incr.assert_any_call("cache:gen:currency")
+        pipeline.execute.assert_awaited_once()
+        mock_redis_client.delete.assert_not_awaited()
+
+    def test_find_by_name_miss_caches_code_and_id_keys(self, currency_service, mock_repository, mock_redis_client):
+        mock_repository.find_by_name.return_value = Currency(id=1, code="USD", fullname="US Dollar", sign="$")
+        pipeline = mock_redis_client.pipeline.return_value
+
+        result = asyncio.run(currency_service.find_by_name("USD"))
+
+        assert result.id == 1
+        keys = [call.args[0] for call in pipeline.setex.call_args_list]
+        assert keys == ["currency:g0:code:USD", "currency:g0:id:1"]
+        assert currency_service.local_cache.get("currency:g0:id:1").code == "USD"
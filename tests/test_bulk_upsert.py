@@ -0,0 +1,133 @@
+import pytest
+from decimal import Decimal
+from unittest.mock import MagicMock, Mock, patch
+from contextlib import contextmanager
+from src.models.currency import Currency
+from src.models.exchange_rates import ExchangeRates
+from src.models.upsert_result import UpsertResult
+from src.repositories.currency_repository import CurrencyRepository
+from src.repositories.exchange_rates_repository import ExchangeRatesRepository
+from src.services.currency_service import CurrencyServiceImpl
+from src.services.exchange_rates_service import ExchangeRatesServiceImpl
+from src.services.rate_graph import RateGraph
+from src.cache.local_cache import LocalCache
+
+CURRENCY_ROWS = [
+    {"id": 1, "code": "USD", "fullname": "US Dollar", "sign": "$"},
+    {"id": 2, "code": "EUR", "fullname": "Euro", "sign": "€"}
+]
+
+
+class TestExchangeRatesRepositoryUpsert:
+
+    @pytest.fixture
+    def connection(self):
+        return MagicMock()
+
+    @pytest.fixture
+    def repository(self, connection):
+        @contextmanager
+        def data_source():
+            yield connection
+
+        repository = ExchangeRatesRepository()
+        repository.data_source = data_source
+        return repository
+
+    def test_sheet_is_written_by_one_statement(self, repository, connection):
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.fetchall.side_effect = [
+            CURRENCY_ROWS,
+            [{"id": 7, "basecurrencyid": 1, "targetcurrencyid": 2, "rate": Decimal("0.9"), "inserted": False}]
+        ]
+
+        result = repository.upsert_by_codes([
+            ("USD", "EUR", Decimal("0.8")), ("USD", "EUR", Decimal("0.9")), ("EUR", "USD", Decimal("1.1"))
+        ])
+
+        assert (result.created, result.updated, result.unchanged) == (0, 1, 1)
+        assert result.changed[0].base_currency.code == "USD"
+        assert cursor.execute.call_count == 2
+        assert cursor.execute.call_args.args[1] == ([1, 2], [2, 1], [Decimal("0.9"), Decimal("1.1")])
+        connection.commit.assert_called_once()
+
+    def test_unknown_code_writes_nothing(self, repository, connection):
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.fetchall.return_value = CURRENCY_ROWS
+
+        result = repository.upsert_by_codes([("USD", "XXX", Decimal("1"))])
+
+        assert result.unknown_codes == ["XXX"]
+        assert cursor.execute.call_count == 1
+        connection.commit.assert_not_called()
+
+
+class TestExchangeRatesServiceUpsert:
+
+    @pytest.fixture
+    def mock_repository(self):
+        return Mock()
+
+    @pytest.fixture
+    def exchange_rates_service(self, mock_repository):
+        with patch('src.services.exchange_rates_service.get_redis_client', return_value=Mock()), \
+                patch('src.services.exchange_rates_service.get_rate_graph', return_value=RateGraph()), \
+                patch('src.services.exchange_rates_service.get_local_cache', return_value=LocalCache()):
+            service = ExchangeRatesServiceImpl(mock_repository)
+        service._bump_generation = Mock()
+        return service
+
+    def test_changed_sheet_invalidates_once(self, exchange_rates_service, mock_repository):
+        usd = Currency(id=1, code="USD")
+        rates = [
+            ExchangeRates(id=1, rate=Decimal("0.9"), base_currency=usd, target_currency=Currency(id=2, code="EUR")),
+            ExchangeRates(id=2, rate=Decimal("90"), base_currency=usd, target_currency=Currency(id=3, code="RUB"))
+        ]
+        mock_repository.upsert_by_codes.return_value = UpsertResult(created=2, changed=rates)
+
+        exchange_rates_service.upsert_exchange_rates([])
+
+        exchange_rates_service._bump_generation.assert_called_once_with(rate_graph_changed=True)
+        assert len(exchange_rates_service.rate_graph) == 2
+
+    def test_unchanged_sheet_keeps_cache(self, exchange_rates_service, mock_repository):
+        mock_repository.upsert_by_codes.return_value = UpsertResult(unchanged=3)
+
+        exchange_rates_service.upsert_exchange_rates([])
+
+        exchange_rates_service._bump_generation.assert_not_called()
+
+
+class TestCurrencyBulkUpsert:
+
+    def test_repository_sends_one_insert_for_the_whole_list(self):
+        connection = MagicMock()
+
+        @contextmanager
+        def data_source():
+            yield connection
+
+        repository = CurrencyRepository()
+        repository.data_source = data_source
+        changed = [{"id": 5, "code": "GBP", "fullname": "Pound", "sign": "£", "inserted": True}]
+        currencies = [Currency(code="GBP", fullname="Pound", sign="£"), Currency(code="USD", fullname="US Dollar", sign="$")]
+
+        with patch('src.repositories.currency_repository.execute_values', return_value=changed) as execute_values:
+            result = repository.upsert_many(currencies)
+
+        assert (result.created, result.updated, result.unchanged) == (1, 0, 1)
+        assert result.changed[0].id == 5
+        assert execute_values.call_args.kwargs["page_size"] == 2
+        connection.commit.assert_called_once()
+
+    def test_new_currencies_do_not_invalidate_rate_graph(self):
+        repository = Mock()
+        repository.upsert_many.return_value = UpsertResult(created=1, changed=[Currency(id=5, code="GBP")])
+        with patch('src.services.currency_service.get_redis_client', return_value=Mock()), \
+                patch('src.services.currency_service.get_local_cache', return_value=LocalCache()):
+            service = CurrencyServiceImpl(repository)
+        service._bump_generation = Mock()
+
+        service.upsert_currencies([Currency(code="GBP")])
+
+        service._bump_generation.assert_called_once_with(rate_graph_changed=False)
@@ -0,0 +1,55 @@
+import pytest
+from decimal import Decimal
+from src.cache.codec import CacheEntryCodec
+from src.models.currency import Currency
+from src.models.exchange_rates import ExchangeRates
+
+
+class TestCacheEntryCodec:
+
+    @pytest.fixture
+    def exchange_rates_list(self):
+        usd = Currency(id=1, code="USD", fullname="US Dollar", sign="$")
+        eur = Currency(id=2, code="EUR", fullname="Euro", sign="€")
+        rub = Currency(id=3, code="RUB", fullname="Российский рубль", sign="₽")
+        return [
+            ExchangeRates(id=1, rate=Decimal("0.900000"), base_currency=usd, target_currency=eur),
+            ExchangeRates(id=2, rate=Decimal("90.5"), base_currency=usd, target_currency=rub)
+        ]
+
+    def test_exchange_rates_round_trip(self, exchange_rates_list):
+        codec = CacheEntryCodec()
+
+        raw = codec.dumps(exchange_rates_list, 1000.0, 0.25)
+        value, soft_expiry, delta = codec.loads(raw)
+
+        assert raw.startswith("t1|")
+        assert value == exchange_rates_list
+        assert str(value[0].rate) == "0.900000"
+        assert (soft_expiry, delta) == (1000.0, 0.25)
+
+    def test_currencies_are_stored_once(self, exchange_rates_list):
+        raw = CacheEntryCodec().dumps(exchange_rates_list, 1000.0, 0.0)
+
+        assert raw.count("US Dollar") == 1
+
+    def test_single_values_round_trip(self, exchange_rates_list):
+        codec = CacheEntryCodec()
+        currency = exchange_rates_list[0].target_currency
+
+        assert codec.loads(codec.dumps(currency, 0.0, 0.0))[0] == currency
+        assert codec.loads(codec.dumps(exchange_rates_list[1], 0.0, 0.0))[0] == exchange_rates_list[1]
+        assert codec.loads(codec.dumps([currency], 0.0, 0.0))[0] == [currency]
+
+    def test_large_entries_are_compressed(self, exchange_rates_list):
+        codec = CacheEntryCodec(compress_min_size=10)
+
+        raw = codec.dumps(exchange_rates_list, 1000.0, 0.0)
+
+        assert raw.startswith("t1.z|")
+        assert codec.loads(raw)[0] == exchange_rates_list
+
+    @pytest.mark.parametrize("raw", ['{"data": {"id": 1}, "soft": 1, "delta": 0}', "t9|[1,0,\"c\",[1]]"])
+    def test_unknown_format_is_rejected(self, raw):
+        with pytest.raises(ValueError):
+            CacheEntryCodec().loads(raw)
@@ -0,0 +1,56 @@
+import time
+import pytest
+from src.cache.policy import CachePolicy, CachePolicies
+
+
+class TestCachePolicies:
+
+    def test_policy_is_chosen_by_key_prefix(self):
+        policies = CachePolicies()
+
+        assert policies.for_key("exchange_rate:g1.2:all").soft_ttl == 120
+        assert policies.for_key("exchange_rate:g1.2:name:USDEUR").soft_ttl == 300
+        assert policies.for_key("currency:g2:code:USD").soft_ttl == 600
+        assert policies.for_key("unknown:key") is policies.default
+
+    def test_policies_from_env(self, monkeypatch):
+        monkeypatch.setenv("CACHE_POLICY_EXCHANGE_RATE_NAME", "30,600")
+        monkeypatch.setenv("CACHE_POLICY_DEFAULT", "10,100,2,0")
+
+        policies = CachePolicies.from_env()
+
+        assert policies.for_key("exchange_rate:g0.0:name:USDEUR") == CachePolicy(30, 600)
+        assert policies.default == CachePolicy(10, 100, beta=2, jitter=0)
+
+    def test_soft_ttl_above_hard_ttl_is_rejected(self):
+        with pytest.raises(ValueError):
+            CachePolicy.parse("7200,3600")
+
+
+class TestCachePolicy:
+
+    def test_fresh_entry_is_not_refreshed(self):
+        policy = CachePolicy(soft_ttl=600, hard_ttl=3600)
+
+        assert not policy.should_refresh(time.time() + 600, delta=0.0)
+
+    def test_entry_past_soft_ttl_is_refreshed(self):
+        policy = CachePolicy(soft_ttl=600, hard_ttl=3600)
+
+        assert policy.should_refresh(time.time() - 1, delta=0.0)
+
+    def test_slow_entries_are_refreshed_early(self):
+        policy = CachePolicy(soft_ttl=600, hard_ttl=3600, beta=1.0)
+        now = time.time()
+
+        refreshed = sum(policy.should_refresh(now + 1, delta=5.0, now=now) for _ in range(1000))
+
+        assert 500 < refreshed < 1000
+
+    def test_soft_expiry_is_jittered_within_bounds(self):
+        policy = CachePolicy(soft_ttl=100, hard_ttl=3600, jitter=0.1)
+
+        expiries = {policy.soft_expiry(now=0) for _ in range(50)}
+
+        assert all(90 <= expiry <= 100 for expiry in expiries)
+        assert len(expiries) > 1
@@ -1,7 +1,11 @@
+import time
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from src.services.currency_service import CurrencyServiceImpl
 from src.models.currency import Currency
+from src.cache.local_cache import LocalCache
+from src.cache.codec import CacheEntryCodec
+from src.models.page import PageRequest
 
 
 class TestCurrencyService:
@@ -14,13 +18,16 @@ class TestCurrencyService:
     def mock_redis_client(self):
         mock_client = Mock()
         mock_client.get.return_value = None
+        mock_client.mget.return_value = [None]
         mock_client.setex.return_value = True
         mock_client.delete.return_value = 1
+        mock_client.pipeline.return_value.execute.return_value = [1, 1, 1]
         return mock_client
 
     @pytest.fixture
     def currency_service(self, mock_repository, mock_redis_client):
-        with patch('src.services.currency_service.get_redis_client', return_value=mock_redis_client):
+        with patch('src.services.currency_service.get_redis_client', return_value=mock_redis_client), \
+                patch('src.services.currency_service.get_local_cache', return_value=LocalCache()):
             service = CurrencyServiceImpl(mock_repository)
             service.redis_client = mock_redis_client
             return service
@@ -29,13 +36,7 @@ class TestCurrencyService:
         currency_id = 1
         cached_currency = Currency(id=1, code="USD", fullname="US Dollar", sign="$")
         
-        import json
-        cached_data = json.dumps({
-            "id": 1,
-            "code": "USD",
-            "fullname": "US Dollar",
-            "sign": "$"
-        }, ensure_ascii=False)
+        cached_data = CacheEntryCodec().dumps(cached_currency, time.time() + 600, 0.0)
         mock_redis_client.get.return_value = cached_data
         
         result = currency_service.find_by_id(currency_id)
@@ -45,7 +46,7 @@ class TestCurrencyService:
         assert result.code == "USD"
         assert result.fullname == "US Dollar"
         assert result.sign == "$"
-        mock_redis_client.get.assert_called_once_with(f"currency:id:{currency_id}")
+        mock_redis_client.get.assert_called_once_with(f"currency:g0:id:{currency_id}")
         mock_repository.find_by_id.assert_not_called()
 
     def test_find_by_id_cache_miss(self, currency_service, mock_repository, mock_redis_client):
@@ -62,7 +63,7 @@ class TestCurrencyService:
         assert result.code == "USD"
         assert result.fullname == "US Dollar"
         assert result.sign == "$"
-        mock_redis_client.get.assert_called_once_with(f"currency:id:{currency_id}")
+        mock_redis_client.get.assert_called_once_with(f"currency:g0:id:{currency_id}")
         mock_repository.find_by_id.assert_called_once_with(currency_id)
         mock_redis_client.setex.assert_called_once()
 
@@ -79,7 +80,7 @@ class TestCurrencyService:
         assert created_currency.sign == "€"
         
 
-        mock_redis_client.delete.assert_called_once_with("currency:all")
+        mock_redis_client.pipeline.return_value.incr.assert_any_call("cache:gen:currency")
 
     def test_create_currency_with_none_values(self, currency_service, mock_repository, mock_redis_client):
 
@@ -93,5 +94,110 @@ class TestCurrencyService:
         assert created_currency.code == "GBP"
         assert created_currency.fullname is None
         assert created_currency.sign is None
-        mock_redis_client.delete.assert_called_once_with("currency:all")
+        mock_redis_client.pipeline.return_value.incr.assert_any_call("cache:gen:currency")
 
+    def test_find_by_id_served_from_local_cache(self, currency_service, mock_repository, mock_redis_client):
+        mock_repository.find_by_id.return_value = Currency(id=1, code="USD", fullname="US Dollar", sign="$")
+
+        first = currency_service.find_by_id(1)
+        second = currency_service.find_by_id(1)
+
+        assert second is first
+        mock_redis_client.get.assert_called_once_with("currency:g0:id:1")
+        mock_repository.find_by_id.assert_called_once_with(1)
+        mock_redis_client.mget.assert_called_once_with(("cache:gen:currency",))
+
+    def test_update_currency_switches_to_new_generation(self, currency_service, mock_repository, mock_redis_client):
+        mock_repository.find_by_id.return_value = Currency(id=1, code="USD", fullname="US Dollar", sign="$")
+        currency_service.find_by_id(1)
+
+        currency_service.update_currency(Currency(code="USD", fullname="Dollar", sign="$"), 1)
+        currency_service.find_by_id(1)
+
+        mock_redis_client.pipeline.assert_called_with(transaction=True)
+        mock_redis_client.pipeline.return_value.incr.assert_any_call("cache:gen:currency")
+        mock_redis_client.delete.assert_not_called()
+        assert [c.args[0] for c in mock_redis_client.get.call_args_list] == ["currency:g0:id:1", "currency:g1:id:1"]
+
+    def test_update_of_missing_currency_keeps_generation(self, currency_service, mock_repository, mock_redis_client):
+        mock_repository.update.return_value = None
+
+        result = currency_service.update_currency(Currency(code="USD", fullname="Dollar", sign="$"), 99)
+
+        assert result is None
+        mock_repository.find_by_id.assert_not_called()
+        mock_redis_client.pipeline.assert_not_called()
+
+    def test_stale_entry_is_served_and_refreshed_in_background(self, currency_service, mock_repository, mock_redis_client):
+        currency_service.refresher = Mock()
+        mock_redis_client.get.return_value = CacheEntryCodec().dumps(
+            Currency(id=1, code="USD", fullname="US Dollar", sign="$"), time.time() - 1, 0.0
+        )
+
+        result = currency_service.find_by_id(1)
+
+        assert result.code == "USD"
+        mock_repository.find_by_id.assert_not_called()
+        currency_service.refresher.submit.assert_called_once()
+        assert currency_service.refresher.submit.call_args[0][0] == "currency:g0:id:1"
+        assert currency_service.local_cache.get("currency:g0:id:1") is None
+
+    def test_find_all_rendered_is_reused_within_generation(self, currency_service, mock_repository, mock_redis_client):
+        mock_repository.find_all.return_value = [Currency(id=1, code="USD", fullname="US Dollar", sign="$")]
+        render = Mock(return_value=b'[{"id":1}]')
+
+        first = currency_service.find_all_rendered(render)
+        second = currency_service.find_all_rendered(render)
+
+        assert first is second
+        assert first.body == b'[{"id":1}]'
+        render.assert_called_once()
+
+        currency_service.update_currency(Currency(code="USD", fullname="Dollar", sign="$"), 1)
+        currency_service.find_all_rendered(render)
+
+        assert render.call_count == 2
+
+    def test_find_by_name_writes_both_keys_in_one_pipeline(self, currency_service, mock_repository, mock_redis_client):
+        mock_repository.find_by_name.return_value = Currency(id=1, code="USD", fullname="US Dollar", sign="$")
+
+        currency_service.find_by_name("USD")
+
+        pipeline = mock_redis_client.pipeline.return_value
+        mock_redis_client.pipeline.assert_called_once_with(transaction=False)
+        assert [c.args[0] for c in pipeline.setex.call_args_list] == ["currency:g0:code:USD", "currency:g0:id:1"]
+        pipeline.execute.assert_called_once()
+        mock_redis_client.setex.assert_not_called()
+
+    def test_warm_up_queues_all_id_and_code_keys(self, currency_service, mock_repository, mock_redis_client):
+        mock_repository.find_all.return_value = [
+            Currency(id=1, code="USD", fullname="US Dollar", sign="$"),
+            Currency(id=2, code="EUR", fullname="Euro", sign="€")
+        ]
+        batch = Mock()
+
+        queued = currency_service.warm_up(batch)
+
+        assert queued == 5
+        assert [c.args[0] for c in batch.setex.call_args_list] == [
+            "currency:g0:all", "currency:g0:id:1", "currency:g0:code:USD", "currency:g0:id:2", "currency:g0:code:EUR"
+        ]
+        assert currency_service.find_by_name("EUR").id == 2
+        mock_repository.find_by_name.assert_not_called()
+        mock_redis_client.get.assert_not_called()
+
+    def test_find_page_is_cached_by_cursor(self, currency_service, mock_repository, mock_redis_client):
+        mock_repository.find_page.return_value = [
+            Currency(id=1, code="USD", fullname="US Dollar", sign="$"),
+            Currency(id=2, code="EUR", fullname="Euro", sign="€")
+        ]
+        page = PageRequest.from_params(1, "id")
+
+        first = currency_service.find_page(page)
+        second = currency_service.find_page(page)
+
+        assert [c.code for c in first.items] == ["USD"]
+        assert first.next_cursor is not None
+        assert second.items == first.items
+        mock_repository.find_page.assert_called_once_with(page)
+        mock_redis_client.get.assert_called_once_with("currency:g0:page:id:::1:")
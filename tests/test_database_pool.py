@@ -0,0 +1,111 @@
+import asyncio
+import pytest
+import asyncpg
+import psycopg2
+from unittest.mock import AsyncMock, Mock, patch
+from src.config import async_database
+from src.config.database import ConnectionPool, PoolConfig, PoolTimeoutError
+
+
+class TestConnectionPool:
+
+    @pytest.fixture
+    def mock_connect(self):
+        def make_connection(**kwargs):
+            connection = Mock()
+            connection.closed = 0
+            connection.get_transaction_status.return_value = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+            return connection
+
+        with patch('src.config.database.psycopg2.connect', side_effect=make_connection) as mock:
+            yield mock
+
+    def test_connection_is_reused(self, mock_connect):
+        pool = ConnectionPool(PoolConfig(max_size=2))
+
+        first = pool.getconn()
+        pool.putconn(first)
+        second = pool.getconn()
+
+        assert first is second
+        assert mock_connect.call_count == 1
+        assert pool.stats()["in_use"] == 1
+
+    def test_open_creates_min_size_connections(self, mock_connect):
+        pool = ConnectionPool(PoolConfig(min_size=3, max_size=5))
+
+        pool.open()
+
+        stats = pool.stats()
+        assert mock_connect.call_count == 3
+        assert stats["idle"] == 3
+        assert stats["in_use"] == 0
+
+    def test_checkout_timeout_when_exhausted(self, mock_connect):
+        pool = ConnectionPool(PoolConfig(max_size=1, checkout_timeout=0.01))
+        pool.getconn()
+
+        with pytest.raises(PoolTimeoutError):
+            pool.getconn()
+        assert pool.stats()["timeouts"] == 1
+
+    def test_expired_connection_is_replaced(self, mock_connect):
+        pool = ConnectionPool(PoolConfig(max_size=1, max_lifetime=0))
+
+        first = pool.getconn()
+        pool.putconn(first)
+        second = pool.getconn()
+
+        assert first is not second
+        first.close.assert_called_once()
+        assert pool.stats()["size"] == 1
+
+    def test_health_check_discards_broken_connection(self, mock_connect):
+        pool = ConnectionPool(PoolConfig(max_size=1, health_check_interval=0))
+
+        first = pool.getconn()
+        pool.putconn(first)
+        first.cursor.side_effect = psycopg2.OperationalError("server closed the connection")
+        second = pool.getconn()
+
+        assert first is not second
+        assert pool.stats()["discarded"] == 1
+
+
+class TestAsyncPoolRecycling:
+
+    def make_connection(self, pid, fails=False):
+        connection = Mock()
+        connection.get_server_pid.return_value = pid
+        connection.is_closed.return_value = False
+        connection.execute = AsyncMock(
+            side_effect=asyncpg.ConnectionDoesNotExistError("connection was closed") if fails else None
+        )
+        return connection
+
+    def test_connection_older_than_max_lifetime_is_terminated(self):
+        old = self.make_connection(1)
+        new = self.make_connection(2)
+        pool = Mock()
+        pool.acquire = AsyncMock(side_effect=[old, new])
+        pool.release = AsyncMock()
+
+        async def run():
+            await async_database._register_connection(old)
+            await async_database._register_connection(new)
+            async_database._async_connections[1].created_at -= 10
+            return await async_database._acquire(pool, PoolConfig(max_lifetime=5))
+
+        with patch.dict(async_database._async_connections, clear=True):
+            assert asyncio.run(run()) is new
+            assert 1 not in async_database._async_connections
+        old.terminate.assert_called_once()
+        pool.release.assert_awaited_once_with(old)
+
+    def test_idle_connection_is_checked_before_use(self):
+        broken = self.make_connection(1, fails=True)
+        pooled = async_database._PooledConnection(broken)
+        config = PoolConfig(health_check_interval=0)
+
+        assert not asyncio.run(async_database._is_usable(pooled, broken, config))
+        broken.execute.assert_awaited_once_with("SELECT 1")
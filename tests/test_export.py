@@ -0,0 +1,64 @@
+import asyncio
+from decimal import Decimal
+from unittest.mock import MagicMock
+from contextlib import contextmanager
+from src.models.currency import Currency
+from src.models.exchange_rates import ExchangeRates
+from src.repositories.exchange_rates_repository import ExchangeRatesRepository
+from src.controllers.export import export_response, async_export_response
+
+USD = Currency(id=1, code="USD", fullname="US Dollar", sign="$")
+EUR = Currency(id=2, code="EUR", fullname="Euro", sign="€")
+
+
+def make_rate(id, rate):
+    return ExchangeRates(id=id, rate=Decimal(rate), base_currency=USD, target_currency=EUR)
+
+
+async def collect(response):
+    return [chunk async for chunk in response.body_iterator]
+
+
+class TestExport:
+
+    def test_repository_reads_named_cursor_in_chunks(self):
+        connection = MagicMock()
+        cursor = connection.cursor.return_value.__enter__.return_value
+        row = {"id": 1, "basecurrencyid": 1, "basecurrencycode": "USD", "targetcurrencyid": 2,
+               "targetcurrencycode": "EUR", "rate": Decimal("0.9")}
+        cursor.fetchmany.side_effect = [[row, row], [row], []]
+
+        @contextmanager
+        def data_source():
+            yield connection
+
+        repository = ExchangeRatesRepository()
+        repository.data_source = data_source
+
+        chunks = list(repository.iter_chunks(chunk_size=2))
+
+        assert [len(chunk) for chunk in chunks] == [2, 1]
+        assert connection.cursor.call_args.kwargs["name"] == "exchange_rates_export"
+        assert cursor.itersize == 2
+
+    def test_csv_export_streams_header_and_every_chunk(self):
+        chunks = iter([[make_rate(1, "0.9")], [make_rate(2, "0.91")]])
+
+        response = export_response(chunks, "csv")
+
+        assert response.media_type == "text/csv"
+        assert asyncio.run(collect(response)) == [
+            b"id,base_currency_id,base_currency_code,target_currency_id,target_currency_code,rate\n"
+            b"1,1,USD,2,EUR,0.9\n",
+            b"2,1,USD,2,EUR,0.91\n"
+        ]
+
+    def test_async_ndjson_export_of_empty_table(self):
+        async def chunks():
+            return
+            yield
+
+        async def run():
+            return await collect(await async_export_response(chunks(), "ndjson"))
+
+        assert asyncio.run(run()) == [b""]
@@ -0,0 +1,77 @@
+import json
+from unittest.mock import Mock
+from src.cache.local_cache import LocalCache
+from src.cache.invalidation_bus import InvalidationBus, INVALIDATION_SEQUENCE_KEY
+from src.services.rate_graph import RateGraph
+
+
+class TestInvalidationBus:
+
+    def _message(self, seq, keys, origin="other-worker", **extra):
+        return json.dumps({"seq": seq, "origin": origin, "keys": keys, **extra})
+
+    def test_publish_sends_sequence_and_keys(self):
+        bus = InvalidationBus(LocalCache())
+        redis_client = Mock()
+        redis_client.incr.return_value = 7
+
+        bus.publish(redis_client, ["currency:id:1", "currency:all"], graph_version=3)
+
+        redis_client.incr.assert_called_once_with(INVALIDATION_SEQUENCE_KEY)
+        message = json.loads(redis_client.publish.call_args[0][1])
+        assert message["seq"] == 7
+        assert message["keys"] == ["currency:id:1", "currency:all"]
+        assert message["graph_version"] == 3
+        assert message["origin"] == bus.origin
+
+    def test_message_from_other_worker_evicts_keys(self):
+        cache = LocalCache()
+        cache.set("currency:id:1", "USD")
+        cache.set("currency:id:2", "EUR")
+        bus = InvalidationBus(cache)
+        bus.resync(4)
+
+        bus.handle_message(self._message(5, ["currency:id:1"]))
+
+        assert cache.get("currency:id:1") is None
+        assert cache.get("currency:id:2") == "EUR"
+        assert bus.last_sequence == 5
+        assert bus.flushes == 0
+
+    def test_sequence_gap_flushes_local_cache(self):
+        cache = LocalCache()
+        cache.set("currency:id:2", "EUR")
+        bus = InvalidationBus(cache)
+        bus.resync(4)
+
+        bus.handle_message(self._message(7, ["currency:id:1"]))
+
+        assert cache.get("currency:id:2") is None
+        assert bus.flushes == 1
+        assert bus.last_sequence == 7
+
+    def test_resync_after_reconnect_flushes_when_messages_were_missed(self):
+        cache = LocalCache()
+        cache.set("currency:id:2", "EUR")
+        bus = InvalidationBus(cache)
+        bus.resync(4)
+
+        bus.resync(4)
+        assert cache.get("currency:id:2") == "EUR"
+
+        bus.resync(6)
+        assert cache.get("currency:id:2") is None
+        assert bus.flushes == 1
+
+    def test_graph_version_invalidates_rate_graph(self):
+        graph = RateGraph()
+        graph.load([], version=2)
+        bus = InvalidationBus(LocalCache())
+        bus.add_listener(graph.apply_invalidation)
+        bus.resync(0)
+
+        bus.handle_message(self._message(1, ["exchange_rate:all"], graph_version=2))
+        assert graph.loaded
+
+        bus.handle_message(self._message(2, ["exchange_rate:all"], graph_version=3))
+        assert not graph.loaded
@@ -0,0 +1,54 @@
+import time
+from src.cache.local_cache import LocalCache
+
+
+class TestLocalCache:
+
+    def test_get_set(self):
+        cache = LocalCache(max_size=10, ttl=60)
+
+        cache.set("currency:id:1", "USD")
+
+        assert cache.get("currency:id:1") == "USD"
+        assert cache.get("currency:id:2") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = LocalCache(max_size=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_entry_expires_after_ttl(self):
+        cache = LocalCache(max_size=10, ttl=60)
+        cache.set("a", 1, ttl=0.01)
+
+        time.sleep(0.02)
+
+        assert cache.get("a") is None
+        assert cache.stats()["expirations"] == 1
+
+    def test_ttl_is_capped_by_cache_ttl(self):
+        cache = LocalCache(max_size=10, ttl=0.01)
+        cache.set("a", 1, ttl=3600)
+
+        time.sleep(0.02)
+
+        assert cache.get("a") is None
+
+    def test_delete(self):
+        cache = LocalCache(max_size=10, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        cache.delete("a", "b")
+
+        assert len(cache) == 0
@@ -0,0 +1,52 @@
+import pytest
+from datetime import datetime, timezone
+from decimal import Decimal
+from fastapi import HTTPException
+from src.repositories.exchange_rates_repository import ExchangeRatesRepository, build_ohlc_query
+from src.repositories.keyset import asyncpg_placeholder
+from src.controllers.ohlc import MAX_OHLC_CANDLES, ohlc_window
+
+UTC = timezone.utc
+
+
+def make_row(base_id, target_id, minute, rate):
+    return {
+        "bucket": datetime(2024, 5, 1, 14, minute, tzinfo=UTC), "open": Decimal(rate), "high": Decimal(rate),
+        "low": Decimal(rate), "close": Decimal(rate), "samples": 1,
+        "basecurrencyid": base_id, "basecurrencycode": "USD",
+        "targetcurrencyid": target_id, "targetcurrencycode": "EUR" if target_id == 2 else "RUB"
+    }
+
+
+class TestOhlc:
+
+    def test_query_filters_pair_and_bucket_range(self):
+        query, params = build_ohlc_query(
+            "1h", datetime(2024, 5, 1), datetime(2024, 5, 2), "USD", None, asyncpg_placeholder
+        )
+
+        assert "o.resolution = $1 AND o.bucket >= $2 AND o.bucket < $3" in query
+        assert "o.basecurrencyid = (SELECT id FROM currencies WHERE code = $4)" in query
+        assert query.endswith("ORDER BY o.basecurrencyid, o.targetcurrencyid, o.bucket")
+        assert params == ["1h", datetime(2024, 5, 1, tzinfo=UTC), datetime(2024, 5, 2, tzinfo=UTC), "USD"]
+
+    def test_rows_are_grouped_into_series_per_pair(self):
+        rows = [make_row(1, 2, 5, "0.9"), make_row(1, 2, 6, "0.91"), make_row(1, 3, 5, "90")]
+
+        series_list = ExchangeRatesRepository.parse_ohlc_series("1m", rows)
+
+        assert [(s.target_currency.code, len(s.candles)) for s in series_list] == [("EUR", 2), ("RUB", 1)]
+        assert series_list[0].candles[1].close == Decimal("0.91")
+
+    def test_window_start_is_aligned_to_candle(self):
+        start, end = ohlc_window("1h", datetime(2024, 5, 1, 14, 5), datetime(2024, 5, 1, 18, 0))
+
+        assert start == datetime(2024, 5, 1, 14, 0, tzinfo=UTC)
+        assert end == datetime(2024, 5, 1, 18, 0, tzinfo=UTC)
+
+    def test_window_longer_than_limit_is_rejected(self):
+        with pytest.raises(HTTPException) as error:
+            ohlc_window("1m", datetime(2024, 5, 1), datetime(2024, 5, 3))
+
+        assert error.value.status_code == 400
+        assert str(MAX_OHLC_CANDLES) in error.value.detail
@@ -0,0 +1,90 @@
+import pytest
+from decimal import Decimal
+from fastapi import HTTPException
+from src.controllers.pagination import page_request
+from src.models.currency import Currency
+from src.models.page import PageRequest, decode_cursor, encode_cursor
+from src.repositories.keyset import build_page_query, psycopg2_placeholder, asyncpg_placeholder
+from src.repositories.currency_repository import CURRENCY_SORT_COLUMNS
+from src.repositories.exchange_rates_repository import (
+    EXCHANGE_RATE_SORT_COLUMNS,
+    EXCHANGE_RATE_BASE_FILTER,
+    EXCHANGE_RATE_TARGET_FILTER
+)
+
+
+class TestPageRequest:
+
+    def test_cursor_round_trip(self):
+        cursor = encode_cursor("-rate", (Decimal("0.92"), 7))
+
+        assert decode_cursor(cursor, "-rate") == ("0.92", 7)
+
+    def test_cursor_for_other_sort_is_rejected(self):
+        cursor = encode_cursor("rate", ("0.92", 7))
+
+        with pytest.raises(ValueError):
+            PageRequest.from_params(10, "id", cursor)
+        with pytest.raises(ValueError):
+            PageRequest.from_params(10, "id", "not-a-cursor")
+
+    def test_cursor_value_is_cast_to_sort_column_type(self):
+        cursor = encode_cursor("-rate", (Decimal("0.92"), 7))
+
+        page = page_request(10, cursor, "-rate", EXCHANGE_RATE_SORT_COLUMNS)
+
+        assert page.after == (Decimal("0.92"), 7)
+
+    @pytest.mark.parametrize("value", [None, "abc", "NaN", "Infinity", [1]])
+    def test_tampered_cursor_value_is_rejected_with_400(self, value):
+        cursor = encode_cursor("rate", (value, 7))
+
+        with pytest.raises(HTTPException) as error:
+            page_request(10, cursor, "rate", EXCHANGE_RATE_SORT_COLUMNS)
+        assert error.value.status_code == 400
+
+    def test_to_page_uses_extra_row_for_next_cursor(self):
+        page = PageRequest.from_params(2, "-code")
+        rows = [Currency(id=3, code="RUB"), Currency(id=2, code="EUR"), Currency(id=1, code="AUD")]
+
+        result = page.to_page(rows)
+
+        assert [c.code for c in result.items] == ["RUB", "EUR"]
+        next_page = PageRequest.from_params(2, "-code", result.next_cursor)
+        assert next_page.after == ("EUR", 2)
+        assert page.to_page(rows[:2]).next_cursor is None
+
+
+class TestBuildPageQuery:
+
+    def test_first_page_by_id(self):
+        query, params = build_page_query(
+            "SELECT * FROM currencies", PageRequest(limit=10), CURRENCY_SORT_COLUMNS, "id", [], psycopg2_placeholder
+        )
+
+        assert query == "SELECT * FROM currencies ORDER BY id ASC LIMIT %s"
+        assert params == [11]
+
+    def test_unique_sort_column_compares_only_that_column(self):
+        page = PageRequest(limit=5, sort="code", descending=True, after=("EUR", 2))
+
+        query, params = build_page_query("SELECT * FROM currencies", page, CURRENCY_SORT_COLUMNS, "id", [],
+                                         psycopg2_placeholder)
+
+        assert query.endswith("WHERE code < %s ORDER BY code DESC LIMIT %s")
+        assert params == ["EUR", 6]
+
+    def test_filters_and_row_comparison_for_rates(self):
+        page = PageRequest(limit=5, sort="rate", after=("0.92", 7), base_code="USD")
+
+        query, params = build_page_query(
+            "SELECT ...", page, EXCHANGE_RATE_SORT_COLUMNS, "e.id",
+            [(EXCHANGE_RATE_BASE_FILTER, page.base_code), (EXCHANGE_RATE_TARGET_FILTER, page.target_code)],
+            asyncpg_placeholder
+        )
+
+        assert query == (
+            "SELECT ... WHERE e.basecurrencyid = (SELECT id FROM currencies WHERE code = $1)"
+            " AND (e.rate, e.id) > ($2, $3) ORDER BY e.rate ASC, e.id ASC LIMIT $4"
+        )
+        assert params == ["USD", Decimal("0.92"), 7, 6]
@@ -0,0 +1,261 @@
+import threading
+import pytest
+from decimal import Decimal
+from unittest.mock import Mock, patch
+from src.services.rate_graph import RateGraph, RATE_GRAPH_VERSION_KEY
+from src.services.exchange_rates_service import ExchangeRatesServiceImpl
+from src.cache.single_flight import SingleFlight
+from src.models.currency import Currency
+from src.models.exchange_rates import ExchangeRates
+from src.cache.local_cache import LocalCache
+
+USD = Currency(id=1, code="USD", fullname="US Dollar", sign="$")
+EUR = Currency(id=2, code="EUR", fullname="Euro", sign="€")
+RUB = Currency(id=3, code="RUB", fullname="Russian Ruble", sign="₽")
+
+
+def make_rate(id, base, target, rate):
+    return ExchangeRates(id=id, rate=Decimal(rate), base_currency=base, target_currency=target)
+
+
+class TestRateGraph:
+
+    def test_load_and_find(self):
+        graph = RateGraph()
+        graph.load([make_rate(1, USD, EUR, "0.92"), make_rate(2, USD, RUB, "90.5")], version=7)
+
+        assert graph.loaded
+        assert graph.version == 7
+        assert graph.find("USD", "EUR").id == 1
+        assert graph.get_rate("USD", "RUB") == Decimal("90.5")
+        assert graph.find("EUR", "USD") is None
+
+    def test_upsert_replaces_entry_with_same_id(self):
+        graph = RateGraph()
+        graph.load([make_rate(1, USD, EUR, "0.92")], version=1)
+
+        graph.upsert(make_rate(1, USD, RUB, "90"))
+
+        assert graph.find("USD", "EUR") is None
+        assert graph.get_rate("USD", "RUB") == Decimal("90")
+        assert len(graph) == 1
+
+    def test_remove_by_id(self):
+        graph = RateGraph()
+        graph.load([make_rate(1, USD, EUR, "0.92")], version=1)
+
+        removed = graph.remove_by_id(1)
+
+        assert removed.id == 1
+        assert graph.find("USD", "EUR") is None
+
+    def test_advance_marks_graph_stale_on_version_gap(self):
+        graph = RateGraph()
+        graph.load([], version=3)
+
+        graph.advance(4)
+        assert graph.loaded and graph.version == 4
+
+        graph.advance(6)
+        assert graph.is_stale(6)
+
+
+class TestExchangeRatesServiceFindRate:
+
+    @pytest.fixture
+    def mock_repository(self):
+        repository = Mock()
+        repository.find_all.return_value = [make_rate(1, USD, EUR, "0.92")]
+        return repository
+
+    @pytest.fixture
+    def mock_redis_client(self):
+        mock_client = Mock()
+        mock_client.get.return_value = "5"
+        return mock_client
+
+    @pytest.fixture
+    def exchange_rates_service(self, mock_repository, mock_redis_client):
+        with patch('src.services.exchange_rates_service.get_redis_client', return_value=mock_redis_client), \
+                patch('src.services.exchange_rates_service.get_rate_graph', return_value=RateGraph()), \
+                patch('src.services.exchange_rates_service.get_local_cache', return_value=LocalCache()):
+            return ExchangeRatesServiceImpl(mock_repository)
+
+    def test_find_rate_loads_graph_once(self, exchange_rates_service, mock_repository, mock_redis_client):
+        first = exchange_rates_service.find_rate("USD", "EUR")
+        second = exchange_rates_service.find_rate("USD", "EUR")
+
+        assert first.rate == Decimal("0.92")
+        assert second is first
+        mock_repository.find_all.assert_called_once()
+        mock_redis_client.get.assert_called_once_with(RATE_GRAPH_VERSION_KEY)
+        assert exchange_rates_service.rate_graph.version == 5
+
+    def test_find_rate_reloads_when_version_changes(self, exchange_rates_service, mock_repository, mock_redis_client):
+        exchange_rates_service.rate_graph_check_interval = 0
+        exchange_rates_service.find_rate("USD", "EUR")
+        mock_redis_client.get.return_value = "6"
+
+        exchange_rates_service.find_rate("USD", "EUR")
+
+        assert mock_repository.find_all.call_count == 2
+        assert exchange_rates_service.rate_graph.version == 6
+
+    def test_reload_in_progress_serves_previous_snapshot(self, exchange_rates_service, mock_repository, mock_redis_client):
+        exchange_rates_service.single_flight = SingleFlight()
+        exchange_rates_service.find_rate("USD", "EUR")
+        exchange_rates_service.rate_graph.invalidate()
+        mock_redis_client.get.return_value = "6"
+        started, release = threading.Event(), threading.Event()
+
+        def slow_find_all():
+            started.set()
+            release.wait(5)
+            return [make_rate(1, USD, EUR, "0.95")]
+
+        mock_repository.find_all.side_effect = slow_find_all
+        leader = threading.Thread(target=exchange_rates_service.find_rate, args=("USD", "EUR"))
+        leader.start()
+        started.wait(5)
+
+        assert exchange_rates_service.find_rate("USD", "EUR").rate == Decimal("0.92")
+        release.set()
+        leader.join(5)
+        assert exchange_rates_service.find_rate("USD", "EUR").rate == Decimal("0.95")
+        assert mock_repository.find_all.call_count == 2
+
+    def test_failed_reload_is_not_retried_before_retry_interval(self, exchange_rates_service, mock_repository):
+        mock_repository.find_all.side_effect = RuntimeError("Ошибка при получении курсов обмена")
+        exchange_rates_service.find_rate("USD", "EUR")
+        exchange_rates_service.find_rate("USD", "EUR")
+        assert mock_repository.find_all.call_count == 1
+
+        exchange_rates_service.rate_graph_retry_interval = 0
+        exchange_rates_service.find_rate("USD", "EUR")
+        assert mock_repository.find_all.call_count == 2
+
+    def test_find_rates_resolves_each_pair_once(self, exchange_rates_service):
+        exchange_rates_service.find_rate = Mock(side_effect=lambda base, target: make_rate(1, USD, EUR, "0.92"))
+
+        rates = exchange_rates_service.find_rates([("USD", "EUR"), ("USD", "EUR"), ("EUR", "USD")])
+
+        assert set(rates) == {("USD", "EUR"), ("EUR", "USD")}
+        assert exchange_rates_service.find_rate.call_count == 2
+
+    def test_find_rates_without_graph_reads_cache_with_one_mget(self, exchange_rates_service, mock_repository, mock_redis_client):
+        mock_repository.find_all.side_effect = RuntimeError("Ошибка при получении курсов обмена")
+        mock_redis_client.mget.side_effect = lambda keys: [None] * len(keys) if keys[0].startswith("exchange_rate:") else ["0", "0"]
+        mock_repository.find_by_name.side_effect = lambda name: make_rate(1, USD, EUR, "0.92") if name == "USDEUR" else None
+
+        rates = exchange_rates_service.find_rates([("USD", "EUR"), ("EUR", "RUB")])
+
+        assert rates[("USD", "EUR")].rate == Decimal("0.92")
+        assert rates[("EUR", "RUB")] is None
+        assert mock_redis_client.mget.call_args_list[-1].args[0] == [
+            "exchange_rate:g0.0:name:USDEUR", "exchange_rate:g0.0:name:EURRUB"
+        ]
+        mock_redis_client.get.assert_called_once_with(RATE_GRAPH_VERSION_KEY)
+
+    def test_warm_up_loads_graph_and_queues_keys_from_one_find_all(self, exchange_rates_service, mock_repository, mock_redis_client):
+        mock_redis_client.mget.return_value = ["0", "0"]
+        batch = Mock()
+
+        queued = exchange_rates_service.warm_up(batch)
+
+        assert queued == 3
+        assert [c.args[0] for c in batch.setex.call_args_list] == [
+            "exchange_rate:g0.0:all", "exchange_rate:g0.0:id:1", "exchange_rate:g0.0:name:USDEUR"
+        ]
+        assert exchange_rates_service.find_rate("USD", "EUR").id == 1
+        mock_repository.find_all.assert_called_once()
+
+
+    def test_update_patches_graph_from_returned_row(self, exchange_rates_service, mock_repository):
+        exchange_rates_service.find_rate("USD", "EUR")
+        exchange_rates_service._bump_generation = Mock()
+        mock_repository.update.return_value = make_rate(1, USD, EUR, "0.95")
+
+        exchange_rates_service.update_exchange_rate(make_rate(1, USD, EUR, "0.95"), 1)
+
+        assert exchange_rates_service.rate_graph.get_rate("USD", "EUR") == Decimal("0.95")
+        mock_repository.find_by_id.assert_not_called()
+        exchange_rates_service._bump_generation.assert_called_once_with(rate_graph_changed=True)
+
+    def test_create_patches_graph_from_inserted_row(self, exchange_rates_service, mock_repository):
+        exchange_rates_service.find_rate("USD", "EUR")
+        exchange_rates_service._bump_generation = Mock()
+        mock_repository.create.return_value = make_rate(3, EUR, RUB, "100")
+
+        exchange_rates_service.create_exchange_rate(make_rate(None, EUR, RUB, "100"))
+
+        assert exchange_rates_service.rate_graph.find("EUR", "RUB").id == 3
+        mock_repository.find_by_name.assert_not_called()
+        exchange_rates_service._bump_generation.assert_called_once_with(rate_graph_changed=True)
+
+    def test_delete_of_missing_rate_is_not_invalidated(self, exchange_rates_service, mock_repository):
+        exchange_rates_service._bump_generation = Mock()
+        mock_repository.delete.return_value = None
+
+        assert exchange_rates_service.delete_by_id(99) is None
+        exchange_rates_service._bump_generation.assert_not_called()
+
+class TestRateGraphCrossRates:
+
+    def test_inverse_rate(self):
+        graph = RateGraph()
+        graph.load([make_rate(1, USD, EUR, "0.8")])
+
+        resolved = graph.resolve("EUR", "USD")
+
+        assert resolved.id is None
+        assert resolved.rate == Decimal("1.25")
+        assert resolved.base_currency.code == "EUR"
+        assert resolved.target_currency.code == "USD"
+
+    def test_cross_rate_via_pivot(self):
+        graph = RateGraph(pivot_code="USD")
+        graph.load([make_rate(1, USD, EUR, "0.8"), make_rate(2, USD, RUB, "90")])
+
+        resolved = graph.resolve("EUR", "RUB")
+
+        assert resolved.rate == Decimal("112.5")
+        assert graph.resolve_path("EUR", "RUB") == ["EUR", "USD", "RUB"]
+
+    def test_direct_rate_preferred_over_inverse(self):
+        graph = RateGraph()
+        graph.load([make_rate(1, USD, EUR, "0.8"), make_rate(2, EUR, USD, "1.3")])
+
+        assert graph.resolve("EUR", "USD").id == 2
+        assert graph.resolve("EUR", "USD").rate == Decimal("1.3")
+
+    def test_rate_change_refreshes_cached_cross_rates(self):
+        graph = RateGraph(pivot_code="USD")
+        graph.load([make_rate(1, USD, EUR, "0.8"), make_rate(2, USD, RUB, "90")])
+
+        graph.upsert(make_rate(2, USD, RUB, "100"))
+
+        assert graph.resolve("EUR", "RUB").rate == Decimal("125")
+
+    def test_cross_rate_divides_inverse_hops_once(self):
+        graph = RateGraph(pivot_code="USD")
+        graph.load([make_rate(1, USD, EUR, "0.9"), make_rate(2, USD, RUB, "90")])
+
+        assert graph.resolve("EUR", "RUB").rate == Decimal("100")
+
+    def test_removed_rate_breaks_path(self):
+        graph = RateGraph(pivot_code="USD")
+        graph.load([make_rate(1, USD, EUR, "0.8"), make_rate(2, USD, RUB, "90")])
+
+        graph.remove_by_id(1)
+
+        assert graph.resolve("EUR", "RUB") is None
+        assert graph.resolve("RUB", "USD").rate == Decimal(1) / Decimal(90)
+
+    def test_upsert_many_adds_edges_and_changes_rates(self):
+        graph = RateGraph(pivot_code="USD")
+        graph.load([make_rate(1, USD, EUR, "0.8")])
+
+        graph.upsert_many([make_rate(1, USD, EUR, "0.9"), make_rate(2, USD, RUB, "90")])
+
+        assert len(graph) == 2
+        assert graph.resolve("EUR", "RUB").rate == Decimal("100")
@@ -0,0 +1,96 @@
+import pytest
+from datetime import datetime, timezone, timedelta
+from decimal import Decimal
+from unittest.mock import MagicMock, Mock, patch
+from contextlib import contextmanager
+from src.models.currency import Currency
+from src.models.exchange_rates import ExchangeRates
+from src.repositories.exchange_rates_repository import ExchangeRatesRepository, history_timestamp
+from src.services.exchange_rates_service import ExchangeRatesServiceImpl
+from src.services.rate_graph import RateGraph
+from src.cache.local_cache import LocalCache
+
+USD = Currency(id=1, code="USD", fullname="US Dollar", sign="$")
+EUR = Currency(id=2, code="EUR", fullname="Euro", sign="€")
+RUB = Currency(id=3, code="RUB", fullname="Russian Ruble", sign="₽")
+
+
+def make_rate(id, base, target, rate):
+    return ExchangeRates(id=id, rate=Decimal(rate), base_currency=base, target_currency=target)
+
+
+class TestRateHistory:
+
+    @pytest.fixture
+    def mock_repository(self):
+        return Mock()
+
+    @pytest.fixture
+    def exchange_rates_service(self, mock_repository):
+        with patch('src.services.exchange_rates_service.get_redis_client', return_value=Mock()), \
+                patch('src.services.exchange_rates_service.get_rate_graph', return_value=RateGraph(pivot_code="USD")), \
+                patch('src.services.exchange_rates_service.get_local_cache', return_value=LocalCache()):
+            return ExchangeRatesServiceImpl(mock_repository)
+
+    def test_naive_moment_is_treated_as_utc(self):
+        moscow = timezone(timedelta(hours=3))
+
+        assert history_timestamp(datetime(2024, 5, 1, 14, 5)) == datetime(2024, 5, 1, 14, 5, tzinfo=timezone.utc)
+        assert history_timestamp(datetime(2024, 5, 1, 17, 5, tzinfo=moscow)).tzinfo is moscow
+
+    def test_repository_passes_codes_and_moment_in_query_order(self):
+        connection = MagicMock()
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.fetchone.return_value = None
+
+        @contextmanager
+        def data_source():
+            yield connection
+
+        repository = ExchangeRatesRepository()
+        repository.data_source = data_source
+
+        assert repository.find_by_name_as_of("USDEUR", datetime(2024, 5, 1, 14, 5)) is None
+        assert cursor.execute.call_args.args[1] == (
+            "USD", "EUR", datetime(2024, 5, 1, 14, 5, tzinfo=timezone.utc)
+        )
+
+    def test_direct_rate_as_of_skips_full_history(self, exchange_rates_service, mock_repository):
+        mock_repository.find_by_codes_as_of.return_value = make_rate(1, USD, EUR, "0.8")
+        as_of = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+        rate = exchange_rates_service.find_rate_as_of("USD", "EUR", as_of)
+
+        assert rate.rate == Decimal("0.8")
+        mock_repository.find_by_codes_as_of.assert_called_once_with("USD", "EUR", as_of)
+        mock_repository.find_all_as_of.assert_not_called()
+
+    def test_inverse_rate_as_of_reads_reverse_pair(self, exchange_rates_service, mock_repository):
+        mock_repository.find_by_codes_as_of.side_effect = [None, make_rate(1, USD, EUR, "0.8")]
+        as_of = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+        rate = exchange_rates_service.find_rate_as_of("EUR", "USD", as_of)
+
+        assert rate.rate == Decimal("1.25")
+        assert (rate.base_currency.code, rate.target_currency.code) == ("EUR", "USD")
+        assert mock_repository.find_by_codes_as_of.call_args.args == ("USD", "EUR", as_of)
+        mock_repository.find_all_as_of.assert_not_called()
+
+    def test_cross_rate_as_of_uses_separate_graph(self, exchange_rates_service, mock_repository):
+        mock_repository.find_by_codes_as_of.return_value = None
+        mock_repository.find_all_as_of.return_value = [make_rate(1, USD, EUR, "0.8"), make_rate(2, USD, RUB, "90")]
+        as_of = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+        rate = exchange_rates_service.find_rate_as_of("EUR", "RUB", as_of)
+
+        assert rate.rate == Decimal("112.5")
+        mock_repository.find_all_as_of.assert_called_once_with(as_of)
+        assert not exchange_rates_service.rate_graph.loaded
+
+    def test_as_of_graph_builds_paths_from_base_currency_only(self):
+        graph = RateGraph(pivot_code="USD")
+        graph.load([make_rate(1, USD, EUR, "0.8"), make_rate(2, USD, RUB, "90")], source_codes=["EUR"])
+
+        assert graph.resolve("EUR", "RUB").rate == Decimal("112.5")
+        assert graph.resolve("RUB", "EUR") is None
+        assert graph.stats()["paths"] == 2
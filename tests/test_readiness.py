@@ -0,0 +1,106 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+import main
+from src.config.readiness import Readiness
+from src.migrations import SchemaNotReadyError
+
+
+class TestReadiness:
+
+    def test_not_ready_until_warmup_finished(self):
+        readiness = Readiness(required=["database"], started_at=0.0)
+        readiness.begin()
+
+        asyncio.run(readiness.run("database", AsyncMock()))
+
+        assert not readiness.ready
+        readiness.finish()
+        assert readiness.ready
+        assert readiness.stats()["cold_start_seconds"] > 0
+
+    def test_optional_component_failure_keeps_app_ready(self):
+        readiness = Readiness(required=["database"])
+        readiness.begin()
+
+        asyncio.run(readiness.run("database", AsyncMock()))
+        ok = asyncio.run(readiness.run("redis", AsyncMock(side_effect=ConnectionError("Connection refused"))))
+        readiness.finish()
+
+        assert not ok
+        assert readiness.ready
+        assert readiness.stats()["components"]["redis"] == {"ready": False, "seconds": 0.0, "error": "Connection refused"}
+
+    def test_recheck_retries_failed_required_component(self):
+        readiness = Readiness(required=["database"])
+        probe = AsyncMock(side_effect=[ConnectionError("Connection refused"), None])
+        readiness.begin()
+        asyncio.run(readiness.run("database", probe))
+        readiness.finish()
+
+        assert not readiness.ready
+        assert asyncio.run(readiness.recheck())
+        assert probe.await_count == 2
+
+    def test_concurrent_rechecks_share_one_probe(self):
+        readiness = Readiness(required=["database"])
+        calls = []
+
+        async def probe():
+            calls.append(1)
+            if len(calls) == 1:
+                raise ConnectionError("Connection refused")
+            await asyncio.sleep(0.01)
+
+        async def scenario():
+            readiness.begin()
+            await readiness.run("database", probe)
+            readiness.finish()
+            return await asyncio.gather(*(readiness.recheck() for _ in range(5)))
+
+        assert asyncio.run(scenario()) == [True] * 5
+        assert len(calls) == 2
+
+    def test_fatal_error_is_recorded_and_raised_only_at_startup(self):
+        readiness = Readiness(required=["database"])
+        probe = AsyncMock(side_effect=SchemaNotReadyError("Не применена миграция"))
+        readiness.begin()
+
+        with pytest.raises(SchemaNotReadyError):
+            asyncio.run(readiness.run("database", probe, fatal=(SchemaNotReadyError,)))
+        readiness.finish()
+
+        assert not asyncio.run(readiness.recheck())
+        assert readiness.stats()["components"]["database"]["error"] == "Не применена миграция"
+
+    def test_late_database_is_checked_for_schema_before_ready(self):
+        readiness = Readiness(required=["database"])
+        open_database = AsyncMock(side_effect=[ConnectionError("Connection refused"), None, None])
+        check_schema = Mock(side_effect=[SchemaNotReadyError("Не применена миграция"), None])
+        warm_up_services = AsyncMock()
+        with patch.object(main, "get_readiness", return_value=readiness), \
+                patch.object(main, "open_database", open_database), \
+                patch.object(main, "check_schema", check_schema), \
+                patch.object(main, "warm_up_services", warm_up_services):
+            readiness.begin()
+            asyncio.run(main.warm_up_database())
+            readiness.finish()
+
+            assert not asyncio.run(readiness.recheck())
+            assert warm_up_services.await_count == 0
+            assert asyncio.run(readiness.recheck())
+        assert warm_up_services.await_count == 1
+
+    def test_database_lost_during_schema_check_does_not_abort_startup(self):
+        readiness = Readiness(required=["database"])
+        verify_schema = Mock(side_effect=RuntimeError("Ошибка подключения к базе данных: connection refused"))
+        with patch.object(main, "get_readiness", return_value=readiness), \
+                patch.object(main, "open_database", AsyncMock()), \
+                patch.object(main, "verify_schema", verify_schema), \
+                patch.object(main, "warm_up_services", AsyncMock()):
+            readiness.begin()
+            asyncio.run(main.warm_up_database())
+            readiness.finish()
+
+        assert not readiness.ready
+        assert "connection refused" in readiness.stats()["components"]["database"]["error"]
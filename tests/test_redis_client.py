@@ -0,0 +1,106 @@
+import asyncio
+import pytest
+import redis
+from unittest.mock import AsyncMock, Mock
+from src.config.redis import (
+    AsyncGuardedRedis,
+    CircuitBreaker,
+    GuardedRedis,
+    RedisConfig,
+    RedisUnavailableError
+)
+
+
+class TestCircuitBreaker:
+
+    @pytest.fixture
+    def client(self):
+        return Mock()
+
+    @pytest.fixture
+    def guarded(self, client):
+        return GuardedRedis(client, CircuitBreaker(threshold=2, cooldown=60))
+
+    def test_opens_after_threshold_and_skips_redis(self, client, guarded):
+        client.get.side_effect = redis.TimeoutError("Timeout reading from socket")
+
+        for _ in range(2):
+            with pytest.raises(redis.TimeoutError):
+                guarded.get("currency:g0:id:1")
+        with pytest.raises(RedisUnavailableError):
+            guarded.get("currency:g0:id:1")
+
+        assert client.get.call_count == 2
+        assert guarded._breaker.stats()["state"] == CircuitBreaker.OPEN
+        assert guarded._breaker.stats()["rejected"] == 1
+
+    def test_probe_after_cooldown_closes_breaker(self, client):
+        breaker = CircuitBreaker(threshold=1, cooldown=0)
+        guarded = GuardedRedis(client, breaker)
+        client.get.side_effect = [redis.ConnectionError("Connection refused"), "1"]
+
+        with pytest.raises(redis.ConnectionError):
+            guarded.get("cache:gen:currency")
+        assert breaker.state == CircuitBreaker.OPEN
+
+        assert guarded.get("cache:gen:currency") == "1"
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_server_errors_do_not_open_breaker(self, client, guarded):
+        client.incr.side_effect = redis.ResponseError("WRONGTYPE")
+
+        for _ in range(3):
+            with pytest.raises(redis.ResponseError):
+                guarded.incr("cache:gen:currency")
+
+        assert guarded._breaker.state == CircuitBreaker.CLOSED
+
+    def test_pipeline_execute_is_guarded(self, client, guarded):
+        client.pipeline.return_value.execute.side_effect = redis.ConnectionError("Connection refused")
+
+        for _ in range(2):
+            pipeline = guarded.pipeline(transaction=True)
+            pipeline.incr("cache:gen:currency")
+            with pytest.raises(redis.ConnectionError):
+                pipeline.execute()
+
+        assert guarded._breaker.state == CircuitBreaker.OPEN
+        client.pipeline.return_value.incr.assert_called_with("cache:gen:currency")
+
+    def test_async_client_is_guarded(self):
+        client = Mock(get=AsyncMock(side_effect=redis.TimeoutError("Timeout reading from socket")))
+        guarded = AsyncGuardedRedis(client, CircuitBreaker(threshold=1, cooldown=60))
+
+        async def run():
+            with pytest.raises(redis.TimeoutError):
+                await guarded.get("currency:g0:id:1")
+            with pytest.raises(RedisUnavailableError):
+                await guarded.get("currency:g0:id:1")
+
+        asyncio.run(run())
+        assert client.get.await_count == 1
+
+
+class TestRedisConfig:
+
+    def test_from_env(self, monkeypatch):
+        monkeypatch.setenv("REDIS_HOST", "redis")
+        monkeypatch.setenv("REDIS_POOL_MAX_SIZE", "20")
+        monkeypatch.setenv("REDIS_SOCKET_TIMEOUT", "0.2")
+        monkeypatch.setenv("REDIS_BREAKER_THRESHOLD", "3")
+
+        config = RedisConfig.from_env()
+
+        assert config.host == "redis"
+        assert config.max_connections == 20
+        assert config.socket_timeout == 0.2
+        assert config.breaker_threshold == 3
+
+    def test_connection_pool_carries_timeouts_and_retry(self):
+        pool = RedisConfig(socket_timeout=0.2, max_connections=7).connection_pool(
+            redis.BlockingConnectionPool, redis.retry.Retry
+        )
+
+        assert pool.max_connections == 7
+        assert pool.connection_kwargs["socket_timeout"] == 0.2
+        assert pool.connection_kwargs["retry"] is not None
@@ -0,0 +1,20 @@
+from src.cache.rendered import RenderedResponse
+
+
+class TestRenderedResponse:
+
+    def test_etag_depends_on_body(self):
+        first = RenderedResponse.from_body(b'[{"id":1}]')
+
+        assert first.etag == RenderedResponse.from_body(b'[{"id":1}]').etag
+        assert first.etag != RenderedResponse.from_body(b'[{"id":2}]').etag
+        assert first.etag.startswith('"') and first.etag.endswith('"')
+
+    def test_if_none_match(self):
+        rendered = RenderedResponse.from_body(b"[]")
+
+        assert rendered.matches(rendered.etag)
+        assert rendered.matches(f'"other", W/{rendered.etag}')
+        assert rendered.matches("*")
+        assert not rendered.matches('"other"')
+        assert not rendered.matches(None)
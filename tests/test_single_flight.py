@@ -0,0 +1,114 @@
+import time
+import asyncio
+import threading
+from unittest.mock import Mock
+from src.cache.single_flight import SingleFlight, AsyncSingleFlight
+
+
+class TestSingleFlight:
+
+    def _run_concurrently(self, single_flight, loader, count=5):
+        results = []
+        errors = []
+
+        def call():
+            try:
+                results.append(single_flight.do("exchange_rate:g0.0:all", loader))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads, results, errors
+
+    def test_concurrent_misses_load_once(self):
+        single_flight = SingleFlight()
+        release = threading.Event()
+        loader = Mock(side_effect=lambda: release.wait(1) and ["USDEUR"])
+
+        threads, results, errors = self._run_concurrently(single_flight, loader)
+        while single_flight.coalesced < 4:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert loader.call_count == 1
+        assert results == [["USDEUR"]] * 5
+        assert not errors
+        assert single_flight.stats()["in_flight"] == 0
+
+    def test_loader_error_is_shared_with_waiters(self):
+        single_flight = SingleFlight()
+        release = threading.Event()
+
+        def loader():
+            release.wait(1)
+            raise RuntimeError("Ошибка при получении курсов обмена")
+
+        threads, results, errors = self._run_concurrently(single_flight, loader, count=3)
+        while single_flight.coalesced < 2:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(errors) == 3
+        assert not results
+
+    def test_redis_lock_holder_elsewhere_serves_probed_value(self):
+        single_flight = SingleFlight(redis_lock=True, lock_ttl=1.0, poll_interval=0)
+        redis_client = Mock()
+        redis_client.set.return_value = None
+        redis_client.exists.return_value = 1
+        probe = Mock(side_effect=[None, ["USDEUR"]])
+        loader = Mock()
+
+        result = single_flight.do("exchange_rate:g0.0:all", loader, redis_client, probe)
+
+        assert result == ["USDEUR"]
+        loader.assert_not_called()
+        assert single_flight.lock_waits == 1
+
+    def test_redis_lock_is_released_after_load(self):
+        single_flight = SingleFlight(redis_lock=True)
+        redis_client = Mock()
+        redis_client.set.return_value = True
+
+        result = single_flight.do("exchange_rate:g0.0:all", lambda: ["USDEUR"], redis_client)
+
+        assert result == ["USDEUR"]
+        assert redis_client.set.call_args.kwargs == {"nx": True, "px": 5000}
+        redis_client.eval.assert_called_once()
+        assert redis_client.eval.call_args.args[2] == "lock:exchange_rate:g0.0:all"
+
+
+class TestAsyncSingleFlight:
+
+    def test_concurrent_misses_load_once(self):
+        single_flight = AsyncSingleFlight()
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return ["USDEUR"]
+
+        async def run():
+            return await asyncio.gather(*(single_flight.do("exchange_rate:g0.0:all", loader) for _ in range(5)))
+
+        results = asyncio.run(run())
+
+        assert len(calls) == 1
+        assert results == [["USDEUR"]] * 5
+        assert single_flight.coalesced == 4
+
+    def test_key_without_generation_is_not_coalesced(self):
+        single_flight = AsyncSingleFlight()
+
+        async def loader():
+            return None
+
+        assert asyncio.run(single_flight.do(None, loader)) is None
+        assert single_flight.loads == 0